@@ -0,0 +1,54 @@
+"""
+Время сохранения и загрузки снапшота хранилища: JSON (indent=4) против бинарного формата.
+
+Использование:
+    python -m benchmarks.bench_snapshot
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+from benchmarks.bench_storage_memory import USER_COUNTS, build_json_data
+from services.storage import UserStorage
+
+REPEATS = 3
+
+
+def best_of(func) -> float:
+    """Лучшее время выполнения функции из REPEATS запусков, в миллисекундах."""
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def bench_format(directory: str, users_count: int, snapshot_format: str) -> tuple:
+    filename = os.path.join(directory, f"users_{snapshot_format}_{users_count}.json")
+    storage = UserStorage(filename=filename, snapshot_format=snapshot_format)
+    storage._import_json_data(build_json_data(users_count))
+
+    save_ms = best_of(lambda: storage._save_sync(storage._serialize_snapshot()))
+
+    loader = UserStorage(filename=filename, snapshot_format=snapshot_format)
+    load_ms = best_of(lambda: asyncio.run(loader.load()))
+
+    return save_ms, load_ms, os.path.getsize(storage.snapshot_filename)
+
+
+def main():
+    print(f"{'users':>8} | {'format':>6} | {'save, ms':>9} | {'load, ms':>9} | {'size, KB':>9}")
+    with tempfile.TemporaryDirectory() as directory:
+        for users_count in USER_COUNTS:
+            for snapshot_format in ("json", "binary"):
+                save_ms, load_ms, size = bench_format(directory, users_count, snapshot_format)
+                print(
+                    f"{users_count:>8} | {snapshot_format:>6} | {save_ms:>9.1f} "
+                    f"| {load_ms:>9.1f} | {size / 1024:>9.0f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
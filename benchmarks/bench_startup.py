@@ -0,0 +1,84 @@
+"""
+Время запуска клиентов Google Sheets по фазам: импорт модуля, конструктор и
+создание объекта сервиса при первом запросе (для googleapiclient — вместе
+с отложенным импортом клиента и загрузкой ключа).
+
+Каждый замер выполняется в отдельном интерпретаторе, чтобы импорты были холодными.
+Получение токена не замеряется: для него нужна сеть.
+
+Использование:
+    python -m benchmarks.bench_startup
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+import rsa
+
+REPEATS = 5
+
+# Выполняется в дочернем процессе: печатает длительности фаз в миллисекундах
+CHILD_SCRIPT = """
+import json, sys, time
+
+client, credentials_path = sys.argv[1], sys.argv[2]
+timings = {}
+
+started = time.perf_counter()
+if client == "googleapiclient":
+    from services.google_sheets import GoogleSheetsService as Service
+else:
+    from services.aio_google_sheets import AioGoogleSheetsService as Service
+timings["import"] = time.perf_counter() - started
+
+started = time.perf_counter()
+service = Service("sheet-id", credentials_path)
+timings["init"] = time.perf_counter() - started
+
+started = time.perf_counter()
+if client == "googleapiclient":
+    service._get_thread_service()
+timings["first_build"] = time.perf_counter() - started
+
+print(json.dumps({phase: value * 1000 for phase, value in timings.items()}))
+"""
+
+PHASES = ("import", "init", "first_build")
+
+
+def write_credentials(directory: str) -> str:
+    """Синтетический файл сервисного аккаунта."""
+    _, private_key = rsa.newkeys(1024)
+    path = os.path.join(directory, "service_account.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "type": "service_account",
+            "client_email": "bot@example.iam.gserviceaccount.com",
+            "private_key": private_key.save_pkcs1().decode(),
+            "token_uri": "https://oauth2.example.com/token",
+        }, f)
+    return path
+
+
+def run_child(client: str, credentials_path: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT, client, credentials_path],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    print(f"{'client':>16} | " + " | ".join(f"{phase + ', ms':>15}" for phase in PHASES))
+    with tempfile.TemporaryDirectory() as directory:
+        credentials_path = write_credentials(directory)
+        for client in ("googleapiclient", "aiohttp"):
+            runs = [run_child(client, credentials_path) for _ in range(REPEATS)]
+            best = {phase: min(run[phase] for run in runs) for phase in PHASES}
+            print(f"{client:>16} | " + " | ".join(f"{best[phase]:>15.1f}" for phase in PHASES))
+
+
+if __name__ == "__main__":
+    main()
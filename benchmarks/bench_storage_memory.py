@@ -0,0 +1,61 @@
+"""
+Сравнение резидентного размера данных хранилища: словари JSON-формата
+против компактных записей UserStorage (__slots__, целые id, порядковые даты).
+
+Использование:
+    python -m benchmarks.bench_storage_memory
+"""
+import tracemalloc
+
+from config.constants import DAY_TO_COLUMN, TIME_TO_ROW
+from services.storage import UserStorage
+
+USER_COUNTS = (10_000, 100_000)
+BOOKING_DATE = "20.05"
+
+
+def build_json_data(users_count: int) -> dict:
+    """Синтетические данные в формате JSON-снапшота: все слоты сетки заняты."""
+    users = {
+        str(100_000_000 + i): {"name": f"Пользователь {i}", "points": {}}
+        for i in range(users_count)
+    }
+    global_map = {}
+    cells = [f"{column}{row}" for column in DAY_TO_COLUMN.values() for row in TIME_TO_ROW.values()]
+    for i, cell in enumerate(cells):
+        str_id = str(100_000_000 + i)
+        users[str_id]["points"][cell] = BOOKING_DATE
+        global_map[cell] = {"user_id": str_id, "date": BOOKING_DATE}
+    return {"users": users, "global_map": global_map}
+
+
+def measure(factory) -> int:
+    """Возвращает объем памяти (байт), удерживаемой объектом, созданным factory."""
+    tracemalloc.start()
+    obj = factory()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return size
+
+
+def main():
+    print(f"{'users':>8} | {'dict layout, MB':>16} | {'records, MB':>12} | {'ratio':>6}")
+    for users_count in USER_COUNTS:
+        dict_size = measure(lambda: build_json_data(users_count))
+
+        def build_records():
+            # Исходные словари освобождаются после импорта, в замер попадают только записи
+            storage = UserStorage(filename="bench_unused.json")
+            storage._import_json_data(build_json_data(users_count))
+            return storage
+
+        records_size = measure(build_records)
+        print(
+            f"{users_count:>8} | {dict_size / 2**20:>16.2f} | {records_size / 2**20:>12.2f} "
+            f"| {dict_size / records_size:>6.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
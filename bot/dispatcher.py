@@ -1,13 +1,18 @@
 from aiogram import Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 
+from bot.middlewares import SheetsDeadlineMiddleware
+from config.settings import settings
+
 def create_dispatcher() -> Dispatcher:
     """
     Создает и настраивает экземпляр Dispatcher.
     
     Returns:
-        Dispatcher: Корневой роутер с поддержкой FSM в памяти.
+        Dispatcher: Корневой роутер с поддержкой FSM в памяти
+        и дедлайном запросов к Google Sheets на каждый апдейт.
     """
     storage = MemoryStorage()
     dp = Dispatcher(storage=storage)
-    return dp
\ No newline at end of file
+    dp.update.outer_middleware(SheetsDeadlineMiddleware(settings.sheets_update_deadline))
+    return dp
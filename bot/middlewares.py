@@ -0,0 +1,31 @@
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from services.deadlines import sheets_deadline
+
+
+class SheetsDeadlineMiddleware(BaseMiddleware):
+    """
+    Задает общий дедлайн запросов к Google Sheets на время обработки одного апдейта.
+
+    Дедлайн передается вниз через contextvar: каждый запрос к API из хендлера
+    укладывается в его остаток, а не ждет ответа бесконечно.
+    """
+
+    def __init__(self, timeout: Optional[float]):
+        """
+        Args:
+            timeout: Бюджет времени на запросы к API в секундах; None — без ограничения.
+        """
+        self._timeout = timeout
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        with sheets_deadline(self._timeout):
+            return await handler(event, data)
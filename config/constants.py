@@ -4,6 +4,7 @@
 
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 GOOGLE_SHEETS_BASE_URL = "https://docs.google.com/spreadsheets/d/"
+SHEETS_API_URL = "https://sheets.googleapis.com/v4/spreadsheets"
 
 # Диапазон данных в таблице (захватываем сетку бронирования)
 GS_DATA_RANGE = "A1:N9"
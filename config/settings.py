@@ -1,3 +1,5 @@
+from typing import Literal, Optional
+
 from pydantic import computed_field, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -29,6 +31,42 @@ class BotSettings(BaseSettings):
 class AppSettings(BaseSettings):
     """Общие настройки приложения."""
     lock_timeout: int = Field(default=10, description="Таймаут блокировки ресурса в секундах")
+    storage_backend: Literal["json", "sqlite"] = Field(default="json", description="Бэкенд хранилища пользователей")
+    storage_json_path: str = Field(default="data/users_data.json", description="Путь к JSON-хранилищу")
+    storage_sqlite_path: str = Field(default="data/users_data.sqlite3", description="Путь к базе SQLite")
+    storage_snapshot_format: Literal["json", "binary"] = Field(default="json", description="Формат снапшота JSON-хранилища")
+    storage_journal: bool = Field(default=False, description="Включить append-only журнал мутаций хранилища")
+    storage_flush_interval: float = Field(default=0.05, description="Окно групповой записи хранилища на диск в секундах")
+    storage_compact_threshold: int = Field(default=256 * 1024, description="Размер журнала (байт) для запуска компактизации")
+    expiry_purge_interval: float = Field(default=3600, description="Интервал фоновой очистки просроченных записей в секундах")
+    table_cache_max_staleness: float = Field(default=300, description="Максимальный возраст кэша таблицы, который отдается во время фонового обновления, в секундах")
+    sheets_write_window: float = Field(default=0.05, description="Окно объединения записей в таблицу в один batchUpdate в секундах")
+    booking_precheck_staleness: float = Field(default=2, description="Максимальный возраст снимка таблицы для проверки ячейки перед бронированием в секундах")
+    booking_precheck_cell_age: float = Field(default=0.5, description="Возраст снимка в секундах, после которого ячейка перечитывается из таблицы прямо перед бронированием")
+    booking_verify_delay: Optional[float] = Field(default=3, description="Задержка проверки записанных ячеек в секундах (пусто — проверка отключена)")
+    sheet_version_cell: Optional[str] = Field(default=None, description="Ячейка-счетчик версии таблицы вне сетки записей, например P1; бот перезаписывает ее значение (пусто — протокол версий отключен)")
+    sheet_full_read_interval: float = Field(default=600, description="Интервал полной загрузки сетки при неизменном счетчике версии в секундах")
+    sheets_client: Literal["googleapiclient", "aiohttp"] = Field(default="googleapiclient", description="Клиент Google Sheets API")
+    sheets_max_workers: int = Field(default=4, description="Количество потоков для запросов googleapiclient")
+    sheets_read_quota: int = Field(default=60, description="Квота запросов чтения к Sheets API в минуту")
+    sheets_write_quota: int = Field(default=60, description="Квота запросов записи к Sheets API в минуту")
+    sheets_burst: int = Field(default=10, description="Допустимый всплеск запросов сверх равномерной квоты")
+    sheets_max_retries: int = Field(default=3, description="Количество повторов запроса при ответах 429/5xx")
+    sheets_read_reuse_window: float = Field(default=0, description="Сколько секунд результат завершенного чтения отдается новым запросам того же диапазона")
+    sheets_read_timeout: Optional[float] = Field(default=10, description="Таймаут операции чтения из Sheets API (с ожиданием квоты и повторами) в секундах (пусто — без ограничения)")
+    sheets_write_timeout: Optional[float] = Field(default=15, description="Таймаут операции записи в Sheets API в секундах (пусто — без ограничения)")
+    sheets_update_deadline: Optional[float] = Field(default=30, description="Общий дедлайн запросов к Sheets API при обработке одного апдейта в секундах (пусто — без ограничения)")
+    sheets_hedge_percentile: Optional[float] = Field(default=None, description="Перцентиль задержки чтения, после которого отправляется дублирующий запрос (пусто — хеджирование выключено)")
+    sheets_hedge_budget: float = Field(default=0.05, description="Максимальная доля дублирующих запросов от числа чтений")
+    sheets_breaker_failures: int = Field(default=5, description="Сколько сбоев Sheets API подряд размыкают выключатель (работа по последнему снимку)")
+    sheets_breaker_slow_call: Optional[float] = Field(default=5, description="Ответ Sheets API дольше этого времени в секундах считается сбоем (пусто — не учитывается)")
+    sheets_breaker_reset: float = Field(default=30, description="Через сколько секунд после размыкания выключателя отправить пробный запрос")
+    sheets_outbox_path: Optional[str] = Field(default="data/sheets_outbox.jsonl", description="Путь к очереди записей, принятых при недоступной таблице (пусто — очередь отключена)")
+    sheets_outbox_max_attempts: int = Field(default=5, description="Сколько раз таблица может отклонить операцию из очереди, прежде чем она будет перенесена в файл отклоненных")
+    sheets_outbox_interval: float = Field(default=15, description="Пауза между попытками отправить очередь записей в таблицу в секундах")
+    sheets_pool_size: int = Field(default=10, description="Максимум одновременных соединений клиента aiohttp")
+    sheets_stats_interval: Optional[float] = Field(default=300, description="Интервал записи статистики запросов к Google Sheets в журнал в секундах (пусто — не записывается)")
+    reconcile_interval: float = Field(default=60, description="Максимальная пауза между фоновыми сверками с таблицей в секундах")
 
 
 settings = AppSettings()
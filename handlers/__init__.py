@@ -2,7 +2,7 @@
 from aiogram import Dispatcher
 from aiogram.filters import Command
 
-from services.storage import UserStorage
+from services.storage_base import BaseUserStorage
 from utils.filters import IsNamedUser
 
 # Импортируем все наши роутеры
@@ -13,7 +13,7 @@ from .booking.callbacks import router as booking_callbacks_router
 from .booking.management import router as booking_management_router
 from .user_commands import router as user_commands_router
 
-def setup_routers(dp: Dispatcher, storage: UserStorage):
+def setup_routers(dp: Dispatcher, storage: BaseUserStorage):
     """
     Настраивает и подключает все роутеры проекта.
     """
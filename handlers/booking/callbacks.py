@@ -11,9 +11,10 @@ from keyboards.inline import get_days_keyboard, get_times_keyboard, get_main_men
 from states.booking_states import BookingState
 
 from services.booking_service import BookingService
-from services.storage import UserStorage
+from services.storage_base import BaseUserStorage
 
 from utils.date_helpers import get_date_for_day
+from utils.formatters import format_data_as_of
 
 router = Router()
 
@@ -60,9 +61,12 @@ async def choose_day_handler(
     await state.set_state(BookingState.choosing_time)
     
     free_times = await booking_service.get_free_slots_for_day(selected_day, target_date)
+    data_as_of = booking_service.data_as_of
+    as_of_note = f"{format_data_as_of(data_as_of)}\n\n" if data_as_of is not None else ""
     
     await callback.message.edit_text(
-        text=f"📅 Выбран день: <b>{selected_day}</b>\n"
+        text=f"{as_of_note}"
+             f"📅 Выбран день: <b>{selected_day}</b>\n"
              f"📆 Дата: <b>{target_date}</b>\n\n"
              f"Выберите свободное время:",
         parse_mode="HTML",
@@ -76,7 +80,7 @@ async def choose_time_handler(
     callback: CallbackQuery, 
     state: FSMContext,
     booking_service: BookingService,
-    storage: UserStorage,
+    storage: BaseUserStorage,
 ):
     """Обработчик выбора времени"""
     try:
@@ -129,12 +133,14 @@ async def choose_time_handler(
         )
 
         if success:
+            # Непустое сообщение при успехе — запись принята в очередь, таблица недоступна
+            note = error_msg or "<i>Нажмите 'Обновить', чтобы увидеть себя в таблице.</i>"
             await callback.message.edit_text(
                 text=f"✅ <b>Успешная запись!</b>\n\n"
                      f"👤 <b>{name}</b>\n"
                      f"📅 {selected_day} ({target_date})\n"
                      f"⏰ {time_slot}\n\n"
-                     f"<i>Нажмите 'Обновить', чтобы увидеть себя в таблице.</i>",
+                     f"{note}",
                 parse_mode="HTML",
                 reply_markup=get_main_menu_keyboard()
             )
@@ -8,9 +8,11 @@ from config.settings import GoogleSettings
 
 from keyboards.inline import get_main_menu_keyboard
 
-from services.booking_service import BookingService
+from services.booking_service import SHEETS_TIMEOUT_MESSAGE, SHEETS_UNAVAILABLE_MESSAGE, BookingService, Freshness
+from services.circuit_breaker import CircuitOpenError
+from services.deadlines import SheetsTimeoutError
 
-from utils.formatters import format_washing_schedule_simple, split_message
+from utils.formatters import format_data_as_of, format_washing_schedule_simple, split_message
 
 router = Router()
 
@@ -34,13 +36,25 @@ async def show_table(
 ):
     """Показывает таблицу (используется и для команды, и для обновления)"""
     try:
-        result = await booking_service.get_table_data(force_refresh=is_update)
+        try:
+            result = await booking_service.get_table_data(
+                Freshness.FRESH if is_update else Freshness.STALE_OK
+            )
+        except CircuitOpenError:
+            if not is_update:
+                raise
+            # Свежие данные недоступны: показываем последний снимок с пометкой о времени
+            result = await booking_service.get_table_data(Freshness.STALE_OK)
         
         if not result or not result[0]:
             text = "📭 Таблица пуста"
         else:
             table_link = hlink("таблице", google_settings.full_url)
             text = format_washing_schedule_simple(result, table_link)
+
+        # Google недоступен: показываем последний снимок с пометкой о его времени
+        if booking_service.data_as_of is not None:
+            text = f"{format_data_as_of(booking_service.data_as_of)}\n\n{text}"
         
         markup = get_main_menu_keyboard()
 
@@ -76,7 +90,12 @@ async def show_table(
         await state.clear()
     
     except Exception as e:
-        error_text = f"❌ Ошибка при чтении: {str(e)[:100]}"
+        if isinstance(e, SheetsTimeoutError):
+            error_text = SHEETS_TIMEOUT_MESSAGE
+        elif isinstance(e, CircuitOpenError):
+            error_text = SHEETS_UNAVAILABLE_MESSAGE
+        else:
+            error_text = f"❌ Ошибка при чтении: {str(e)[:100]}"
         if is_update and callback:
             await callback.message.edit_text(text=error_text, reply_markup=get_main_menu_keyboard())
         else:
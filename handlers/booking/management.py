@@ -4,7 +4,7 @@ from aiogram.types import Message, CallbackQuery
 
 from keyboards.inline import get_user_bookings_keyboard, get_delete_confirm_keyboard, get_main_menu_keyboard
 
-from services.storage import UserStorage
+from services.storage_base import BaseUserStorage
 from services.booking_service import BookingService
 
 from utils.helpers import get_human_readable_slot
@@ -15,7 +15,7 @@ router = Router()
 async def show_bookings_menu(
     user_id: int, 
     message_obj: Message,
-    storage: UserStorage,
+    storage: BaseUserStorage,
     booking_service: BookingService, 
     page: int = 0,
 ):
@@ -26,8 +26,8 @@ async def show_bookings_menu(
     3. Рисует меню
     """
     try:
-        # 1. Получаем таблицу с принудительным обновлением 
-        table_data = await booking_service.get_table_data(force_refresh=True)
+        # 1. Получаем таблицу из кэша: глобальную карту актуализирует фоновая сверка
+        table_data = await booking_service.get_table_data()
         
         # 2. Синхронизация (очистка мусора)
         user_points = await storage.sync_user_bookings(user_id, table_data)
@@ -59,7 +59,7 @@ async def show_bookings_menu(
 @router.message(Command("bookings"))
 async def cmd_bookings(
     message: Message, 
-    storage: UserStorage,
+    storage: BaseUserStorage,
     booking_service: BookingService,
 ):
     """Точка входа через команду"""
@@ -69,7 +69,7 @@ async def cmd_bookings(
 @router.callback_query(F.data == "my_bookings")
 async def bookings_callback(
     callback: CallbackQuery,
-    storage: UserStorage,
+    storage: BaseUserStorage,
     booking_service: BookingService,
 ):
     """Точка входа через кнопку"""
@@ -79,7 +79,7 @@ async def bookings_callback(
 @router.callback_query(F.data == "back_to_bookings")
 async def back_to_bookings_handler(
     callback: CallbackQuery,
-    storage: UserStorage,
+    storage: BaseUserStorage,
     booking_service: BookingService,    
 ):
     """Вернуться к списку (при отмене удаления)"""
@@ -88,7 +88,7 @@ async def back_to_bookings_handler(
 @router.callback_query(F.data.startswith("bookings_page_"))
 async def bookings_pagination(
     callback: CallbackQuery,
-    storage: UserStorage,
+    storage: BaseUserStorage,
     booking_service: BookingService,       
 ):
     '''
@@ -102,7 +102,7 @@ async def bookings_pagination(
 @router.callback_query(F.data.startswith("manage_booking_"))
 async def manage_booking_handler(
     callback: CallbackQuery,
-    storage: UserStorage,
+    storage: BaseUserStorage,
     booking_service: BookingService,   
 ):
     '''
@@ -130,7 +130,7 @@ async def manage_booking_handler(
 @router.callback_query(F.data.startswith("confirm_delete_"))
 async def confirm_delete_handler(
     callback: CallbackQuery,
-    storage: UserStorage,
+    storage: BaseUserStorage,
     booking_service: BookingService,       
 ):    
     '''
@@ -143,7 +143,11 @@ async def confirm_delete_handler(
     success, msg = await booking_service.delete_booking(cell_address, callback.from_user.id)
     
     if success:
-        await callback.answer("✅ Запись удалена")
+        if msg:
+            # Удаление принято в очередь: таблица сейчас недоступна
+            await callback.answer(msg, show_alert=True)
+        else:
+            await callback.answer("✅ Запись удалена")
         await show_bookings_menu(callback.from_user.id, callback.message, storage, booking_service)
     else:
         await callback.message.edit_text(
@@ -5,7 +5,7 @@ from aiogram.utils.markdown import hlink
 
 from config.settings import GoogleSettings
 
-from services.storage import UserStorage
+from services.storage_base import BaseUserStorage
 
 router = Router()
 
@@ -13,7 +13,7 @@ router = Router()
 @router.message(CommandStart())
 async def cmd_start(
     message: Message, 
-    storage: UserStorage,
+    storage: BaseUserStorage,
     google_settings: GoogleSettings    
 ):
     user_id = message.from_user.id
@@ -4,6 +4,10 @@ from aiogram import Router
 from aiogram.types import Message, ErrorEvent
 from aiogram import F
 
+from services.booking_service import SHEETS_TIMEOUT_MESSAGE, SHEETS_UNAVAILABLE_MESSAGE
+from services.circuit_breaker import CircuitOpenError
+from services.deadlines import SheetsTimeoutError
+
 logger = logging.getLogger(__name__)
 
 router = Router()
@@ -25,7 +29,11 @@ async def error_handler(event: ErrorEvent):
     """Глобальный обработчик ошибок"""
     logger.exception("Произошла ошибка в хендлере", extra={"error": event.exception})
 
-    if event.update.message:
+    if event.update.message and isinstance(event.exception, SheetsTimeoutError):
+        await event.update.message.answer(SHEETS_TIMEOUT_MESSAGE)
+    elif event.update.message and isinstance(event.exception, CircuitOpenError):
+        await event.update.message.answer(SHEETS_UNAVAILABLE_MESSAGE)
+    elif event.update.message:
         error_name = type(event.exception).__name__
         await event.update.message.answer(
             f"❌ Произошла непредвиденная ошибка: {error_name}\n"
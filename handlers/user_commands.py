@@ -2,10 +2,7 @@ from aiogram import Router
 from aiogram.filters import Command, CommandObject
 from aiogram.types import Message
 
-from config.settings import google_settings
-
-from services.storage import UserStorage
-from services.google_sheets import GoogleSheetsService
+from services.storage_base import BaseUserStorage, name_key
 from services.booking_service import BookingService
 
 from utils.validators import validate_name_only
@@ -16,9 +13,8 @@ router = Router()
 async def cmd_name(
     message: Message, 
     command: CommandObject,
-    storage: UserStorage,
+    storage: BaseUserStorage,
     booking_service: BookingService,
-    gs_service: GoogleSheetsService,
 ):
     """Установка или смена имени. Обновляет все записи в таблице при смене."""
     user_id = message.from_user.id
@@ -46,7 +42,7 @@ async def cmd_name(
     current_name = current_user_data.get("name")
     
     if storage.is_name_taken(cleaned_name):
-        if current_name and current_name.lower() == cleaned_name.lower():
+        if current_name and name_key(current_name) == name_key(cleaned_name):
              await message.answer("Это имя уже установлено у вас.")
              return
         await message.answer(
@@ -61,42 +57,17 @@ async def cmd_name(
     if current_name:
         wait_msg = await message.answer("🔄 Обновляю ваше имя и записи...")
         
-        # Получаем актуальные записи пользователя
-        # Сначала синхронизируем с таблицей, чтобы не обновлять "мертвые" ячейки
         try:
-            table_data = await booking_service.get_table_data(force_refresh=True)
-            user_bookings = await storage.sync_user_bookings(user_id, table_data)
-
-
-            if user_bookings:
-                # Формируем пакет обновлений для Google Sheets
-                updates = []
-                for cell, date_str in user_bookings.items():
-                    # Создаем новую строку "НовоеИмя Дата"
-                    new_value = f"{cleaned_name} {date_str}"
-                    updates.append({
-                        'range': cell,
-                        'values': [[new_value]]
-                    })
-                
-                # Отправляем одним запросом (batchUpdate)
-                success = await gs_service.batch_update_values(google_settings.sheet_name, updates)
-                if success:
-                    await storage.set_user_name(user_id, cleaned_name)
-                    await booking_service.invalidate_cache()
-                    await wait_msg.edit_text(
-                        f"✅ Имя обновлено на '{cleaned_name}'. "
-                        f"{len(updates)} записей в таблице изменены."
-                    )
-
-                else:
-                    await wait_msg.edit_text(
-                        "⚠️ Ошибка связи с Google Sheets. Имя НЕ изменено. "
-                        "Попробуйте еще раз через минуту."
-                    )
+            success, updated_count, error_msg = await booking_service.rename_bookings(user_id, cleaned_name)
 
+            if not success:
+                await wait_msg.edit_text(f"⚠️ {error_msg} Имя НЕ изменено. Попробуйте еще раз через минуту.")
+            elif updated_count:
+                await wait_msg.edit_text(
+                    f"✅ Имя обновлено на '{cleaned_name}'. "
+                    f"{updated_count} записей в таблице изменены."
+                )
             else:
-                await storage.set_user_name(user_id, cleaned_name)
                 await wait_msg.edit_text(f"✅ Имя изменено на <b>{cleaned_name}</b>.")
 
         except Exception as e:
@@ -11,25 +11,96 @@ from config.logging_config import setup_logging
 from handlers import setup_routers
 
 from services.google_sheets import GoogleSheetsService
+from services.aio_google_sheets import AioGoogleSheetsService
+from services.rate_limiter import TokenBucket
 from services.storage import UserStorage
+from services.storage_base import BaseUserStorage
+from services.sqlite_storage import SQLiteUserStorage
 from services.booking_service import BookingService
+from services.circuit_breaker import CircuitBreaker
+from services.outbox import WriteOutbox
+from services.outbox_drainer import OutboxDrainer
+from services.reconciler import SheetReconciler
 
 
 logger = logging.getLogger(__name__)
 
-async def on_shutdown(storage: UserStorage):
+def create_storage() -> BaseUserStorage:
+    """Создает хранилище пользователей согласно настройке storage_backend."""
+    if settings.storage_backend == "sqlite":
+        return SQLiteUserStorage(filename=settings.storage_sqlite_path)
+
+    return UserStorage(
+        filename=settings.storage_json_path,
+        journal=settings.storage_journal,
+        compact_threshold=settings.storage_compact_threshold,
+        flush_interval=settings.storage_flush_interval,
+        snapshot_format=settings.storage_snapshot_format,
+    )
+
+def create_sheets_service(circuit_breaker: CircuitBreaker) -> GoogleSheetsService:
+    """Создает клиент Google Sheets согласно настройке sheets_client."""
+    limits = dict(
+        read_limiter=TokenBucket.per_minute(settings.sheets_read_quota, settings.sheets_burst),
+        write_limiter=TokenBucket.per_minute(settings.sheets_write_quota, settings.sheets_burst),
+        max_retries=settings.sheets_max_retries,
+        reuse_window=settings.sheets_read_reuse_window,
+        read_timeout=settings.sheets_read_timeout,
+        write_timeout=settings.sheets_write_timeout,
+        hedge_percentile=settings.sheets_hedge_percentile,
+        hedge_budget=settings.sheets_hedge_budget,
+        circuit_breaker=circuit_breaker,
+    )
+
+    if settings.sheets_client == "aiohttp":
+        return AioGoogleSheetsService(
+            spreadsheet_id=google_settings.spreadsheet_id,
+            credentials_path=google_settings.service_account_file,
+            pool_size=settings.sheets_pool_size,
+            **limits
+        )
+
+    return GoogleSheetsService(
+        spreadsheet_id=google_settings.spreadsheet_id,
+        credentials_path=google_settings.service_account_file,
+        max_workers=settings.sheets_max_workers,
+        **limits
+    )
+
+async def on_shutdown(
+    storage: BaseUserStorage,
+    booking_service: BookingService,
+    gs_service: GoogleSheetsService,
+    background_tasks: list[asyncio.Task],
+):
     """
     Действия при завершении работы бота.
     
     Args:
-        dispatcher: Экземпляр диспетчера.
         storage: Хранилище пользователей для вывода финальной статистики.
+        booking_service: Сервис бронирования с накопленными записями в таблицу.
+        gs_service: Клиент Google Sheets, соединения которого нужно закрыть.
+        background_tasks: Фоновые задачи, которые нужно остановить.
     """
     logger.info("Завершение работы бота...")
-    
+
+    # Отправка записей, ожидающих пакетной отправки в таблицу
+    await booking_service.close()
+
+    # Остановка фоновых задач до закрытия хранилища
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+
+    # Закрытие соединений с Google Sheets API
+    await gs_service.close()
+
     # Вывод статистики перед завершением
     count = storage.get_users_count()
     logger.info(f"Сохранено {count} пользователей в хранилище")
+
+    # Сброс накопленных изменений хранилища на диск и закрытие
+    await storage.close()
         
     logger.info("Бот успешно остановлен")
 
@@ -45,23 +116,56 @@ async def main():
 
     # 3. Инициализация сервисов (Dependency Injection)
     logger.info("Инициализация сервисов...")
-    storage = UserStorage(filename="data/users_data.json")
-    await storage.load()
+    storage = create_storage()
+
+    # Общий выключатель: клиент отклоняет запросы, сервис бронирования отдает снимок
+    circuit_breaker = CircuitBreaker(
+        failure_threshold=settings.sheets_breaker_failures,
+        slow_call_threshold=settings.sheets_breaker_slow_call,
+        reset_timeout=settings.sheets_breaker_reset,
+    )
 
     try:
-        gs_service = GoogleSheetsService(
-            spreadsheet_id=google_settings.spreadsheet_id,
-            credentials_path=google_settings.service_account_file
-        )
+        gs_service = create_sheets_service(circuit_breaker)
     except Exception as e:
         logger.critical(f"Не удалось инициализировать GoogleSheetsService: {e}")
         sys.exit(1) # Если нет подключения к таблице, бот бесполезен
 
+    # Токен Google получается параллельно с загрузкой хранилища
+    prewarm = asyncio.create_task(gs_service.prewarm())
+    await storage.load()
+    try:
+        await prewarm
+    except Exception as e:
+        logger.critical(f"Не удалось инициализировать GoogleSheetsService: {e}")
+        sys.exit(1) # Ключ сервисного аккаунта не читается: бот бесполезен
+
+    # Очередь записей, принятых, пока таблица была недоступна
+    outbox = None
+    if settings.sheets_outbox_path:
+        outbox = WriteOutbox(settings.sheets_outbox_path)
+        await outbox.load()
+
     booking_service = BookingService(
         gs_service=gs_service,
         user_storage=storage,
         sheet_name=google_settings.sheet_name,
-        lock_timeout=settings.lock_timeout
+        lock_timeout=settings.lock_timeout,
+        max_staleness=settings.table_cache_max_staleness,
+        write_window=settings.sheets_write_window,
+        precheck_staleness=settings.booking_precheck_staleness,
+        precheck_cell_age=settings.booking_precheck_cell_age,
+        verify_delay=settings.booking_verify_delay,
+        version_cell=settings.sheet_version_cell,
+        full_read_interval=settings.sheet_full_read_interval,
+        circuit_breaker=circuit_breaker,
+        outbox=outbox
+    )
+
+    reconciler = SheetReconciler(
+        booking_service=booking_service,
+        storage=storage,
+        interval=settings.reconcile_interval
     )
 
     # 4. Прокидываем сервисы в middleware (workflow_data)
@@ -71,6 +175,24 @@ async def main():
     dp["google_settings"] = google_settings
     dp["gs_service"] = gs_service 
 
+    # Фоновые задачи (останавливаются в on_shutdown)
+    background_tasks = [
+        asyncio.create_task(storage.run_expiry_purger(settings.expiry_purge_interval)),
+        asyncio.create_task(reconciler.run()),
+    ]
+    if settings.sheets_stats_interval:
+        background_tasks.append(asyncio.create_task(gs_service.run_stats_logger(settings.sheets_stats_interval)))
+    if outbox is not None:
+        drainer = OutboxDrainer(
+            booking_service=booking_service,
+            outbox=outbox,
+            notify=lambda user_id, text: bot.send_message(user_id, text),
+            interval=settings.sheets_outbox_interval,
+            max_attempts=settings.sheets_outbox_max_attempts
+        )
+        background_tasks.append(asyncio.create_task(drainer.run()))
+    dp["background_tasks"] = background_tasks
+
     # 5. Настройка и регистрация роутеров
     setup_routers(dp, storage)
 
@@ -1,6 +1,8 @@
 from .booking_service import BookingService
 from .google_sheets import GoogleSheetsService
 from .storage import UserStorage
+from .storage_base import BaseUserStorage
+from .sqlite_storage import SQLiteUserStorage
 
 # Это позволит другим модулям делать так:
 # from services import BookingService, UserStorage
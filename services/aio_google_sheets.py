@@ -0,0 +1,307 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+import aiohttp
+from google.auth import crypt, jwt
+
+from config.constants import SCOPES, SHEETS_API_URL
+
+from services.circuit_breaker import CircuitBreaker
+from services.google_sheets import GoogleSheetsService, build_batch_update_body, parse_retry_after
+from services.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+JWT_BEARER_GRANT = "urn:ietf:params:oauth:grant-type:jwt-bearer"
+
+
+class SheetsApiError(Exception):
+    """Ошибка ответа Google Sheets API или сервера авторизации."""
+
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.message = message
+        self.retry_after = retry_after
+
+
+async def read_error_message(response: aiohttp.ClientResponse) -> str:
+    """
+    Извлекает текст ошибки из ответа API.
+
+    При 5xx прокси и балансировщики Google часто отдают HTML вместо JSON,
+    поэтому тело читается как текст и разбирается без исключений.
+    """
+    text = await response.text(errors="replace")
+    try:
+        data = json.loads(text)
+    except ValueError:
+        return text[:200]
+    if not isinstance(data, dict):
+        return text[:200]
+    error = data.get("error")
+    if isinstance(error, dict):
+        return error.get("message", "")
+    return data.get("error_description") or str(error or data)
+
+
+class ServiceAccountTokenProvider:
+    """
+    Асинхронное получение OAuth2-токенов сервисного аккаунта (JWT bearer grant).
+
+    Токен кэшируется и обновляется заранее, до истечения срока; одновременные
+    запросы дожидаются одного обновления.
+    """
+
+    # За сколько секунд до истечения токен считается устаревшим
+    REFRESH_MARGIN = 60
+
+    def __init__(self, credentials_path: str, scopes: Sequence[str]):
+        """
+        Args:
+            credentials_path: Путь к JSON файлу сервисного аккаунта.
+            scopes: Области доступа OAuth2.
+        """
+        with open(credentials_path, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+
+        self._signer = crypt.RSASigner.from_service_account_info(info)
+        self._email = info["client_email"]
+        self._token_uri = info["token_uri"]
+        self._scopes = " ".join(scopes)
+
+        self._token: Optional[str] = None
+        self._expires_at: float = 0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        """Сбрасывает токен (например, после ответа 401)."""
+        self._token = None
+        self._expires_at = 0
+
+    async def get_token(self, session: aiohttp.ClientSession) -> str:
+        """Возвращает действующий токен доступа, при необходимости обновляя его."""
+        if self._token and time.time() < self._expires_at - self.REFRESH_MARGIN:
+            return self._token
+
+        async with self._lock:
+            # Повторная проверка: токен мог обновить другой запрос, пока этот ждал лок
+            if self._token and time.time() < self._expires_at - self.REFRESH_MARGIN:
+                return self._token
+
+            now = int(time.time())
+            assertion = jwt.encode(self._signer, {
+                "iss": self._email,
+                "scope": self._scopes,
+                "aud": self._token_uri,
+                "iat": now,
+                "exp": now + 3600,
+            })
+            form = {"grant_type": JWT_BEARER_GRANT, "assertion": assertion.decode()}
+
+            async with session.post(self._token_uri, data=form) as response:
+                if response.status != 200:
+                    raise SheetsApiError(response.status, await read_error_message(response))
+                data = await response.json(content_type=None)
+
+            self._token = data["access_token"]
+            self._expires_at = time.time() + data.get("expires_in", 3600)
+            logger.info("🔑 Токен доступа Google обновлен")
+            return self._token
+
+
+class AioGoogleSheetsService(GoogleSheetsService):
+    """
+    Асинхронный клиент Google Sheets API на aiohttp.
+
+    Обращается к REST-эндпоинтам Sheets v4 напрямую, без googleapiclient и пула
+    потоков: соединения переиспользуются (keep-alive) в пределах одной сессии,
+    токены обновляются асинхронно. Интерфейс совпадает с GoogleSheetsService.
+    """
+
+    def __init__(
+        self,
+        spreadsheet_id: str,
+        credentials_path: str,
+        pool_size: int = 10,
+        base_url: str = SHEETS_API_URL,
+        read_limiter: Optional[TokenBucket] = None,
+        write_limiter: Optional[TokenBucket] = None,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 30,
+        single_flight: bool = True,
+        reuse_window: float = 0,
+        read_timeout: Optional[float] = None,
+        write_timeout: Optional[float] = None,
+        hedge_percentile: Optional[float] = None,
+        hedge_budget: float = 0.05,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Args:
+            spreadsheet_id: ID Google таблицы.
+            credentials_path: Путь к JSON файлу сервисного аккаунта.
+            pool_size: Максимальное количество одновременных соединений.
+            base_url: Базовый адрес API (переопределяется в тестах).
+            read_limiter, write_limiter, max_retries, backoff_base, backoff_cap,
+            single_flight, reuse_window, read_timeout, write_timeout, hedge_percentile, hedge_budget,
+            circuit_breaker:
+                Ограничение частоты, повторы, объединение и хеджирование чтений,
+                таймауты и выключатель — как в GoogleSheetsService. Запрос, прерванный по таймауту,
+                закрывает свое соединение.
+        """
+        self.spreadsheet_id = spreadsheet_id
+        self._base_url = base_url.rstrip("/")
+        self._pool_size = pool_size
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._init_stats()
+        self._init_limits(
+            read_limiter, write_limiter, max_retries, backoff_base, backoff_cap,
+            read_timeout, write_timeout, circuit_breaker,
+        )
+        self._init_reads(single_flight, reuse_window, hedge_percentile, hedge_budget)
+
+        try:
+            logger.info(f"Загрузка файла сервисного аккаунта: {credentials_path}")
+            self._tokens = ServiceAccountTokenProvider(credentials_path, SCOPES)
+            logger.info("✅ Асинхронный клиент Google Sheets API инициализирован.")
+        except FileNotFoundError:
+            logger.critical(f"❌ Файл сервисного аккаунта не найден: {credentials_path}")
+            raise
+        except Exception as e:
+            logger.critical(f"❌ Критическая ошибка инициализации Google Sheets: {e}")
+            raise
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Создает сессию с пулом соединений при первом запросе (внутри цикла событий)."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._pool_size, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
+
+    async def prewarm(self) -> bool:
+        """Заранее получает токен доступа (см. GoogleSheetsService.prewarm)."""
+        started = time.monotonic()
+        try:
+            await self._tokens.get_token(self._get_session())
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось заранее получить токен Google: {e}")
+            return False
+        logger.info(f"🔑 Клиент Google Sheets подготовлен за {time.monotonic() - started:.2f} с")
+        return True
+
+    async def close(self) -> None:
+        """Закрывает сессию и соединения."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    async def _call(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Any] = None,
+        body: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Выполняет запрос к API таблицы с учетом квоты и повторами при 429/5xx.
+
+        При ответе 401 токен обновляется и запрос повторяется один раз.
+
+        Raises:
+            SheetsApiError: Если API вернул ошибку.
+            SheetsTimeoutError: Если запрос не уложился в дедлайн.
+        """
+        kind = "read" if method == "GET" else "write"
+        return await self._call_with_limits(kind, lambda: self._timed_request(method, path, params, body))
+
+    @staticmethod
+    def _error_details(error: Exception) -> Tuple[Optional[int], Optional[float]]:
+        """Возвращает (HTTP-статус, Retry-After в секундах) для ошибки запроса."""
+        if isinstance(error, SheetsApiError):
+            return error.status, error.retry_after
+        return None, None
+
+    async def _timed_request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Any],
+        body: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Одна попытка запроса со сбором статистики."""
+        with self._stats_lock:
+            self._in_flight += 1
+        started = time.monotonic()
+        try:
+            return await self._request(method, path, params, body)
+        finally:
+            self._record_call(0.0, time.monotonic() - started)
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Any],
+        body: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """Отправляет запрос с токеном доступа, повторяя его после 401."""
+        session = self._get_session()
+        url = f"{self._base_url}/{self.spreadsheet_id}{path}"
+
+        for attempt in range(2):
+            token = await self._tokens.get_token(session)
+            headers = {"Authorization": f"Bearer {token}"}
+            async with session.request(method, url, params=params, json=body, headers=headers) as response:
+                if response.status == 401 and attempt == 0:
+                    self._tokens.invalidate()
+                    continue
+
+                # Статус проверяется до разбора тела: ошибка может прийти не в JSON
+                if response.status >= 400:
+                    retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                    raise SheetsApiError(response.status, await read_error_message(response), retry_after)
+                data = await response.json(content_type=None)
+                return data or {}
+
+    @staticmethod
+    def _values_path(range_name: str) -> str:
+        return f"/values/{quote(range_name, safe='')}"
+
+    async def _fetch_values(self, range_name: str) -> List[List[Any]]:
+        """Один вызов API values.get."""
+        result = await self._call("GET", self._values_path(range_name))
+        return result.get('values', [])
+
+    async def _fetch_batch(self, range_names: List[str]) -> List[Dict[str, Any]]:
+        """Один вызов API values.batchGet; возвращает valueRanges."""
+        result = await self._call("GET", "/values:batchGet", params=[('ranges', name) for name in range_names])
+        return result.get('valueRanges', [])
+
+    async def write_value(self, sheet_name: str, cell: str, value: Any) -> bool:
+        """Запись значения в одну ячейку."""
+        range_name = f"{sheet_name}!{cell}"
+        try:
+            await self._call(
+                "PUT",
+                self._values_path(range_name),
+                params={'valueInputOption': 'RAW'},
+                body={'values': [[value]]},
+            )
+            return True
+        except (SheetsApiError, aiohttp.ClientError) as e:
+            logger.error(f"Ошибка записи значения в '{range_name}': {e}")
+            return False
+
+    async def batch_update_values(self, sheet_name: str, updates: List[Dict[str, Any]]) -> bool:
+        """Массовое обновление значений в разных ячейках за один запрос."""
+        try:
+            await self._call("POST", "/values:batchUpdate", body=build_batch_update_body(sheet_name, updates))
+            return True
+        except (SheetsApiError, aiohttp.ClientError) as e:
+            logger.error(f"Ошибка массового обновления в '{sheet_name}': {e}")
+            return False
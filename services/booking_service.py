@@ -1,19 +1,62 @@
 import asyncio
 import time
 import logging
-from collections import defaultdict
-from typing import List, Tuple
+from enum import Enum
+from typing import Callable, Dict, List, Optional, Tuple
 
 from config.constants import DAY_TO_COLUMN, TIME_TO_ROW, TIME_SLOTS, GS_DATA_RANGE
 
+from services.cell_locks import CellLockManager, CellLockTimeout
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+from services.deadlines import SheetsTimeoutError, sheets_deadline, with_sheets_deadline
+from services.outbox import OutboxOperation, WriteOutbox
 from services.google_sheets import GoogleSheetsService
-from services.storage import UserStorage
+from services.rate_limiter import Priority, sheets_priority, with_sheets_priority
+from services.storage_base import BaseUserStorage
+from services.write_coalescer import SheetWriteCoalescer
 
-from utils.helpers import get_cell_address
+from utils.helpers import cell_to_indices, get_cell_address, get_grid_value, indices_to_cell
 from utils.date_helpers import is_cell_available_for_date, create_booking_record
 
 logger = logging.getLogger(__name__)
 
+
+SHEETS_TIMEOUT_MESSAGE = "⌛ Google таблица не ответила вовремя. Проверьте таблицу и попробуйте еще раз."
+SHEETS_UNAVAILABLE_MESSAGE = "🔌 Google таблица временно недоступна, изменения пока невозможны. Попробуйте через минуту."
+OUTBOX_QUEUED_MESSAGE = "📮 Google таблица сейчас недоступна: изменение сохранено и будет внесено в таблицу автоматически. Мы сообщим об итоге."
+
+
+def parse_version(values: List[List[str]]) -> int:
+    """Разбирает значение ячейки-счетчика версии (пустая ячейка — версия 0)."""
+    value = values[0][0] if values and values[0] else ""
+    return int(value) if str(value).strip() else 0
+
+
+def patch_grid(table_data: List[List[str]], updates: Dict[str, str]) -> List[List[str]]:
+    """
+    Возвращает копию сетки с новыми значениями ячеек (при необходимости расширяя ее).
+    Копируются только изменяемые строки; исходная сетка не меняется.
+    """
+    table_data = list(table_data)
+    for cell_address, value in updates.items():
+        row_idx, col_idx = cell_to_indices(cell_address)
+        while len(table_data) <= row_idx:
+            table_data.append([])
+
+        row = list(table_data[row_idx])
+        if len(row) <= col_idx:
+            row.extend([""] * (col_idx + 1 - len(row)))
+        row[col_idx] = value
+        table_data[row_idx] = row
+    return table_data
+
+
+class Freshness(Enum):
+    """Требование к свежести данных таблицы."""
+    FRESH = "fresh"         # Обязательно свежие данные из API
+    STALE_OK = "stale_ok"   # Допускается кэш (в пределах max_staleness)
+
+
 class BookingService:
     """
     Сервис бизнес-логики бронирования.
@@ -27,10 +70,19 @@ class BookingService:
     def __init__(
         self,
         gs_service: GoogleSheetsService,
-        user_storage: UserStorage,
+        user_storage: BaseUserStorage,
         sheet_name: str,
         cache_ttl: int = 60,
         lock_timeout: int = 10,
+        max_staleness: float = 300,
+        write_window: float = 0,
+        precheck_staleness: float = 2,
+        precheck_cell_age: float = 0.5,
+        verify_delay: Optional[float] = None,
+        version_cell: Optional[str] = None,
+        full_read_interval: float = 600,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        outbox: Optional[WriteOutbox] = None,
     ): 
         """
         Args:
@@ -39,74 +91,416 @@ class BookingService:
             sheet_name: Имя листа в таблице.
             cache_ttl: Время жизни кэша таблицы в секундах.
             lock_timeout: Максимальное время ожидания блокировки ячейки.
+            max_staleness: Максимальный возраст кэша в секундах, который еще можно
+                отдать в режиме STALE_OK, пока идет фоновое обновление.
+            write_window: Окно объединения записей в один batchUpdate в секундах;
+                0 — каждая запись отправляется сразу.
+            precheck_staleness: Максимальный возраст снимка таблицы в секундах,
+                по которому проверяется ячейка перед бронированием.
+            precheck_cell_age: Возраст снимка в секундах (примерно одна запись туда
+                и обратно), после которого свободная по снимку ячейка перечитывается
+                из таблицы непосредственно перед записью.
+            verify_delay: Задержка проверки записанных ячеек в секундах;
+                None — проверка после записи отключена.
+            version_cell: Ячейка-счетчик версии таблицы вне сетки (например, "P1");
+                None — протокол версий отключен, кэш обновляется полной загрузкой.
+            full_read_interval: Как часто (в секундах) загружать сетку целиком, даже если
+                счетчик версии не менялся, чтобы заметить ручные правки.
+            circuit_breaker: Выключатель клиента Sheets; пока он разомкнут, таблица
+                и свободные слоты отдаются по последнему снимку (None — не используется).
+            outbox: Персистентная очередь записей: если таблица недоступна, бронирование
+                и удаление принимаются локально и отправляются позже (None — отключена).
         """
         self.gs = gs_service
         self.storage = user_storage
         self.sheet_name = sheet_name
+        self._writer = SheetWriteCoalescer(
+            gs_service,
+            sheet_name,
+            window=write_window,
+            version_stamp=self._stamp_version if version_cell else None,
+        )
 
         self._cache_data: List[List[str]] | None = None
         self._cache_timestamp: float = 0
         self._cache_ttl = cache_ttl
         self._cache_lock = asyncio.Lock()
+        self._max_staleness = max(max_staleness, cache_ttl)
+        self._revalidate_task: Optional[asyncio.Task] = None
+        self._cache_version = 0
+        self._full_read_at: float = 0
+        self._column_timestamps: Dict[int, float] = {}
+
+        # Протокол версий: бот увеличивает счетчик при каждой записи, а проверка
+        # свежести кэша читает только эту ячейку
+        self._version_cell = version_cell
+        self._full_read_interval = full_read_interval
+        self._sheet_version: Optional[int] = None
+
+        self._cell_locks = CellLockManager(timeout=lock_timeout)
+        self._breaker = circuit_breaker
+        self._outbox = outbox
 
-        self._cell_locks = defaultdict(asyncio.Lock)
-        self._lock_timeout = lock_timeout
+        self._precheck_staleness = precheck_staleness
+        self._precheck_cell_age = precheck_cell_age
+        self._verify_delay = verify_delay
+        self._pending_verifications: Dict[str, str] = {}
+        self._verify_task: Optional[asyncio.Task] = None
+
+        # Подписчики на свежие снимки таблицы и время последней записи бота по ячейкам
+        self._snapshot_listeners: List[Callable[[List[List[str]], float], None]] = []
+        self._last_write_at: Dict[str, float] = {}
+
+    def add_snapshot_listener(self, listener: Callable[[List[List[str]], float], None]) -> None:
+        """
+        Подписывает обработчик на каждый успешно загруженный снимок таблицы.
 
-    async def get_table_data(self, force_refresh: bool = False) -> List[List[str]]:
+        Args:
+            listener: Синхронная функция (table_data, fetched_at), где fetched_at —
+                время начала запроса (time.time()), на которое снимок гарантированно не старше.
+        """
+        self._snapshot_listeners.append(listener)
+
+    def written_since(self, cell_address: str, timestamp: float) -> bool:
+        """Проверяет, записывал ли бот в ячейку после указанного момента."""
+        return self._last_write_at.get(cell_address, 0) > timestamp
+
+    def _notify_snapshot(self, table_data: List[List[str]], fetched_at: float) -> None:
+        """Передает свежий снимок таблицы подписчикам."""
+        for listener in self._snapshot_listeners:
+            try:
+                listener(table_data, fetched_at)
+            except Exception as e:
+                logger.error(f"❌ Ошибка обработчика снимка таблицы: {e}")
+
+    async def close(self) -> None:
+        """Отправляет накопленные записи в таблицу при завершении работы."""
+        if self._verify_task is not None:
+            self._verify_task.cancel()
+        await self._writer.flush()
+
+    def get_lock_stats(self) -> Dict[str, dict]:
+        """Статистика ожидания блокировок по ячейкам (захваты, конкуренция, время ожидания)."""
+        return self._cell_locks.get_stats()
+
+    @property
+    def cache_age(self) -> Optional[float]:
+        """Возраст кэша таблицы в секундах (None, если кэш пуст)."""
+        if self._cache_data is None:
+            return None
+        return time.time() - self._cache_timestamp
+
+    @property
+    def data_as_of(self) -> Optional[float]:
+        """
+        Время (time.time()) последнего подтверждения снимка, если бот работает
+        по нему из-за недоступности API; None, если данные актуальны.
+        """
+        if self._breaker is None or self._cache_data is None or self._breaker.is_closed:
+            return None
+        return self._cache_timestamp
+
+    def _serve_snapshot(self) -> bool:
+        """
+        Решает, отдать ли последний снимок без обращения к API (выключатель не замкнут).
+
+        В полуоткрытом состоянии заодно запускается фоновое обновление: оно
+        и становится пробным запросом, замыкающим выключатель.
+        """
+        if self._breaker is None or self._cache_data is None:
+            return False
+        state = self._breaker.state
+        if state is CircuitState.HALF_OPEN:
+            self._schedule_revalidation()
+        return state is not CircuitState.CLOSED
+
+    @property
+    def cache_version(self) -> int:
+        """Номер версии кэша: увеличивается при каждой загрузке или правке кэша."""
+        return self._cache_version
+
+    async def get_table_data(self, freshness: Freshness = Freshness.STALE_OK) -> List[List[str]]:
         """Получает данные таблицы, используя потокобезопасный кэш.
-        
+
+        В режиме STALE_OK кэш старше TTL, но моложе max_staleness, отдается сразу,
+        а обновление запускается в фоне одной задачей. Кэш старше max_staleness
+        обновляется синхронно. Пока выключатель клиента разомкнут, в режиме
+        STALE_OK отдается последний снимок (время снимка — data_as_of), а FRESH
+        завершается ошибкой: устаревший снимок не выдается за свежий.
+
         Args:
-            force_refresh: Если True, принудительно запрашивает данные из API.
+            freshness: FRESH — обязательно свежие данные из API;
+                STALE_OK — допускаются данные из кэша.
 
         Returns:
             List[List[str]]: Двумерный массив строк из таблицы.
+
+        Raises:
+            SheetsTimeoutError: Если в режиме FRESH таблица не ответила до дедлайна.
+            CircuitOpenError: Если в режиме FRESH выключатель клиента не замкнут.
         """
-        current_time = time.time()
-        if not force_refresh and self._cache_data and (current_time - self._cache_timestamp < self._cache_ttl):
+        if freshness is Freshness.FRESH and self._breaker is not None and not self._breaker.is_closed:
+            raise CircuitOpenError("Google Sheets API недоступен: свежие данные получить нельзя")
+
+        if freshness is Freshness.STALE_OK and self._serve_snapshot():
             return self._cache_data
 
+        if freshness is Freshness.STALE_OK:
+            age = self.cache_age
+            if self._cache_data and age < self._cache_ttl:
+                return self._cache_data
+            if self._cache_data and age < self._max_staleness:
+                self._schedule_revalidation()
+                return self._cache_data
+
+        return await self._refresh_cache(freshness, requested_at=time.time())
+
+    async def _refresh_cache(self, freshness: Freshness, requested_at: float) -> List[List[str]]:
+        """
+        Загружает таблицу из API под локом кэша.
+
+        Args:
+            freshness: Требуемая свежесть данных.
+            requested_at: Время запроса; если пока вызов ждал лок, кэш обновился
+                запросом, начатым не раньше этого момента, повторная загрузка не нужна.
+
+        Raises:
+            SheetsTimeoutError: Если свежие данные (FRESH) не загрузились до дедлайна;
+                в режиме STALE_OK вместо этого отдается старый кэш.
+            CircuitOpenError: Если свежие данные (FRESH) нужны, а API недоступен.
+        """
         async with self._cache_lock:
             # Повторная проверка внутри лока на случай, если другой поток уже обновил кэш
             current_time = time.time()
-            if not force_refresh and self._cache_data and (current_time - self._cache_timestamp < self._cache_ttl):
+            validated_at = self._full_read_at if freshness is Freshness.FRESH else self._cache_timestamp
+            if self._cache_data is not None and validated_at >= requested_at:
+                return self._cache_data
+            if freshness is Freshness.STALE_OK and self._cache_data and (current_time - self._cache_timestamp < self._cache_ttl):
+                return self._cache_data
+
+            if freshness is Freshness.STALE_OK and await self._is_version_unchanged(current_time):
+                # Счетчик не сдвинулся: кэш актуален без загрузки всей сетки
+                self._cache_timestamp = current_time
                 return self._cache_data
 
             logger.info("🔄 Обновление кэша таблицы из Google Sheets...")
             try:
-                data = await self.gs.get_data(self.sheet_name, GS_DATA_RANGE)
-                self._cache_data = data if data else []
+                sheet_version = None
+                if self._version_cell:
+                    # Счетчик и сетка читаются одним batchGet, то есть из одного состояния таблицы
+                    ranges = await self.gs.batch_get(self.sheet_name, [self._version_cell, GS_DATA_RANGE])
+                    sheet_version = parse_version(ranges[self._version_cell])
+                    data = ranges[GS_DATA_RANGE]
+                else:
+                    data = await self.gs.get_data(self.sheet_name, GS_DATA_RANGE)
+                data = self._with_outbox(data if data else [])
+
+                if self._cache_data is not None and sheet_version == self._sheet_version and data != self._cache_data:
+                    logger.info("✍️ Обнаружена ручная правка таблицы (счетчик версии не менялся)")
+
+                self._cache_data = data
                 self._cache_timestamp = current_time
+                self._full_read_at = current_time
+                self._sheet_version = sheet_version
+                self._cache_version += 1
                 logger.info(f"✅ Кэш обновлен, строк: {len(self._cache_data)}")
+                self._notify_snapshot(self._cache_data, current_time)
+            except (SheetsTimeoutError, CircuitOpenError) as e:
+                if freshness is Freshness.FRESH:
+                    raise
+                logger.warning(f"⚠️ Обновление кэша не выполнено: {e}. Будут использованы старые данные.")
             except Exception as e:
                 logger.error(f"❌ Ошибка обновления кэша: {e}. Будут использованы старые данные, если они есть.")
             
             return self._cache_data or []
 
+    async def _read_version(self) -> Optional[int]:
+        """Читает счетчик версии таблицы (пустая ячейка — версия 0, ошибка — None)."""
+        try:
+            return parse_version(await self.gs.get_data(self.sheet_name, self._version_cell))
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать счетчик версии {self._version_cell}: {e}")
+            return None
+
+    async def _is_version_unchanged(self, current_time: float) -> bool:
+        """
+        Дешевая проверка свежести кэша: читает только ячейку-счетчик.
+        Раз в full_read_interval возвращает False, чтобы полная загрузка
+        выявила ручные правки, которые счетчик не двигают.
+        """
+        if not self._version_cell or self._cache_data is None or self._sheet_version is None:
+            return False
+        if current_time - self._full_read_at >= self._full_read_interval:
+            return False
+
+        sheet_version = await self._read_version()
+        return sheet_version is not None and sheet_version == self._sheet_version
+
+    def _stamp_version(self) -> Optional[Tuple[str, str]]:
+        """
+        Увеличивает счетчик версии для очередной записи бота.
+
+        Returns:
+            Optional[Tuple[str, str]]: (Ячейка-счетчик, Новое значение), которые нужно
+            записать в том же запросе, или None, если протокол версий отключен
+            или текущая версия еще не известна.
+        """
+        if not self._version_cell or self._sheet_version is None:
+            return None
+        self._sheet_version += 1
+        return self._version_cell, str(self._sheet_version)
+
+    def _schedule_revalidation(self) -> None:
+        """Запускает фоновое обновление кэша, если оно еще не идет."""
+        if self._revalidate_task is None or self._revalidate_task.done():
+            # Фоновое обновление уступает квоту бронированиям и просмотру таблицы
+            # и не зависит от дедлайна обработчика, который его запустил
+            with sheets_priority(Priority.LOW), sheets_deadline(None, detach=True):
+                self._revalidate_task = asyncio.create_task(
+                    self._refresh_cache(Freshness.STALE_OK, requested_at=time.time())
+                )
+
     async def invalidate_cache(self) -> None:
         """Принудительно сбрасывает кэш."""
         async with self._cache_lock:
             self._cache_data = None
             self._cache_timestamp = 0
+            self._column_timestamps.clear()
             logger.info("🗑️ Кэш таблицы сброшен.")
 
+    async def patch_cache(self, updates: Dict[str, str]) -> None:
+        """
+        Вносит в кэш значения, только что записанные ботом в таблицу.
+
+        Полная перезагрузка таблицы после записи не нужна: бот знает, какие ячейки
+        изменились. Время жизни кэша не продлевается. Строки копируются, поэтому
+        ранее выданные вызывающим снимки не меняются.
+
+        Args:
+            updates: Словарь {ячейка: новое значение}; "" — ячейка очищена.
+        """
+        # Отметка записи ставится до ожидания лока: снимок, загружаемый прямо сейчас,
+        # мог начаться раньше записи, и сверка должна пропустить эти ячейки
+        written_at = time.time()
+        for cell_address in updates:
+            self._last_write_at[cell_address] = written_at
+
+        async with self._cache_lock:
+            if self._cache_data is None:
+                return
+
+            self._cache_data = patch_grid(self._cache_data, updates)
+            self._cache_version += 1
+            logger.info(f"✏️ Кэш таблицы обновлен по записи: {', '.join(updates)}")
+
+    async def _get_precheck_snapshot(self) -> List[List[str]]:
+        """
+        Возвращает снимок таблицы не старше precheck_staleness для проверки перед записью.
+
+        Одновременные бронирования разделяют одну загрузку таблицы вместо отдельного
+        GET на каждую ячейку. Собственные записи бота уже внесены в кэш (patch_cache).
+        Ручную правку, сделанную после снимка, проверка после записи не поймает: бот
+        перезапишет ячейку и прочитает обратно свое же значение. Поэтому снимок старше
+        precheck_cell_age не решает сам, а ячейка перечитывается (см. _is_cell_free).
+
+        Raises:
+            RuntimeError: Если свежий снимок загрузить не удалось.
+            SheetsTimeoutError: Если таблица не ответила до дедлайна.
+            CircuitOpenError: Если API недоступен (выключатель разомкнут).
+        """
+        fresh_since = time.time() - self._precheck_staleness
+        if self._cache_data is None or self._full_read_at < fresh_since:
+            await self._refresh_cache(Freshness.FRESH, requested_at=fresh_since)
+        if self._cache_data is None or self._full_read_at < fresh_since:
+            raise RuntimeError("не удалось загрузить таблицу")
+        return self._cache_data
+
+    @staticmethod
+    def _check_cell(table_data: List[List[str]], cell_address: str, target_date: str) -> Tuple[bool, str, str]:
+        """Проверяет ячейку по снимку: (свободна ли, текущее значение, сообщение об ошибке)."""
+        return BookingService._check_value(get_grid_value(table_data, *cell_to_indices(cell_address)), target_date)
+
+    @staticmethod
+    def _check_value(value: str, target_date: str) -> Tuple[bool, str, str]:
+        """Проверяет значение ячейки: (свободна ли, текущее значение, сообщение об ошибке)."""
+        value = value.strip()
+
+        if not value:
+            return True, "", ""  # Ячейка пуста
+
+        is_available, error_msg = is_cell_available_for_date(value, target_date)
+        if not is_available:
+            return False, value, error_msg
+
+        return True, "", ""
+
     async def _is_cell_free(self, cell_address: str, target_date: str) -> Tuple[bool, str, str]:
-        """Проверяет, свободна ли ячейка, используя данные из Google Sheets (не из кэша)."""
-        try:
-            result = await self.gs.get_data(self.sheet_name, cell_address)
-            value = result[0][0].strip() if result and result[0] and result[0][0] else ""
+        """
+        Проверяет, свободна ли ячейка, по недавнему снимку таблицы.
 
-            if not value:
-                return True, "", ""  # Ячейка пуста
+        Занятую по снимку ячейку отклоняет сразу. Если ячейка свободна, а снимок
+        старше precheck_cell_age, перед записью она перечитывается отдельным GET,
+        иначе ручная правка после снимка была бы молча перезаписана.
+        """
+        try:
+            table_data = await self._get_precheck_snapshot()
+            result = self._check_cell(table_data, cell_address, target_date)
+            if not result[0] or time.time() - self._full_read_at <= self._precheck_cell_age:
+                return result
 
-            is_available, error_msg = is_cell_available_for_date(value, target_date)
-            if not is_available:
-                return False, value, error_msg
-            
-            return True, "", ""
+            cell_data = await self.gs.get_data(self.sheet_name, cell_address)
+            return self._check_value(get_grid_value(cell_data, 0, 0), target_date)
+        except (SheetsTimeoutError, CircuitOpenError):
+            raise
         except Exception as e:
             logger.error(f"Ошибка проверки ячейки {cell_address}: {e}")
             return False, "", f"Ошибка проверки ячейки: {e}"
 
+    def _schedule_verification(self, cell_address: str, expected_value: str) -> None:
+        """Ставит записанную ячейку в очередь проверки после записи."""
+        if self._verify_delay is None:
+            return
+
+        self._pending_verifications[cell_address] = expected_value
+        if self._verify_task is None or self._verify_task.done():
+            self._verify_task = asyncio.create_task(self._verify_writes())
+
+    @with_sheets_priority(Priority.LOW)
+    @with_sheets_deadline(None, detach=True)
+    async def _verify_writes(self) -> None:
+        """
+        Проверка после записи: спустя verify_delay одной загрузкой таблицы сверяет
+        все записанные за это время ячейки. Если ячейку успели перезаписать
+        (ручная правка сразу после записи бота), хранилище приводится
+        к фактическому содержимому таблицы.
+
+        Ячейки, записанные, пока идет проход, проверяются следующим проходом той
+        же задачи: она завершается, только когда очередь проверки пуста.
+        """
+        while self._pending_verifications:
+            await asyncio.sleep(self._verify_delay)
+            pending, self._pending_verifications = self._pending_verifications, {}
+
+            try:
+                table_data = await self._refresh_cache(Freshness.FRESH, requested_at=time.time())
+            except (SheetsTimeoutError, CircuitOpenError) as e:
+                # Расхождения, если они есть, найдет фоновая сверка с таблицей
+                logger.warning(f"⌛ Проверка записанных ячеек пропущена: {e}")
+                continue
+            mismatched = {}
+            for cell_address, expected_value in pending.items():
+                actual_value = get_grid_value(table_data, *cell_to_indices(cell_address))
+                if actual_value.strip() != expected_value.strip():
+                    logger.warning(
+                        f"⚠️ Запись в {cell_address} не подтвердилась: "
+                        f"ожидалось '{expected_value}', в таблице '{actual_value}'"
+                    )
+                    mismatched[cell_address] = actual_value
+
+            if mismatched:
+                await self.storage.apply_sheet_changes(mismatched)
+
+    @with_sheets_priority(Priority.HIGH)
     async def book_slot(self, user_id: int, day: str, time_slot: str, target_date: str) -> Tuple[bool, str]:
         """
         Бронирует слот для пользователя.
@@ -114,13 +508,19 @@ class BookingService:
         Логика:
         1. Проверяет наличие имени пользователя в базе.
         2. Захватывает Lock конкретной ячейки.
-        3. Проверяет ячейку в таблице (свежий запрос).
+        3. Проверяет ячейку по снимку таблицы не старше precheck_staleness.
         4. Делает запись в Google Sheets.
-        5. Дублирует запись в локальный UserStorage.
-        6. Сбрасывает общий кэш.
+        5. Обновляет записанную ячейку в общем кэше.
+        6. Дублирует запись в локальное хранилище.
+        7. Ставит ячейку в очередь проверки после записи.
+
+        Если таблица недоступна и очередь записей включена, ячейка проверяется по
+        последнему снимку, а бронирование сохраняется в очередь и резервируется
+        в локальной сетке; в таблицу его отправит OutboxDrainer.
 
         Returns:
-            Tuple[bool, str]: (Успех операции, Сообщение об ошибке или пустая строка).
+            Tuple[bool, str]: (Успех операции, Сообщение об ошибке, пометка об очереди
+            или пустая строка).
         """
         cell_address, _ = get_cell_address(day, time_slot)
         if not cell_address:
@@ -130,54 +530,311 @@ class BookingService:
         if not user or not user.get('name'):
             return False, "Не удалось получить ваше имя. Установите его командой /name."
         
-        lock = self._cell_locks[cell_address]
         try:
-            await asyncio.wait_for(lock.acquire(), timeout=self._lock_timeout)
-        except asyncio.TimeoutError:
-            return False, "⏳ Слот сейчас занят другим пользователем. Попробуйте через мгновение."
+            async with self._cell_locks.hold([cell_address]):
+                booking_record = create_booking_record(user['name'], target_date)
+                try:
+                    is_free, current_value, error_msg = await self._is_cell_free(cell_address, target_date)
+                    if not is_free:
+                        return False, error_msg or f"❌ Ячейка уже занята: <b>{current_value}</b>"
+                    success = await self._writer.write(cell_address, booking_record)
+                except (SheetsTimeoutError, CircuitOpenError):
+                    if self._outbox is None or self._cache_data is None:
+                        raise
+                    # Таблица недоступна: ячейка проверяется по последнему снимку (с очередью)
+                    is_free, current_value, error_msg = self._check_cell(self._cache_data, cell_address, target_date)
+                    if not is_free:
+                        return False, error_msg or f"❌ Ячейка уже занята: <b>{current_value}</b>"
+                    success = False
 
-        try:
-            is_free, current_value, error_msg = await self._is_cell_free(cell_address, target_date)
-            if not is_free:
-                return False, error_msg or f"❌ Ячейка уже занята: <b>{current_value}</b>"
+                if not success and self._outbox is not None:
+                    await self._queue_write(OutboxOperation("book", user_id, cell_address, booking_record, date=target_date))
+                    await self.storage.add_booking(user_id, cell_address, target_date)
+                    return True, OUTBOX_QUEUED_MESSAGE
+                if not success:
+                    return False, "Ошибка записи в Google таблицу."
 
-            booking_record = create_booking_record(user['name'], target_date)
-            success = await self.gs.write_value(self.sheet_name, cell_address, booking_record)
-            if not success:
-                return False, "Ошибка записи в Google таблицу."
+                await self.patch_cache({cell_address: booking_record})
+                await self.storage.add_booking(user_id, cell_address, target_date)
+                self._schedule_verification(cell_address, booking_record)
 
-            await self.storage.add_booking(user_id, cell_address, target_date)
-            await self.invalidate_cache()
-            
-            return True, ""
-        finally:
-            lock.release()
+                return True, ""
+        except CellLockTimeout:
+            return False, "⏳ Слот сейчас занят другим пользователем. Попробуйте через мгновение."
+        except SheetsTimeoutError:
+            return False, SHEETS_TIMEOUT_MESSAGE
+        except CircuitOpenError:
+            return False, SHEETS_UNAVAILABLE_MESSAGE
 
+    @with_sheets_priority(Priority.HIGH)
     async def delete_booking(self, cell_address: str, user_id: int) -> Tuple[bool, str]:
-        """Удаляет бронирование."""
+        """
+        Удаляет бронирование.
+
+        Если таблица недоступна и очередь записей включена, удаление сохраняется
+        в очередь: ячейка будет очищена, только если в ней все еще эта запись.
+        """
         owner_id = self.storage.get_owner_by_cell(cell_address)
         if owner_id and str(owner_id) != str(user_id):
             return False, "❌ Это не ваша запись!"
 
-        lock = self._cell_locks[cell_address]
         try:
-            await asyncio.wait_for(lock.acquire(), timeout=self._lock_timeout)
-        except asyncio.TimeoutError:
-            return False, "⏳ Система занята, попробуйте через пару секунд."
+            async with self._cell_locks.hold([cell_address]):
+                try:
+                    success = await self._writer.clear(cell_address)
+                except (SheetsTimeoutError, CircuitOpenError):
+                    if self._outbox is None:
+                        raise
+                    success = False
 
-        try:
-            success = await self.gs.clear_cell(self.sheet_name, cell_address)
-            if success:
+                if not success and self._outbox is not None:
+                    expected = self._expected_value(user_id, cell_address)
+                    await self._queue_write(OutboxOperation("delete", user_id, cell_address, "", expected=expected))
+                    await self.storage.remove_booking(cell_address)
+                    return True, OUTBOX_QUEUED_MESSAGE
+                if not success:
+                    return False, "Ошибка связи с Google Sheets."
+
+                await self.patch_cache({cell_address: ""})
                 await self.storage.remove_booking(cell_address)
-                await self.invalidate_cache()
+                self._schedule_verification(cell_address, "")
                 return True, ""
-            else:
-                return False, "Ошибка связи с Google Sheets."
-        finally:
-            lock.release()
+        except CellLockTimeout:
+            return False, "⏳ Система занята, попробуйте через пару секунд."
+        except SheetsTimeoutError:
+            return False, SHEETS_TIMEOUT_MESSAGE
+        except CircuitOpenError:
+            return False, SHEETS_UNAVAILABLE_MESSAGE
+
+    def _expected_value(self, user_id: int, cell_address: str) -> str:
+        """Значение удаляемой ячейки: из кэша, а без него — восстановленное по хранилищу."""
+        value = get_grid_value(self._cache_data or [], *cell_to_indices(cell_address))
+        if value:
+            return value
+        user = self.storage.get_user(user_id) or {}
+        date_str = self.storage.get_user_bookings(user_id).get(cell_address)
+        return create_booking_record(user.get('name') or "", date_str) if date_str else ""
+
+    def _with_outbox(self, table_data: List[List[str]]) -> List[List[str]]:
+        """Накладывает на снимок таблицы операции из очереди (локальные резервы ячеек)."""
+        if not self._outbox:
+            return table_data
+        # Для ячейки с несколькими операциями действует последняя
+        return patch_grid(table_data, {operation.cell: operation.value for operation in self._outbox.pending()})
+
+    async def _queue_write(self, operation: OutboxOperation) -> None:
+        """Сохраняет операцию в очередь и резервирует ячейку в локальной сетке."""
+        await self._outbox.add(operation)
+        await self.patch_cache({operation.cell: operation.value})
+        logger.warning(f"📮 Таблица недоступна: операция {operation.kind} для {operation.cell} поставлена в очередь")
+
+    async def drain_outbox(self, limit: int = 50, max_attempts: int = 5) -> List[Tuple[OutboxOperation, Optional[str]]]:
+        """
+        Отправляет операции из очереди в таблицу одним batchUpdate.
+
+        Под блокировками ячеек читается фактическое содержимое таблицы, и каждая
+        операция проверяется на конфликт: бронирование записывается, только если
+        ячейка свободна (или уже содержит эту запись), удаление очищает ячейку,
+        только если в ней все еще удаляемая запись. Конфликтное бронирование
+        откатывается в хранилище и кэше.
+
+        Если таблица отклоняет пакет, операциям засчитывается попытка, и дальше
+        каждая из них отправляется отдельно, чтобы одна «ядовитая» операция не
+        блокировала очередь. После max_attempts отказов операция переносится
+        в файл отклоненных (dead letter) и возвращается с причиной отказа.
+
+        Args:
+            limit: Максимальное количество операций за один проход.
+            max_attempts: Сколько отказов таблицы допускается для одной операции.
+
+        Returns:
+            List[Tuple[OutboxOperation, Optional[str]]]: Операции, получившие
+            окончательный итог, с причиной отказа (None — операция выполнена).
+
+        Raises:
+            Exception: Ошибка клиента Sheets (API недоступен) или отказ пакетной
+                записи до исчерпания попыток; операции остаются в очереди.
+        """
+        pending = self._outbox.pending() if self._outbox else []
+        if not pending:
+            return []
+        # Операция, с которой пакет уже отклонялся, отправляется отдельно
+        operations = pending[:1] if pending[0].attempts else pending[:limit]
+
+        async with self._cell_locks.hold([operation.cell for operation in operations]):
+            table_data = await self.gs.get_data(self.sheet_name, GS_DATA_RANGE)
+            actual = {
+                operation.cell: get_grid_value(table_data, *cell_to_indices(operation.cell)).strip()
+                for operation in operations
+            }
+
+            # Операции проигрываются по порядку поверх фактических значений
+            desired = dict(actual)
+            outcomes: List[Tuple[OutboxOperation, Optional[str]]] = []
+            for operation in operations:
+                current = desired[operation.cell]
+                error = None
+                if operation.kind == "delete":
+                    if current == operation.expected.strip():
+                        desired[operation.cell] = ""
+                elif current and current != operation.value and not is_cell_available_for_date(current, operation.date)[0]:
+                    error = f"слот уже занят: {current}"
+                else:
+                    desired[operation.cell] = operation.value
+                outcomes.append((operation, error))
+
+            updates = {cell: value for cell, value in desired.items() if value != actual[cell]}
+            if updates:
+                batch = [{'range': cell, 'values': [[value]]} for cell, value in updates.items()]
+                stamp = self._stamp_version()
+                if stamp:
+                    batch.append({'range': stamp[0], 'values': [[stamp[1]]]})
+                if not await self.gs.batch_update_values(self.sheet_name, batch):
+                    return await self._reject_outbox_batch(operations, actual, max_attempts)
+
+            await self._outbox.complete([operation.op_id for operation in operations])
+            await self.patch_cache(desired)
+            for cell_address, value in updates.items():
+                self._schedule_verification(cell_address, value)
+
+            for operation, error in outcomes:
+                owner_id = self.storage.get_owner_by_cell(operation.cell)
+                if error and owner_id and str(owner_id) == str(operation.user_id):
+                    await self.storage.remove_booking(operation.cell)
+
+        logger.info(f"📮 Очередь записей: выполнено {len(outcomes)} операций, записано ячеек: {len(updates)}")
+        return outcomes
+
+    async def _reject_outbox_batch(
+        self,
+        operations: List[OutboxOperation],
+        actual: Dict[str, str],
+        max_attempts: int,
+    ) -> List[Tuple[OutboxOperation, Optional[str]]]:
+        """
+        Учитывает отказ таблицы принять пакет очереди (вызывается под блокировками ячеек).
+
+        Операции, исчерпавшие попытки, переносятся в dead letter, их бронирования
+        откатываются, а ячейки в кэше возвращаются к фактическим значениям.
+
+        Raises:
+            RuntimeError: Если ни одна операция еще не исчерпала попытки.
+        """
+        await self._outbox.record_failure([operation.op_id for operation in operations])
+        rejected = [operation for operation in operations if operation.attempts >= max_attempts]
+        if not rejected:
+            raise RuntimeError("пакетная запись очереди не удалась")
+
+        reason = f"таблица отклонила запись {max_attempts} раз подряд"
+        await self._outbox.dead_letter(rejected, reason)
+        await self.patch_cache({operation.cell: actual[operation.cell] for operation in rejected})
+        for operation in rejected:
+            owner_id = self.storage.get_owner_by_cell(operation.cell)
+            if operation.kind == "book" and owner_id and str(owner_id) == str(operation.user_id):
+                await self.storage.remove_booking(operation.cell)
+        return [(operation, reason) for operation in rejected]
+
+    @with_sheets_priority(Priority.HIGH)
+    async def rename_bookings(self, user_id: int, new_name: str) -> Tuple[bool, int, str]:
+        """
+        Меняет имя пользователя и переписывает его записи в таблице.
+
+        Логика:
+        1. Синхронизирует записи пользователя со свежей таблицей, чтобы не обновлять "мертвые" ячейки.
+        2. Захватывает блокировки всех ячеек пользователя (в порядке сортировки).
+        3. Переписывает ячейки одним batchUpdate.
+        4. Обновляет кэш и сохраняет новое имя.
+
+        Returns:
+            Tuple[bool, int, str]: (Успех операции, Количество измененных ячеек, Сообщение об ошибке).
+        """
+        try:
+            table_data = await self.get_table_data(Freshness.FRESH)
+        except SheetsTimeoutError:
+            return False, 0, SHEETS_TIMEOUT_MESSAGE
+        except CircuitOpenError:
+            return False, 0, SHEETS_UNAVAILABLE_MESSAGE
+        user_bookings = await self.storage.sync_user_bookings(user_id, table_data)
+
+        if not user_bookings:
+            await self.storage.set_user_name(user_id, new_name)
+            return True, 0, ""
+
+        try:
+            async with self._cell_locks.hold(user_bookings):
+                # Пока ждали блокировки, часть записей могла быть удалена
+                user_bookings = self.storage.get_user_bookings(user_id)
+
+                # Формируем пакет обновлений: "НовоеИмя Дата" в каждой ячейке
+                updates = {
+                    cell: create_booking_record(new_name, date_str)
+                    for cell, date_str in user_bookings.items()
+                }
+                if updates:
+                    batch = [{'range': cell, 'values': [[value]]} for cell, value in updates.items()]
+                    stamp = self._stamp_version()
+                    if stamp:
+                        batch.append({'range': stamp[0], 'values': [[stamp[1]]]})
+                    success = await self.gs.batch_update_values(self.sheet_name, batch)
+                    if not success:
+                        return False, 0, "Ошибка связи с Google Sheets."
+                    await self.patch_cache(updates)
+
+                await self.storage.set_user_name(user_id, new_name)
+                return True, len(updates), ""
+        except CellLockTimeout:
+            return False, 0, "⏳ Ваши записи сейчас изменяются, попробуйте через пару секунд."
+        except SheetsTimeoutError:
+            return False, 0, SHEETS_TIMEOUT_MESSAGE
+        except CircuitOpenError:
+            return False, 0, SHEETS_UNAVAILABLE_MESSAGE
+
+    def _is_column_fresh(self, col_idx: int, current_time: float) -> bool:
+        """Колонка свежая, если недавно загружалась вся сетка или сама колонка."""
+        validated_at = max(self._cache_timestamp, self._column_timestamps.get(col_idx, 0))
+        return self._cache_data is not None and current_time - validated_at < self._cache_ttl
+
+    async def _get_day_column_data(self, col_idx: int) -> List[List[str]]:
+        """
+        Возвращает кэш таблицы, в котором колонка дня не старше TTL.
+
+        Устаревшая колонка загружается отдельно (строки слотов, например B2:B9) и
+        вписывается в кэш; общее время жизни кэша при этом не продлевается.
+        Если кэша еще нет, создается пустая сетка с одной заполненной колонкой:
+        она считается устаревшей целиком, и полное чтение загрузит всю таблицу.
+        Пока API недоступен, колонка берется из последнего снимка.
+        """
+        if self._serve_snapshot() or self._is_column_fresh(col_idx, time.time()):
+            return self._cache_data
+
+        async with self._cache_lock:
+            current_time = time.time()
+            if self._is_column_fresh(col_idx, current_time):
+                return self._cache_data
+
+            first_row, last_row = min(TIME_TO_ROW.values()), max(TIME_TO_ROW.values())
+            column = indices_to_cell(0, col_idx)[:-1]
+            try:
+                values = await self.gs.get_data(self.sheet_name, f"{column}{first_row}:{column}{last_row}")
+            except Exception as e:
+                logger.error(f"❌ Ошибка загрузки колонки {column}: {e}. Будут использованы старые данные, если они есть.")
+                return self._cache_data or []
+
+            column_values = {
+                indices_to_cell(row_idx, col_idx): get_grid_value(values, offset, 0)
+                for offset, row_idx in enumerate(range(first_row - 1, last_row))
+            }
+            self._cache_data = self._with_outbox(patch_grid(self._cache_data or [], column_values))
+            self._column_timestamps[col_idx] = current_time
+            self._cache_version += 1
+            logger.info(f"✅ Колонка {column} обновлена")
+            return self._cache_data
 
     async def get_free_slots_for_day(self, day: str, target_date: str) -> List[str]:
-        """Анализирует таблицу и возвращает список свободных слотов на определенный день, используя кэш."""
+        """
+        Анализирует колонку дня и возвращает список свободных слотов на определенный день.
+        Если кэш колонки устарел, загружается только эта колонка, а не вся сетка.
+        """
         column_idx_map = {
             "Пн": 1,  # Колонка B (индекс 1)
             "Вт": 3,  # Колонка D (индекс 3)
@@ -191,7 +848,7 @@ class BookingService:
         if col_idx is None:
             return []
 
-        table_data = await self.get_table_data()
+        table_data = await self._get_day_column_data(col_idx)
         if not table_data:
             return [time_slot for time_slot, _ in TIME_SLOTS]
 
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Iterable, List
+
+logger = logging.getLogger(__name__)
+
+
+class CellLockTimeout(Exception):
+    """Не удалось захватить блокировки ячеек за отведенное время."""
+
+
+class CellLockStats:
+    """Статистика ожидания блокировки одной ячейки."""
+
+    __slots__ = ("acquisitions", "contended", "timeouts", "total_wait", "max_wait")
+
+    def __init__(self):
+        self.acquisitions = 0   # Успешные захваты
+        self.contended = 0      # Захваты, которым пришлось ждать
+        self.timeouts = 0       # Захваты, не дождавшиеся блокировки
+        self.total_wait = 0.0   # Суммарное ожидание, секунды
+        self.max_wait = 0.0     # Максимальное ожидание, секунды
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class CellLockManager:
+    """
+    Реестр блокировок ячеек таблицы.
+
+    Блокировка создается при первом обращении к ячейке и удаляется, как только
+    ее перестают держать и ждать (счетчик ссылок), поэтому реестр не растет
+    с каждым адресом. Несколько ячеек захватываются в отсортированном порядке,
+    что исключает взаимные блокировки между многоячеечными операциями.
+    """
+
+    def __init__(self, timeout: float = 10):
+        """
+        Args:
+            timeout: Максимальное время ожидания всех блокировок в секундах.
+        """
+        self._timeout = timeout
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._refs: Dict[str, int] = {}
+        self._stats: Dict[str, CellLockStats] = {}
+
+    def __len__(self) -> int:
+        """Количество блокировок, которые сейчас держат или ждут."""
+        return len(self._locks)
+
+    def get_stats(self) -> Dict[str, dict]:
+        """Возвращает статистику ожидания по ячейкам."""
+        return {cell: stats.as_dict() for cell, stats in self._stats.items()}
+
+    def _retain(self, cell_address: str) -> asyncio.Lock:
+        lock = self._locks.get(cell_address)
+        if lock is None:
+            lock = self._locks[cell_address] = asyncio.Lock()
+        self._refs[cell_address] = self._refs.get(cell_address, 0) + 1
+        return lock
+
+    def _release_ref(self, cell_address: str) -> None:
+        self._refs[cell_address] -= 1
+        if not self._refs[cell_address]:
+            del self._refs[cell_address]
+            del self._locks[cell_address]
+
+    @asynccontextmanager
+    async def hold(self, cells: Iterable[str], timeout: float | None = None) -> AsyncIterator[List[str]]:
+        """
+        Захватывает блокировки ячеек на время блока async with.
+
+        Args:
+            cells: Адреса ячеек (повторы игнорируются).
+            timeout: Общее время ожидания всех блокировок; по умолчанию — из конструктора.
+
+        Yields:
+            List[str]: Захваченные ячейки в порядке захвата.
+
+        Raises:
+            CellLockTimeout: Если блокировки не удалось захватить вовремя.
+        """
+        ordered = sorted(set(cells))
+        deadline = time.monotonic() + (self._timeout if timeout is None else timeout)
+        acquired: List[str] = []
+
+        try:
+            for cell_address in ordered:
+                await self._acquire(cell_address, deadline)
+                acquired.append(cell_address)
+            yield ordered
+        finally:
+            for cell_address in reversed(acquired):
+                self._locks[cell_address].release()
+                self._release_ref(cell_address)
+
+    async def _acquire(self, cell_address: str, deadline: float) -> None:
+        """Захватывает блокировку одной ячейки с учетом общего дедлайна."""
+        lock = self._retain(cell_address)
+        stats = self._stats.setdefault(cell_address, CellLockStats())
+        contended = lock.locked()
+        started = time.monotonic()
+
+        try:
+            # Минимальный таймаут: свободную блокировку можно взять и после дедлайна
+            await asyncio.wait_for(lock.acquire(), timeout=max(deadline - started, 0.01))
+        except asyncio.TimeoutError:
+            stats.timeouts += 1
+            self._release_ref(cell_address)
+            logger.warning(f"⏳ Таймаут ожидания блокировки ячейки {cell_address}")
+            raise CellLockTimeout(cell_address) from None
+        except BaseException:
+            self._release_ref(cell_address)
+            raise
+
+        waited = time.monotonic() - started
+        stats.acquisitions += 1
+        stats.total_wait += waited
+        stats.max_wait = max(stats.max_wait, waited)
+        if contended:
+            stats.contended += 1
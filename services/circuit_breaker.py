@@ -0,0 +1,122 @@
+"""
+Автоматический выключатель (circuit breaker) для запросов к Google Sheets API.
+
+Пока API отвечает, выключатель замкнут. После нескольких сбоев подряд (ошибки
+5xx/429, обрывы соединения, таймауты или слишком медленные ответы) он
+размыкается: запросы сразу завершаются CircuitOpenError, не дожидаясь API, а
+бот работает по последнему снимку таблицы. Спустя reset_timeout выключатель
+становится полуоткрытым и пропускает по одному пробному запросу: успех
+замыкает его, сбой снова размыкает.
+"""
+import logging
+import time
+from enum import Enum
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"          # Запросы идут в API
+    OPEN = "open"              # Запросы отклоняются без обращения к API
+    HALF_OPEN = "half_open"    # Пропускается один пробный запрос
+
+
+class CircuitOpenError(Exception):
+    """Google Sheets API временно недоступен: выключатель разомкнут."""
+
+
+class CircuitBreaker:
+    """Счетчик сбоев подряд с размыканием и пробными запросами."""
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        slow_call_threshold: Optional[float] = None,
+        reset_timeout: float = 30,
+    ):
+        """
+        Args:
+            failure_threshold: Сколько сбоев подряд размыкают выключатель.
+            slow_call_threshold: Ответ дольше этого времени (в секундах) считается
+                сбоем (None — задержка не учитывается).
+            reset_timeout: Через сколько секунд после размыкания пропустить пробный запрос.
+        """
+        self._failure_threshold = failure_threshold
+        self._slow_call_threshold = slow_call_threshold
+        self._reset_timeout = reset_timeout
+
+        self._state = CircuitState.CLOSED
+        self._failures = 0
+        self._opened_at: float = 0
+        self._probe_in_flight = False
+        self._times_opened = 0
+        self._rejected = 0
+
+    @property
+    def state(self) -> CircuitState:
+        """Текущее состояние; разомкнутый выключатель становится полуоткрытым по истечении reset_timeout."""
+        if self._state is CircuitState.OPEN and time.monotonic() - self._opened_at >= self._reset_timeout:
+            self._state = CircuitState.HALF_OPEN
+            logger.info("🔁 Выключатель Sheets API полуоткрыт: пробный запрос")
+        return self._state
+
+    @property
+    def is_closed(self) -> bool:
+        return self.state is CircuitState.CLOSED
+
+    def allow_request(self) -> bool:
+        """
+        Решает, пропустить ли запрос к API.
+
+        Пропущенный запрос обязан сообщить результат через record_success,
+        record_failure или release.
+        """
+        state = self.state
+        if state is CircuitState.CLOSED:
+            return True
+        if state is CircuitState.HALF_OPEN and not self._probe_in_flight:
+            self._probe_in_flight = True
+            return True
+        self._rejected += 1
+        return False
+
+    def release(self) -> None:
+        """Пропущенный запрос отменен до обращения к API: результат не учитывается."""
+        self._probe_in_flight = False
+
+    def record_success(self, latency: float) -> None:
+        """Учитывает ответ API; слишком медленный ответ считается сбоем."""
+        if self._slow_call_threshold is not None and latency > self._slow_call_threshold:
+            logger.warning(f"🐢 Медленный ответ Sheets API: {latency:.1f} с")
+            self.record_failure()
+            return
+
+        self._probe_in_flight = False
+        self._failures = 0
+        if self._state is not CircuitState.CLOSED:
+            self._state = CircuitState.CLOSED
+            logger.info("✅ Выключатель Sheets API замкнут: API снова отвечает")
+
+    def record_failure(self) -> None:
+        """Учитывает сбой запроса; пробный сбой или серия сбоев размыкают выключатель."""
+        self._probe_in_flight = False
+        self._failures += 1
+        if self._state is CircuitState.HALF_OPEN or self._failures >= self._failure_threshold:
+            if self._state is not CircuitState.OPEN:
+                self._times_opened += 1
+                logger.error(
+                    f"🔌 Выключатель Sheets API разомкнут после {self._failures} сбоев подряд, "
+                    f"следующая попытка через {self._reset_timeout:.0f} с"
+                )
+            self._state = CircuitState.OPEN
+            self._opened_at = time.monotonic()
+
+    def get_stats(self) -> Dict[str, object]:
+        """Состояние, сбои подряд, количество размыканий и отклоненных запросов."""
+        return {
+            "state": self.state.value,
+            "consecutive_failures": self._failures,
+            "times_opened": self._times_opened,
+            "rejected": self._rejected,
+        }
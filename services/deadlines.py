@@ -0,0 +1,95 @@
+"""
+Дедлайны запросов к Google Sheets API.
+
+Как и приоритет в rate_limiter, дедлайн задается через contextvar: обработчик
+апдейта задает общий бюджет времени, и каждый запрос к API ниже по стеку
+укладывается в его остаток (и в собственный таймаут операции). Вложенный
+дедлайн не может продлить внешний; фоновые задачи отвязываются от дедлайна
+запустившего их обработчика явно (detach=True).
+"""
+import asyncio
+import functools
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Iterator, Optional
+
+
+class SheetsTimeoutError(TimeoutError):
+    """Запрос к Google Sheets API не уложился в дедлайн и был прерван."""
+
+
+_current_deadline: ContextVar[Optional[float]] = ContextVar("sheets_deadline", default=None)
+
+
+def current_deadline() -> Optional[float]:
+    """Возвращает дедлайн текущего контекста (time.monotonic()) или None."""
+    return _current_deadline.get()
+
+
+def effective_deadline(timeout: Optional[float] = None) -> Optional[float]:
+    """Ближайший из дедлайна контекста и «сейчас + timeout»."""
+    deadline = _current_deadline.get()
+    if timeout is not None:
+        own = time.monotonic() + timeout
+        deadline = own if deadline is None else min(deadline, own)
+    return deadline
+
+
+@contextmanager
+def sheets_deadline(timeout: Optional[float], detach: bool = False) -> Iterator[None]:
+    """
+    Задает дедлайн запросов к API внутри блока with (включая созданные в нем задачи).
+
+    Args:
+        timeout: Бюджет времени в секундах; None — без собственного ограничения.
+        detach: Не учитывать внешний дедлайн (для фоновых задач, переживающих обработчик).
+    """
+    if detach:
+        deadline = None if timeout is None else time.monotonic() + timeout
+    else:
+        deadline = effective_deadline(timeout)
+    token = _current_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _current_deadline.reset(token)
+
+
+def with_sheets_deadline(timeout: Optional[float], detach: bool = False):
+    """Декоратор корутины: все запросы к API внутри нее укладываются в заданный дедлайн."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with sheets_deadline(timeout, detach=detach):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def run_with_deadline(awaitable: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """
+    Ожидает awaitable не дольше дедлайна контекста и timeout.
+
+    По истечении времени ожидание отменяется (корутина получает CancelledError
+    и освобождает свои ресурсы), а вызывающему выбрасывается SheetsTimeoutError.
+
+    Raises:
+        SheetsTimeoutError: Если дедлайн истек.
+    """
+    deadline = effective_deadline(timeout)
+    if deadline is None:
+        return await awaitable
+
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise SheetsTimeoutError("дедлайн запроса к Google Sheets уже истек")
+
+    try:
+        return await asyncio.wait_for(awaitable, timeout=remaining)
+    except SheetsTimeoutError:
+        raise
+    except asyncio.TimeoutError:
+        raise SheetsTimeoutError(f"запрос к Google Sheets не уложился в {remaining:.1f} с") from None
@@ -1,66 +1,644 @@
 import asyncio
 import logging
-from typing import List, Optional, Any, Dict
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Deque, List, Optional, Any, Dict, Set, Tuple, TypeVar
 
-from google.oauth2.service_account import Credentials
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
 from config.constants import SCOPES
 
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.deadlines import SheetsTimeoutError, run_with_deadline, sheets_deadline
+from services.rate_limiter import SharedPriority, TokenBucket, backoff_delay, current_priority, sheets_priority
+
 logger = logging.getLogger(__name__)
 
+# Ответы API, после которых запрос имеет смысл повторить
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+# Хеджирование чтений: сколько последних задержек хранить и с какого количества считать порог
+HEDGE_SAMPLE_SIZE = 200
+HEDGE_MIN_SAMPLES = 20
+
+T = TypeVar("T")
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Разбирает заголовок Retry-After в секундах (формат HTTP-даты не поддерживается)."""
+    try:
+        return max(float(value), 0.0) if value is not None else None
+    except ValueError:
+        return None
+
+
+def build_sheets_service(http: Any) -> Any:
+    """
+    Создает объект сервиса Sheets v4 по discovery-документу, встроенному в библиотеку.
+
+    googleapiclient.discovery (самая тяжелая часть стека) импортируется при первом
+    вызове, а не при импорте модуля; документ никогда не загружается по сети.
+    """
+    from googleapiclient.discovery import build
+
+    return build('sheets', 'v4', http=http, cache_discovery=False, static_discovery=True)
+
+
+def build_batch_update_body(sheet_name: str, updates: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Формирует тело запроса values.batchUpdate из списка {'range': ..., 'values': ...}."""
+    data = [
+        {
+            'range': f"{sheet_name}!{upd['range']}",
+            'values': upd['values']
+        }
+        for upd in updates
+    ]
+    return {'valueInputOption': 'RAW', 'data': data}
+
+
 class GoogleSheetsService:
-    """Сервис для работы с Google Sheets API"""
+    """
+    Сервис для работы с Google Sheets API.
+
+    Блокирующие вызовы googleapiclient выполняются в собственном пуле потоков,
+    отдельном от пула по умолчанию, где работает сохранение хранилища: медленные
+    запросы к API и запись на диск не вытесняют друг друга. Объект сервиса
+    (и httplib2 под ним) не потокобезопасен, поэтому каждый поток пула лениво
+    создает свой экземпляр.
+
+    Каждая операция ограничена таймаутом (и дедлайном контекста, см. deadlines).
+    Отмененный по таймауту запрос, еще ждущий потока, снимается с очереди, а уже
+    выполняющийся освобождает поток по таймауту сокета httplib2.
+
+    Учетные данные и объекты сервиса создаются лениво, при первом запросе или
+    в prewarm, поэтому конструктор не задерживает запуск бота.
+    """
     
-    def __init__(self, spreadsheet_id: str, credentials_path: str):
+    def __init__(
+        self,
+        spreadsheet_id: str,
+        credentials_path: str,
+        max_workers: int = 4,
+        read_limiter: Optional[TokenBucket] = None,
+        write_limiter: Optional[TokenBucket] = None,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 30,
+        single_flight: bool = True,
+        reuse_window: float = 0,
+        read_timeout: Optional[float] = None,
+        write_timeout: Optional[float] = None,
+        hedge_percentile: Optional[float] = None,
+        hedge_budget: float = 0.05,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ):
+        """
+        Args:
+            spreadsheet_id: ID Google таблицы.
+            credentials_path: Путь к JSON файлу сервисного аккаунта.
+            max_workers: Количество потоков для запросов к API.
+            read_limiter: Ведро токенов квоты чтения (None — без ограничения).
+            write_limiter: Ведро токенов квоты записи (None — без ограничения).
+            max_retries: Количество повторов при ответах 429/5xx.
+            backoff_base: Базовая задержка повтора в секундах.
+            backoff_cap: Максимальная задержка повтора в секундах.
+            single_flight: Объединять одновременные чтения одного диапазона в один запрос.
+            reuse_window: Сколько секунд после завершения чтения его результат
+                отдается новым запросам того же диапазона (0 — не отдается).
+            read_timeout: Таймаут операции чтения в секундах, включая ожидание
+                квоты и повторы (None — без ограничения).
+            write_timeout: Таймаут операции записи в секундах (None — без ограничения).
+            hedge_percentile: Перцентиль задержки чтения (например, 95), после которого
+                отправляется дублирующий запрос (None — хеджирование выключено).
+            hedge_budget: Максимальная доля дублирующих запросов от числа чтений.
+            circuit_breaker: Выключатель, который после серии сбоев отклоняет
+                запросы без обращения к API (None — не используется).
+        """
         self.spreadsheet_id = spreadsheet_id
-        try:
-            logger.info(f"Загрузка файла сервисного аккаунта: {credentials_path}")
-            creds = Credentials.from_service_account_file(credentials_path, scopes=SCOPES)
-            self.service = build('sheets', 'v4', credentials=creds)
-            logger.info("✅ Google Sheets API успешно инициализирован.")
-        except FileNotFoundError:
+        # Отсутствие файла обнаруживается сразу; разбор ключа откладывается до первого запроса
+        if not os.path.isfile(credentials_path):
             logger.critical(f"❌ Файл сервисного аккаунта не найден: {credentials_path}")
-            raise
+            raise FileNotFoundError(credentials_path)
+        self._credentials_path = credentials_path
+        self._credentials = None
+        self._credentials_lock = threading.Lock()
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sheets")
+        self._thread_local = threading.local()
+        self._init_stats()
+        self._init_limits(
+            read_limiter, write_limiter, max_retries, backoff_base, backoff_cap,
+            read_timeout, write_timeout, circuit_breaker,
+        )
+        self._init_reads(single_flight, reuse_window, hedge_percentile, hedge_budget)
+
+    def _init_stats(self) -> None:
+        """Счетчики: очередь ожидания потока, выполняемые запросы, задержки."""
+        self._stats_lock = threading.Lock()
+        self._queued = 0
+        self._in_flight = 0
+        self._calls = 0
+        self._total_wait = 0.0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+        self._coalesced = 0
+
+    def _get_credentials(self):
+        """Загружает учетные данные сервисного аккаунта при первом обращении (из любого потока)."""
+        if self._credentials is None:
+            with self._credentials_lock:
+                if self._credentials is None:
+                    from google.oauth2.service_account import Credentials
+
+                    logger.info(f"Загрузка файла сервисного аккаунта: {self._credentials_path}")
+                    try:
+                        self._credentials = Credentials.from_service_account_file(
+                            self._credentials_path, scopes=SCOPES
+                        )
+                    except Exception as e:
+                        logger.critical(f"❌ Критическая ошибка инициализации Google Sheets: {e}")
+                        raise
+                    logger.info("✅ Google Sheets API успешно инициализирован.")
+        return self._credentials
+
+    def _new_http(self):
+        """HTTP-клиент с таймаутом сокета: зависший запрос освобождает поток, даже если его уже не ждут."""
+        import httplib2
+
+        timeouts = [t for t in (self._read_timeout, self._write_timeout) if t is not None]
+        return httplib2.Http(timeout=max(timeouts) if timeouts else None)
+
+    def _get_thread_service(self):
+        """Возвращает объект сервиса текущего потока пула, создавая его при первом вызове."""
+        service = getattr(self._thread_local, "service", None)
+        if service is None:
+            from google_auth_httplib2 import AuthorizedHttp
+
+            service = build_sheets_service(AuthorizedHttp(self._get_credentials(), http=self._new_http()))
+            self._thread_local.service = service
+        return service
+
+    def _prewarm_sync(self) -> None:
+        """Создает сервис потока пула и получает токен доступа (синхронно)."""
+        from google_auth_httplib2 import Request
+
+        self._get_thread_service()
+        credentials = self._credentials
+        if not credentials.valid:
+            credentials.refresh(Request(self._new_http()))
+
+    async def prewarm(self) -> bool:
+        """
+        Заранее импортирует клиент, создает сервис и получает OAuth-токен.
+
+        Вызывается при запуске параллельно с загрузкой хранилища, чтобы первый
+        запрос пользователя не ждал этих шагов. Запросов к квоте Sheets API не делает.
+
+        Returns:
+            bool: True, если токен получен; при сетевой ошибке она логируется,
+            и шаги повторятся при первом запросе.
+
+        Raises:
+            Exception: Если файл сервисного аккаунта не удалось разобрать: без
+                учетных данных бот бесполезен, запуск нужно прервать.
+        """
+        started = time.monotonic()
+        loop = asyncio.get_running_loop()
+        # Ошибка учетных данных не повторяется при следующем запросе, поэтому не глушится
+        await loop.run_in_executor(self._executor, self._get_credentials)
+        try:
+            await loop.run_in_executor(self._executor, self._prewarm_sync)
         except Exception as e:
-            logger.critical(f"❌ Критическая ошибка инициализации Google Sheets: {e}")
+            logger.warning(f"⚠️ Не удалось заранее подготовить клиент Google Sheets: {e}")
+            return False
+        logger.info(f"🔑 Клиент Google Sheets подготовлен за {time.monotonic() - started:.2f} с")
+        return True
+
+    def _init_reads(
+        self,
+        single_flight: bool,
+        reuse_window: float,
+        hedge_percentile: Optional[float] = None,
+        hedge_budget: float = 0.05,
+    ) -> None:
+        """Настройки объединения одновременных чтений одного диапазона и хеджирования."""
+        self._single_flight = single_flight
+        self._reuse_window = reuse_window
+        self._inflight_reads: Dict[str, asyncio.Future] = {}
+        self._inflight_priorities: Dict[str, SharedPriority] = {}
+        self._recent_reads: Dict[str, Tuple[float, List[List[Any]]]] = {}
+
+        self._hedge_percentile = hedge_percentile
+        self._hedge_budget = hedge_budget
+        self._read_latencies: Deque[float] = deque(maxlen=HEDGE_SAMPLE_SIZE)
+        self._hedge_candidates = 0  # Чтения, прошедшие через хеджирование
+        self._hedges = 0            # Отправленные дублирующие запросы
+        self._hedge_wins = 0        # Дубли, ответившие раньше основного запроса
+        self._hedge_measured = 0    # Выигрыши, для которых известно время основного запроса
+        self._hedge_saved = 0.0     # Суммарный выигрыш в задержке, секунды
+        self._hedge_losers: Set[asyncio.Future] = set()
+
+    def _init_limits(
+        self,
+        read_limiter: Optional[TokenBucket],
+        write_limiter: Optional[TokenBucket],
+        max_retries: int,
+        backoff_base: float,
+        backoff_cap: float,
+        read_timeout: Optional[float] = None,
+        write_timeout: Optional[float] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+    ) -> None:
+        """Настройки ограничения частоты запросов, повторов, таймаутов и выключателя."""
+        self._read_limiter = read_limiter
+        self._write_limiter = write_limiter
+        self._max_retries = max_retries
+        self._backoff_base = backoff_base
+        self._backoff_cap = backoff_cap
+        self._read_timeout = read_timeout
+        self._write_timeout = write_timeout
+        self._breaker = circuit_breaker
+
+    async def _call_with_limits(self, kind: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Выполняет запрос с учетом квоты и повторами при 429/5xx.
+
+        Перед каждой попыткой забирается токен из ведра чтения или записи
+        (с приоритетом текущего контекста). Повтор ждет Retry-After из ответа,
+        если он есть, иначе — экспоненциальную задержку с джиттером.
+        Операция целиком (очередь квоты, попытки и паузы) ограничена таймаутом
+        read_timeout/write_timeout и дедлайном контекста.
+
+        Args:
+            kind: "read" или "write" — какую квоту расходует запрос.
+            call: Функция, создающая корутину одной попытки запроса.
+
+        Raises:
+            SheetsTimeoutError: Если операция не уложилась в дедлайн.
+            CircuitOpenError: Если выключатель разомкнут после серии сбоев API.
+        """
+        timeout = self._read_timeout if kind == "read" else self._write_timeout
+        try:
+            return await run_with_deadline(self._call_with_retries(kind, call), timeout)
+        except SheetsTimeoutError as e:
+            logger.warning(f"⌛ Запрос к Sheets API ({kind}) прерван: {e}")
             raise
 
-    async def _execute_request(self, func) -> Any:
-        """Выполняет блокирующий запрос API в отдельном потоке."""
-        loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, func)
+    async def _call_with_retries(self, kind: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Попытки запроса с ожиданием квоты и паузами между повторами."""
+        limiter = self._read_limiter if kind == "read" else self._write_limiter
+        breaker = self._breaker
+        attempt = 0
+        while True:
+            if breaker is not None and not breaker.allow_request():
+                raise CircuitOpenError("Google Sheets API временно недоступен")
+
+            started: Optional[float] = None
+            try:
+                if limiter is not None:
+                    await limiter.acquire(current_priority())
+                started = time.monotonic()
+                result = await call()
+            except asyncio.CancelledError:
+                # Прерванный на лету запрос (обычно по дедлайну) — сбой; отмена в очереди квоты — нет
+                if breaker is not None and started is not None:
+                    breaker.record_failure()
+                elif breaker is not None:
+                    breaker.release()
+                raise
+            except Exception as e:
+                status, retry_after = self._error_details(e)
+                if breaker is not None:
+                    if status is None or status in RETRYABLE_STATUSES:
+                        breaker.record_failure()
+                    else:
+                        # Ошибка клиента (4xx): API доступен
+                        breaker.record_success(time.monotonic() - started)
+                if status not in RETRYABLE_STATUSES or attempt >= self._max_retries:
+                    raise
+                delay = backoff_delay(attempt, self._backoff_base, self._backoff_cap, retry_after)
+                attempt += 1
+                logger.warning(
+                    f"⏳ Sheets API ответил {status}, повтор через {delay:.1f} с "
+                    f"(попытка {attempt}/{self._max_retries})"
+                )
+                await asyncio.sleep(delay)
+            else:
+                if breaker is not None:
+                    breaker.record_success(time.monotonic() - started)
+                return result
+
+    @staticmethod
+    def _error_details(error: Exception) -> Tuple[Optional[int], Optional[float]]:
+        """Возвращает (HTTP-статус, Retry-After в секундах) для ошибки запроса."""
+        if isinstance(error, HttpError):
+            return int(error.resp.status), parse_retry_after(error.resp.get("retry-after"))
+        return None, None
+
+    async def _execute_request(self, func: Callable[[Any], Any], kind: str = "read") -> Any:
+        """
+        Выполняет блокирующий запрос API в пуле потоков Sheets с учетом квоты.
+
+        Args:
+            func: Функция, принимающая объект сервиса потока и выполняющая запрос.
+            kind: "read" или "write" — какую квоту расходует запрос.
+        """
+        return await self._call_with_limits(kind, lambda: self._run_in_executor(func))
+
+    async def _run_in_executor(self, func: Callable[[Any], Any]) -> Any:
+        """Выполняет одну попытку запроса в потоке пула, собирая статистику."""
+        submitted = time.monotonic()
+        with self._stats_lock:
+            self._queued += 1
+
+        def run():
+            started = time.monotonic()
+            with self._stats_lock:
+                self._queued -= 1
+                self._in_flight += 1
+            try:
+                return func(self._get_thread_service())
+            finally:
+                self._record_call(started - submitted, time.monotonic() - started)
+
+        future = self._executor.submit(run)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # Запрос, не дождавшийся потока, снимается с очереди; начатый доработает сам
+            if future.cancel():
+                with self._stats_lock:
+                    self._queued -= 1
+            raise
+
+    def _record_call(self, wait: float, latency: float) -> None:
+        """Учитывает завершенный запрос: время ожидания потока и время выполнения."""
+        with self._stats_lock:
+            self._in_flight -= 1
+            self._calls += 1
+            self._total_wait += wait
+            self._total_latency += latency
+            self._max_latency = max(self._max_latency, latency)
+
+    def get_stats(self) -> Dict[str, float]:
+        """
+        Возвращает статистику запросов к API.
+
+        Returns:
+            Dict[str, float]: queue_depth — запросы, ждущие свободного потока;
+            in_flight — выполняемые запросы; calls — завершенные запросы;
+            avg_wait, avg_latency, max_latency — секунды; coalesced_reads — чтения,
+            получившие результат чужого запроса вместо собственного вызова API;
+            hedge_threshold — текущий порог хеджирования в секундах (0 — не действует);
+            hedge_rate — доля чтений, для которых отправлен дубль; hedge_wins — дубли,
+            ответившие первыми; avg_hedge_saving — средний выигрыш дубля в секундах.
+        """
+        calls = self._calls or 1
+        return {
+            **self._hedge_stats(),
+            "queue_depth": self._queued,
+            "in_flight": self._in_flight,
+            "calls": self._calls,
+            "avg_wait": self._total_wait / calls,
+            "avg_latency": self._total_latency / calls,
+            "max_latency": self._max_latency,
+            "coalesced_reads": self._coalesced,
+        }
+
+    def format_stats(self) -> str:
+        """Статистика запросов к API одной строкой для журнала."""
+        stats = self.get_stats()
+        return (
+            f"очередь {stats['queue_depth']}, в работе {stats['in_flight']}, "
+            f"запросов {stats['calls']}, ожидание потока {stats['avg_wait'] * 1000:.0f} мс, "
+            f"задержка {stats['avg_latency'] * 1000:.0f}/{stats['max_latency'] * 1000:.0f} мс (сред./макс.), "
+            f"объединено чтений {stats['coalesced_reads']}, "
+            f"дубли {stats['hedge_rate']:.1%} (первыми {stats['hedge_wins']})"
+        )
+
+    async def run_stats_logger(self, interval: float) -> None:
+        """
+        Фоновая задача: периодически пишет статистику запросов к API в журнал.
+
+        Args:
+            interval: Пауза между записями в секундах.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            logger.info(f"📊 Google Sheets: {self.format_stats()}")
+
+    def _hedge_stats(self) -> Dict[str, float]:
+        return {
+            "hedge_threshold": self._hedge_delay() or 0.0,
+            "hedge_rate": self._hedges / (self._hedge_candidates or 1),
+            "hedge_wins": self._hedge_wins,
+            "avg_hedge_saving": self._hedge_saved / (self._hedge_measured or 1),
+        }
+
+    def _hedge_delay(self) -> Optional[float]:
+        """Порог хеджирования: заданный перцентиль последних задержек чтения."""
+        if self._hedge_percentile is None or len(self._read_latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self._read_latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self._hedge_percentile / 100))]
+
+    def _can_hedge(self) -> bool:
+        """Дубль отправляется в пределах бюджета и только если квоту чтения никто не ждет."""
+        if self._hedges + 1 > self._hedge_budget * self._hedge_candidates:
+            return False
+        return self._read_limiter is None or self._read_limiter.queue_depth == 0
+
+    async def _hedged(self, fetch: Callable[[], Awaitable[T]]) -> T:
+        """
+        Выполняет чтение с хеджированием.
+
+        Если ответ не пришел за порог (перцентиль недавних задержек), отправляется
+        такой же второй запрос, и возвращается первый успешный ответ. Проигравший
+        запрос не отменяется: его время нужно для статистики выигрыша, а квота на
+        него уже потрачена. Число дублей ограничено долей hedge_budget от чтений.
+        """
+        if self._hedge_percentile is None:
+            return await fetch()
+
+        delay = self._hedge_delay()
+        self._hedge_candidates += 1
+        started = time.monotonic()
+        primary = asyncio.ensure_future(fetch())
+        primary.add_done_callback(lambda task: self._record_read_latency(task, started))
+
+        if delay is None:
+            return await primary
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not self._can_hedge():
+            return await primary
+
+        self._hedges += 1
+        hedge = asyncio.ensure_future(fetch())
+        hedge.add_done_callback(self._consume_result)
+        logger.info(f"🪞 Чтение не уложилось в {delay:.2f} с, отправлен дублирующий запрос")
+
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+                if winner is not None:
+                    break
+            else:
+                # Оба запроса завершились ошибкой
+                return primary.result()
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            raise
+
+        if winner is hedge:
+            self._hedge_wins += 1
+            won_at = time.monotonic()
+            if pending:
+                primary.add_done_callback(lambda task: self._record_hedge_saving(task, won_at))
+        for task in pending:
+            self._hedge_losers.add(task)
+            task.add_done_callback(self._hedge_losers.discard)
+        return winner.result()
+
+    @staticmethod
+    def _consume_result(task: asyncio.Future) -> None:
+        """Забирает исключение завершенного запроса, результат которого никто не ждет."""
+        if not task.cancelled():
+            task.exception()
+
+    def _record_read_latency(self, task: asyncio.Future, started: float) -> None:
+        """Учитывает задержку основного запроса чтения для порога хеджирования."""
+        if not task.cancelled() and task.exception() is None:
+            self._read_latencies.append(time.monotonic() - started)
+
+    def _record_hedge_saving(self, task: asyncio.Future, won_at: float) -> None:
+        """Учитывает, на сколько позже дубля ответил основной запрос."""
+        if not task.cancelled() and task.exception() is None:
+            self._hedge_measured += 1
+            self._hedge_saved += time.monotonic() - won_at
 
     async def get_data(self, sheet_name: str, range_a1: Optional[str] = None) -> List[List[Any]]:
-        """Получение данных из таблицы."""
+        """
+        Получение данных из таблицы.
+
+        Одновременные запросы одного диапазона разделяют один вызов API (single-flight)
+        и получают один и тот же результат или исключение. Каждый вызывающий получает
+        собственную копию строк. При включенном хеджировании медленный запрос
+        дублируется (см. _hedged).
+        """
+        range_name = f"{sheet_name}!{range_a1}" if range_a1 else sheet_name
         try:
-            range_name = f"{sheet_name}!{range_a1}" if range_a1 else sheet_name
-            
-            request = self.service.spreadsheets().values().get(
-                spreadsheetId=self.spreadsheet_id,
-                range=range_name
-            )
-            result = await self._execute_request(request.execute)
-            
-            return result.get('values', [])
-        except HttpError as e:
+            values = await self._read_shared(range_name)
+        except Exception as e:
             logger.error(f"Ошибка чтения данных из '{sheet_name}': {e}")
             raise
+        return [list(row) for row in values]
+
+    async def _read_shared(self, range_name: str) -> List[List[Any]]:
+        """Присоединяется к выполняющемуся чтению диапазона или запускает новое."""
+        if not self._single_flight:
+            return await self._hedged(lambda: self._fetch_values(range_name))
+
+        if self._reuse_window > 0:
+            recent = self._recent_reads.get(range_name)
+            if recent is not None and time.monotonic() - recent[0] <= self._reuse_window:
+                self._coalesced += 1
+                return recent[1]
+
+        future = self._inflight_reads.get(range_name)
+        if future is None:
+            # Общий запрос не наследует дедлайн первого вызывающего: его ограничивает
+            # только read_timeout, а каждый ожидающий ждет не дольше своего дедлайна.
+            # Приоритет общий и повышается до самого важного из присоединившихся
+            priority = SharedPriority(current_priority())
+            with sheets_deadline(None, detach=True), sheets_priority(priority):
+                future = asyncio.ensure_future(self._hedged(lambda: self._fetch_values(range_name)))
+            self._inflight_reads[range_name] = future
+            self._inflight_priorities[range_name] = priority
+            future.add_done_callback(lambda f: self._finish_read(range_name, f))
+        else:
+            self._coalesced += 1
+            self._inflight_priorities[range_name].raise_to(current_priority())
+
+        # shield: отмена одного ожидающего (в том числе по его дедлайну) не отменяет общий запрос
+        return await run_with_deadline(asyncio.shield(future))
+
+    def _finish_read(self, range_name: str, future: asyncio.Future) -> None:
+        """Снимает чтение с учета и запоминает результат для окна повторного использования."""
+        if self._inflight_reads.get(range_name) is future:
+            del self._inflight_reads[range_name]
+            del self._inflight_priorities[range_name]
+        if future.cancelled():
+            return
+        # Исключение считается полученным, даже если все ожидающие были отменены
+        if future.exception() is None and self._reuse_window > 0:
+            self._recent_reads[range_name] = (time.monotonic(), future.result())
+
+    async def _fetch_values(self, range_name: str) -> List[List[Any]]:
+        """Один вызов API values.get."""
+        result = await self._execute_request(
+            lambda service: service.spreadsheets().values().get(
+                spreadsheetId=self.spreadsheet_id,
+                range=range_name
+            ).execute()
+        )
+        return result.get('values', [])
     
+    async def batch_get(self, sheet_name: str, ranges: List[str]) -> Dict[str, List[List[Any]]]:
+        """
+        Чтение нескольких диапазонов одним запросом (values.batchGet).
+
+        Args:
+            sheet_name: Имя листа.
+            ranges: Диапазоны в нотации A1 без имени листа ('A1:N9', 'P1').
+
+        Returns:
+            Dict[str, List[List[Any]]]: {диапазон из ranges: строки значений}.
+        """
+        if not ranges:
+            return {}
+        try:
+            range_names = [f"{sheet_name}!{range_a1}" for range_a1 in ranges]
+            value_ranges = await self._hedged(lambda: self._fetch_batch(range_names))
+        except Exception as e:
+            logger.error(f"Ошибка пакетного чтения из '{sheet_name}': {e}")
+            raise
+        # API возвращает диапазоны в порядке запроса
+        return {
+            range_a1: value_range.get('values', [])
+            for range_a1, value_range in zip(ranges, value_ranges)
+        }
+
+    async def _fetch_batch(self, range_names: List[str]) -> List[Dict[str, Any]]:
+        """Один вызов API values.batchGet; возвращает valueRanges."""
+        result = await self._execute_request(
+            lambda service: service.spreadsheets().values().batchGet(
+                spreadsheetId=self.spreadsheet_id,
+                ranges=range_names
+            ).execute()
+        )
+        return result.get('valueRanges', [])
+
     async def write_value(self, sheet_name: str, cell: str, value: Any) -> bool:
         """Запись значения в одну ячейку."""
         try:
             range_name = f"{sheet_name}!{cell}"
             body = {'values': [[value]]}
             
-            request = self.service.spreadsheets().values().update(
-                spreadsheetId=self.spreadsheet_id,
-                range=range_name,
-                valueInputOption='RAW',
-                body=body
+            await self._execute_request(
+                lambda service: service.spreadsheets().values().update(
+                    spreadsheetId=self.spreadsheet_id,
+                    range=range_name,
+                    valueInputOption='RAW',
+                    body=body
+                ).execute(),
+                kind="write",
             )
-            await self._execute_request(request.execute)
             return True
         except HttpError as e:
             logger.error(f"Ошибка записи значения в '{range_name}': {e}")
@@ -80,21 +658,20 @@ class GoogleSheetsService:
         ]
         """
         try:
-            data = [
-                {
-                    'range': f"{sheet_name}!{upd['range']}",
-                    'values': upd['values']
-                }
-                for upd in updates
-            ]
-            body = {'valueInputOption': 'RAW', 'data': data}
-
-            request = self.service.spreadsheets().values().batchUpdate(
-                spreadsheetId=self.spreadsheet_id,
-                body=body
+            body = build_batch_update_body(sheet_name, updates)
+
+            await self._execute_request(
+                lambda service: service.spreadsheets().values().batchUpdate(
+                    spreadsheetId=self.spreadsheet_id,
+                    body=body
+                ).execute(),
+                kind="write",
             )
-            await self._execute_request(request.execute)
             return True
         except HttpError as e:
             logger.error(f"Ошибка массового обновления в '{sheet_name}': {e}")
             return False
+
+    async def close(self) -> None:
+        """Освобождает ресурсы клиента при завершении работы."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
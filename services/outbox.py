@@ -0,0 +1,205 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from services.snapshot import write_atomic
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxOperation:
+    """
+    Запись в таблицу, принятая ботом, пока Google Sheets был недоступен.
+
+    kind — "book" (записать value) или "delete" (очистить ячейку, если в ней
+    все еще expected); attempts — сколько раз таблица отклонила пакет с операцией.
+    """
+
+    __slots__ = ("op_id", "kind", "user_id", "cell", "value", "expected", "date", "created_at", "attempts")
+
+    def __init__(
+        self,
+        kind: str,
+        user_id: int,
+        cell: str,
+        value: str,
+        expected: str = "",
+        date: str = "",
+        op_id: Optional[str] = None,
+        created_at: Optional[float] = None,
+        attempts: int = 0,
+    ):
+        self.op_id = op_id or uuid.uuid4().hex
+        self.kind = kind
+        self.user_id = user_id
+        self.cell = cell
+        self.value = value
+        self.expected = expected
+        self.date = date
+        self.created_at = created_at if created_at is not None else time.time()
+        self.attempts = attempts
+
+    def as_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class WriteOutbox:
+    """
+    Персистентная очередь записей в таблицу (outbox) рядом с хранилищем пользователей.
+
+    Файл — append-only журнал JSONL: строка {"op": "add", ...} при приеме операции,
+    {"op": "attempt", "op_id": ...} при отказе таблицы и {"op": "done", "op_id": ...}
+    при завершении; каждая дозапись с fsync. Операции, которые таблица так и не
+    приняла, переносятся в отдельный файл (dead letter) для ручного разбора.
+    При загрузке журнал проигрывается, незавершенные операции остаются в очереди
+    в исходном порядке. Когда очередь пустеет или завершенных записей становится
+    много, журнал атомарно переписывается только с незавершенными операциями.
+    """
+
+    def __init__(self, filename: str, compact_after: int = 100, dead_letter_filename: Optional[str] = None):
+        """
+        Args:
+            filename: Путь к файлу журнала.
+            compact_after: Количество завершенных операций, после которого журнал переписывается.
+            dead_letter_filename: Файл отклоненных операций (по умолчанию filename + ".dead").
+        """
+        self.filename = filename
+        self.dead_letter_filename = dead_letter_filename or f"{filename}.dead"
+        self._compact_after = compact_after
+        self._pending: Dict[str, OutboxOperation] = {}  # В порядке приема
+        self._done_since_compaction = 0
+        self._lock = asyncio.Lock()
+        self._added = asyncio.Event()
+
+    def __len__(self) -> int:
+        """Количество незавершенных операций."""
+        return len(self._pending)
+
+    def pending(self) -> List[OutboxOperation]:
+        """Незавершенные операции в порядке приема."""
+        return list(self._pending.values())
+
+    async def wait_for_pending(self, timeout: float) -> None:
+        """Ждет новую операцию не дольше timeout секунд."""
+        try:
+            await asyncio.wait_for(self._added.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._added.clear()
+
+    async def load(self) -> None:
+        """Загружает незавершенные операции из журнала. Вызывается один раз при старте."""
+        if not os.path.exists(self.filename):
+            return
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self._load_sync)
+            except IOError as e:
+                logger.error(f"❌ Ошибка чтения очереди записей {self.filename}: {e}")
+                return
+        if self._pending:
+            logger.info(f"📮 В очереди записей в таблицу {len(self._pending)} операций")
+            self._added.set()
+
+    def _load_sync(self) -> None:
+        """Синхронно проигрывает журнал; оборванная последняя строка пропускается."""
+        with open(self.filename, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    op = record.pop("op")
+                    if op == "add":
+                        operation = OutboxOperation(**record)
+                        self._pending[operation.op_id] = operation
+                    elif op == "attempt":
+                        if record["op_id"] in self._pending:
+                            self._pending[record["op_id"]].attempts += 1
+                    else:
+                        self._pending.pop(record["op_id"], None)
+                        self._done_since_compaction += 1
+                except (json.JSONDecodeError, KeyError, TypeError) as e:
+                    logger.warning(f"Пропущена поврежденная запись очереди (строка {line_no}): {e}")
+
+    async def add(self, operation: OutboxOperation) -> None:
+        """Добавляет операцию; возврат из метода гарантирует, что она на диске."""
+        async with self._lock:
+            await self._append([{"op": "add", **operation.as_dict()}])
+            self._pending[operation.op_id] = operation
+        self._added.set()
+
+    async def record_failure(self, op_ids: List[str]) -> None:
+        """Учитывает отказ таблицы принять операции (счетчик attempts переживает перезапуск)."""
+        op_ids = [op_id for op_id in op_ids if op_id in self._pending]
+        if not op_ids:
+            return
+        async with self._lock:
+            await self._append([{"op": "attempt", "op_id": op_id} for op_id in op_ids])
+            for op_id in op_ids:
+                self._pending[op_id].attempts += 1
+
+    async def dead_letter(self, operations: List[OutboxOperation], reason: str) -> None:
+        """Переносит операции в файл отклоненных и снимает их с очереди."""
+        if not operations:
+            return
+        payload = "".join(
+            json.dumps({"reason": reason, **operation.as_dict()}, ensure_ascii=False, separators=(',', ':')) + "\n"
+            for operation in operations
+        ).encode('utf-8')
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._append_sync, payload, self.dead_letter_filename)
+        logger.error(
+            f"☠️ {len(operations)} операций очереди перенесены в {self.dead_letter_filename}: {reason}"
+        )
+        await self.complete([operation.op_id for operation in operations])
+
+    async def complete(self, op_ids: List[str]) -> None:
+        """Отмечает операции завершенными (успешно или окончательно отклоненными)."""
+        op_ids = [op_id for op_id in op_ids if op_id in self._pending]
+        if not op_ids:
+            return
+        async with self._lock:
+            for op_id in op_ids:
+                self._pending.pop(op_id, None)
+            self._done_since_compaction += len(op_ids)
+
+            if not self._pending or self._done_since_compaction >= self._compact_after:
+                await self._rewrite()
+            else:
+                await self._append([{"op": "done", "op_id": op_id} for op_id in op_ids])
+
+    async def _append(self, records: List[dict]) -> None:
+        payload = "".join(
+            json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n"
+            for record in records
+        ).encode('utf-8')
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._append_sync, payload)
+
+    def _append_sync(self, payload: bytes, filename: Optional[str] = None) -> None:
+        """Синхронная дозапись в журнал (или другой файл) с fsync."""
+        filename = filename or self.filename
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(filename, 'ab') as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+
+    async def _rewrite(self) -> None:
+        """Атомарно переписывает журнал, оставляя только незавершенные операции."""
+        payload = "".join(
+            json.dumps({"op": "add", **operation.as_dict()}, ensure_ascii=False, separators=(',', ':')) + "\n"
+            for operation in self._pending.values()
+        ).encode('utf-8')
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, write_atomic, self.filename, payload)
+        self._done_since_compaction = 0
@@ -0,0 +1,92 @@
+import logging
+from typing import Awaitable, Callable, Optional
+
+from services.booking_service import BookingService
+from services.outbox import OutboxOperation, WriteOutbox
+
+from utils.helpers import get_human_readable_slot
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxDrainer:
+    """
+    Фоновая отправка очереди записей (outbox) в таблицу.
+
+    Как только в очереди появляются операции (или раз в interval секунд), передает
+    их пачкой в BookingService.drain_outbox. Пока таблица недоступна, проход
+    завершается ошибкой, и операции ждут следующего. Каждому жителю, чья операция
+    получила окончательный итог, отправляется уведомление.
+    """
+
+    def __init__(
+        self,
+        booking_service: BookingService,
+        outbox: WriteOutbox,
+        notify: Callable[[int, str], Awaitable[object]],
+        interval: float = 15,
+        batch_size: int = 50,
+        max_attempts: int = 5,
+    ):
+        """
+        Args:
+            booking_service: Сервис бронирования, выполняющий операции.
+            outbox: Очередь записей.
+            notify: Корутина отправки сообщения пользователю (user_id, text).
+            interval: Пауза между проходами в секундах, пока в очереди есть операции.
+            batch_size: Максимальное количество операций за проход.
+            max_attempts: Сколько отказов таблицы допускается для одной операции,
+                после чего она переносится в файл отклоненных.
+        """
+        self.booking_service = booking_service
+        self.outbox = outbox
+        self._notify = notify
+        self._interval = interval
+        self._batch_size = batch_size
+        self._max_attempts = max_attempts
+
+    @staticmethod
+    def outcome_text(operation: OutboxOperation, error: Optional[str]) -> str:
+        """Текст уведомления об итоге операции из очереди."""
+        slot = get_human_readable_slot(operation.cell)
+        if operation.kind == "delete":
+            if error:
+                return (
+                    f"❌ Запись на <b>{slot}</b> не удалось удалить из таблицы: {error}. "
+                    f"Освободите слот вручную."
+                )
+            return f"🗑️ Запись на <b>{slot}</b> удалена из таблицы."
+        if error:
+            return (
+                f"❌ Запись на <b>{slot}</b> не сохранилась: пока таблица была недоступна, "
+                f"{error}. Выберите другое время."
+            )
+        return f"✅ Запись на <b>{slot}</b> сохранена в таблице."
+
+    async def drain_once(self) -> int:
+        """
+        Отправляет одну пачку операций и уведомляет жителей об итогах.
+
+        Returns:
+            int: Количество операций, получивших окончательный итог.
+        """
+        outcomes = await self.booking_service.drain_outbox(self._batch_size, self._max_attempts)
+        for operation, error in outcomes:
+            try:
+                await self._notify(operation.user_id, self.outcome_text(operation, error))
+            except Exception as e:
+                logger.warning(f"Не удалось уведомить пользователя {operation.user_id}: {e}")
+        return len(outcomes)
+
+    async def run(self) -> None:
+        """Фоновая задача: разбирает очередь, пока в ней есть операции."""
+        while True:
+            try:
+                if not len(self.outbox):
+                    await self.outbox.wait_for_pending(self._interval)
+                    continue
+                if await self.drain_once() < self._batch_size:
+                    await self.outbox.wait_for_pending(self._interval)
+            except Exception as e:
+                logger.error(f"❌ Ошибка отправки очереди записей: {e}")
+                await self.outbox.wait_for_pending(self._interval)
@@ -0,0 +1,164 @@
+"""
+Клиентское ограничение частоты запросов к Google Sheets API.
+
+Квоты Sheets считаются отдельно для чтения и записи, поэтому используются два
+ведра токенов. Запросы, ожидающие токен, обслуживаются по приоритету: операции
+бронирования идут раньше просмотра таблицы и фоновых обновлений. Приоритет
+задается через contextvar, чтобы не менять сигнатуры методов GoogleSheetsService.
+Общий запрос нескольких вызывающих (single-flight) использует SharedPriority:
+его приоритет повышается до самого важного из присоединившихся.
+"""
+import asyncio
+import functools
+import itertools
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Iterator, List, Optional, Tuple, Union
+
+
+class Priority(IntEnum):
+    """Приоритет запроса к API (меньше — важнее)."""
+    HIGH = 0     # Бронирование и удаление записей
+    NORMAL = 1   # Просмотр таблицы по запросу пользователя
+    LOW = 2      # Фоновые обновления и проверки
+
+
+class SharedPriority:
+    """Приоритет общего запроса, который повышается по мере присоединения вызывающих."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, priority: "PriorityLike"):
+        self.value = priority_value(priority)
+
+    def raise_to(self, priority: "PriorityLike") -> None:
+        """Повышает приоритет до заданного, если тот важнее."""
+        self.value = min(self.value, priority_value(priority))
+
+
+PriorityLike = Union[Priority, SharedPriority]
+
+
+def priority_value(priority: PriorityLike) -> Priority:
+    """Текущее значение приоритета (для SharedPriority — с учетом повышений)."""
+    return priority.value if isinstance(priority, SharedPriority) else Priority(priority)
+
+
+_current_priority: ContextVar[PriorityLike] = ContextVar("sheets_priority", default=Priority.NORMAL)
+
+
+def current_priority() -> PriorityLike:
+    """Возвращает приоритет запросов в текущем контексте."""
+    return _current_priority.get()
+
+
+@contextmanager
+def sheets_priority(priority: PriorityLike) -> Iterator[None]:
+    """Задает приоритет запросов к API внутри блока with (включая созданные в нем задачи)."""
+    token = _current_priority.set(priority)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def with_sheets_priority(priority: Priority):
+    """Декоратор корутины: все запросы к API внутри нее идут с заданным приоритетом."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with sheets_priority(priority):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def backoff_delay(attempt: int, base: float, cap: float, retry_after: Optional[float] = None) -> float:
+    """
+    Задержка перед повтором: Retry-After от сервера, если он есть, иначе
+    экспоненциальная задержка с полным джиттером.
+
+    Args:
+        attempt: Номер неудачной попытки, начиная с 0.
+        base: Базовая задержка в секундах.
+        cap: Максимальная задержка в секундах.
+        retry_after: Значение заголовка Retry-After в секундах.
+    """
+    if retry_after is not None:
+        return min(retry_after, cap)
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class TokenBucket:
+    """
+    Ведро токенов: rate токенов в секунду, не больше capacity за раз.
+
+    Если токенов нет, запрос ждет в очереди; очередь обслуживается по приоритету,
+    внутри одного приоритета — в порядке поступления. Приоритет SharedPriority
+    учитывается на момент выдачи токена, поэтому ожидание можно повысить.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate: Скорость пополнения, токенов в секунду.
+            capacity: Максимальный запас токенов (допустимый всплеск).
+        """
+        self._rate = rate
+        self._capacity = capacity
+        self._tokens = capacity
+        self._updated_at = time.monotonic()
+
+        self._waiters: List[Tuple[PriorityLike, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    @classmethod
+    def per_minute(cls, quota: int, burst: int) -> "TokenBucket":
+        """Создает ведро по квоте «запросов в минуту»."""
+        return cls(rate=quota / 60, capacity=burst)
+
+    @property
+    def queue_depth(self) -> int:
+        """Количество запросов, ожидающих токен."""
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self._capacity, self._tokens + (now - self._updated_at) * self._rate)
+        self._updated_at = now
+
+    async def acquire(self, priority: PriorityLike = Priority.NORMAL) -> None:
+        """Забирает один токен, дожидаясь его при необходимости."""
+        self._refill()
+        if not self._waiters and self._tokens >= 1:
+            self._tokens -= 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((priority, next(self._sequence), future))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    async def _dispatch(self) -> None:
+        """Раздает токены ожидающим по мере пополнения ведра."""
+        while self._waiters:
+            # Отмененные ожидания пропускаются
+            self._waiters = [waiter for waiter in self._waiters if not waiter[2].done()]
+            if not self._waiters:
+                break
+
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                # Очередь короткая, а приоритеты могут повыситься: выбор полным проходом
+                waiter = min(self._waiters, key=lambda item: (priority_value(item[0]), item[1]))
+                self._waiters.remove(waiter)
+                waiter[2].set_result(None)
+                continue
+
+            await asyncio.sleep((1 - self._tokens) / self._rate)
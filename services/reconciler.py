@@ -0,0 +1,106 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from config.constants import GS_DATA_RANGE
+
+from services.booking_service import BookingService
+from services.storage_base import BaseUserStorage
+
+from utils.helpers import cell_to_indices, get_grid_value, indices_to_cell
+
+logger = logging.getLogger(__name__)
+
+
+class SheetReconciler:
+    """
+    Фоновая сверка глобальной карты записей с таблицей.
+
+    Получает каждый свежий снимок из BookingService.get_table_data, сравнивает его
+    с предыдущим и передает в хранилище только изменившиеся ячейки. Благодаря этому
+    записи всех пользователей остаются актуальными без принудительных запросов к API
+    при открытии /bookings.
+    """
+
+    def __init__(self, booking_service: BookingService, storage: BaseUserStorage, interval: float = 60):
+        """
+        Args:
+            booking_service: Сервис бронирования, источник снимков таблицы.
+            storage: Хранилище пользователей.
+            interval: Максимальная пауза между сверками в секундах; по ее истечении
+                снимок запрашивается через кэш BookingService.
+        """
+        self.booking_service = booking_service
+        self.storage = storage
+        self._interval = interval
+
+        end_row_idx, end_col_idx = cell_to_indices(GS_DATA_RANGE.split(":")[1])
+        self._rows = end_row_idx + 1
+        self._cols = end_col_idx + 1
+
+        self._previous: Optional[List[List[str]]] = None
+        self._pending: Optional[Tuple[List[List[str]], float]] = None
+        self._snapshot_event = asyncio.Event()
+
+        booking_service.add_snapshot_listener(self.on_snapshot)
+
+    def on_snapshot(self, table_data: List[List[str]], fetched_at: float) -> None:
+        """Принимает свежий снимок таблицы; сверка выполняется в фоновой задаче."""
+        # Копия: кэш BookingService может меняться на месте
+        self._pending = ([list(row) for row in table_data], fetched_at)
+        self._snapshot_event.set()
+
+    def diff(self, table_data: List[List[str]]) -> Dict[str, str]:
+        """
+        Возвращает изменившиеся ячейки сетки относительно предыдущего снимка.
+        Для первого снимка изменившимися считаются все ячейки.
+        """
+        changes = {}
+        for row_idx in range(self._rows):
+            for col_idx in range(self._cols):
+                value = get_grid_value(table_data, row_idx, col_idx)
+                if self._previous is None or value != get_grid_value(self._previous, row_idx, col_idx):
+                    changes[indices_to_cell(row_idx, col_idx)] = value
+        return changes
+
+    async def reconcile(self, table_data: List[List[str]], fetched_at: float) -> int:
+        """
+        Сверяет снимок с предыдущим и применяет изменения к хранилищу.
+
+        Ячейки, в которые бот писал после начала загрузки снимка, пропускаются:
+        снимок мог не успеть увидеть эту запись.
+
+        Returns:
+            int: Количество затронутых записей в хранилище.
+        """
+        changes = {
+            cell: value for cell, value in self.diff(table_data).items()
+            if not self.booking_service.written_since(cell, fetched_at)
+        }
+
+        changed = await self.storage.apply_sheet_changes(changes) if changes else 0
+        # Снимок запоминается только после успешного применения: иначе изменения
+        # повторятся при следующей сверке
+        self._previous = table_data
+        return changed
+
+    async def run(self) -> None:
+        """Фоновая задача: сверяет каждый новый снимок, а при простое сама запрашивает его."""
+        while True:
+            try:
+                try:
+                    await asyncio.wait_for(self._snapshot_event.wait(), timeout=self._interval)
+                except asyncio.TimeoutError:
+                    # Новых снимков не было: get_table_data обновит кэш, если истек TTL,
+                    # и снимок придет через on_snapshot
+                    await self.booking_service.get_table_data()
+
+                self._snapshot_event.clear()
+                if self._pending is not None:
+                    table_data, fetched_at = self._pending
+                    self._pending = None
+                    await self.reconcile(table_data, fetched_at)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"❌ Ошибка фоновой сверки с таблицей: {e}")
@@ -0,0 +1,138 @@
+"""
+Бинарный формат снапшота хранилища пользователей.
+
+Заголовок (little-endian): магическая сигнатура, версия формата,
+длина полезной нагрузки и ее CRC32. Полезная нагрузка:
+
+    u32 количество пользователей, затем для каждого:
+        i64 user_id, u16 длина имени в байтах (0xFFFF — имени нет), имя в UTF-8
+    u32 количество записей, затем для каждой:
+        u16 slot_id, i64 user_id, u32 date_ordinal
+"""
+import os
+import struct
+import zlib
+from typing import Iterable, List, Tuple
+
+from services.storage_records import BookingRecord, UserRecord
+
+MAGIC = b"WMSS"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sHII")
+_COUNT = struct.Struct("<I")
+_USER = struct.Struct("<qH")
+_BOOKING = struct.Struct("<HqI")
+_NO_NAME = 0xFFFF
+
+
+class SnapshotError(ValueError):
+    """Снапшот поврежден или записан в неподдерживаемом формате."""
+
+
+def encode_snapshot(users: Iterable[UserRecord], bookings: Iterable[BookingRecord]) -> bytes:
+    """
+    Кодирует пользователей и записи в бинарный снапшот.
+
+    Args:
+        users: Записи пользователей.
+        bookings: Записи бронирований.
+
+    Returns:
+        bytes: Снапшот вместе с заголовком.
+    """
+    users = list(users)
+    bookings = list(bookings)
+
+    parts = [_COUNT.pack(len(users))]
+    for user in users:
+        if user.name is None:
+            parts.append(_USER.pack(user.user_id, _NO_NAME))
+        else:
+            name = user.name.encode("utf-8")
+            parts.append(_USER.pack(user.user_id, len(name)))
+            parts.append(name)
+
+    parts.append(_COUNT.pack(len(bookings)))
+    parts.extend(_BOOKING.pack(b.slot_id, b.user_id, b.date_ordinal) for b in bookings)
+
+    payload = b"".join(parts)
+    return _HEADER.pack(MAGIC, VERSION, len(payload), zlib.crc32(payload)) + payload
+
+
+def decode_snapshot(data: bytes) -> Tuple[List[UserRecord], List[BookingRecord]]:
+    """
+    Декодирует бинарный снапшот с проверкой заголовка и контрольной суммы.
+
+    Args:
+        data: Содержимое файла снапшота.
+
+    Returns:
+        Tuple[List[UserRecord], List[BookingRecord]]: (Пользователи, Записи).
+
+    Raises:
+        SnapshotError: Если сигнатура, версия, длина или CRC32 не совпадают.
+    """
+    if len(data) < _HEADER.size:
+        raise SnapshotError("Снапшот короче заголовка")
+
+    magic, version, length, checksum = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError("Неизвестная сигнатура снапшота")
+    if version != VERSION:
+        raise SnapshotError(f"Неподдерживаемая версия снапшота: {version}")
+
+    payload = memoryview(data)[_HEADER.size:]
+    if len(payload) != length or zlib.crc32(payload) != checksum:
+        raise SnapshotError("Контрольная сумма снапшота не совпадает")
+
+    try:
+        offset = 0
+        (users_count,) = _COUNT.unpack_from(payload, offset)
+        offset += _COUNT.size
+
+        users = []
+        for _ in range(users_count):
+            user_id, name_len = _USER.unpack_from(payload, offset)
+            offset += _USER.size
+            name = None
+            if name_len != _NO_NAME:
+                name = bytes(payload[offset:offset + name_len]).decode("utf-8")
+                offset += name_len
+            users.append(UserRecord(user_id, name))
+
+        (bookings_count,) = _COUNT.unpack_from(payload, offset)
+        offset += _COUNT.size
+
+        bookings = [
+            BookingRecord(*_BOOKING.unpack_from(payload, offset + i * _BOOKING.size))
+            for i in range(bookings_count)
+        ]
+    except (struct.error, UnicodeDecodeError) as e:
+        raise SnapshotError(f"Снапшот поврежден: {e}") from e
+
+    return users, bookings
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """
+    Атомарно заменяет файл: запись во временный файл, fsync и rename.
+    После rename синхронизируется каталог, чтобы замена пережила сбой питания.
+
+    Args:
+        path: Путь к целевому файлу.
+        data: Новое содержимое файла.
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+    if hasattr(os, "O_DIRECTORY"):
+        dir_fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
@@ -0,0 +1,308 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from services.storage_base import (
+    BaseUserStorage,
+    find_ghost_cells,
+    name_key,
+    normalize_storage_data,
+    resolve_sheet_change,
+)
+
+from utils.date_helpers import is_date_expired
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id  INTEGER PRIMARY KEY,
+    name     TEXT,
+    name_key TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_users_name_key ON users(name_key);
+
+CREATE TABLE IF NOT EXISTS bookings (
+    cell    TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    date    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_bookings_user ON bookings(user_id);
+"""
+
+
+def _name_key(name: Optional[str]) -> Optional[str]:
+    """Ключ для регистронезависимого поиска имени."""
+    return name_key(name) if name else None
+
+
+class SQLiteUserStorage(BaseUserStorage):
+    """
+    Хранилище пользователей и бронирований на SQLite в режиме WAL.
+
+    Запись выполняется в отдельном однопоточном executor'е со своим соединением,
+    поэтому цикл событий не блокируется на fsync. Чтение идет через отдельное
+    соединение в потоке цикла событий: в режиме WAL читатели не ждут писателя,
+    а все запросы чтения — точечные выборки по индексам.
+    """
+
+    def __init__(self, filename: str = "users_data.sqlite3"):
+        """
+        Args:
+            filename: Путь к файлу базы данных SQLite.
+        """
+        self.filename = filename
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        self._writer: Optional[sqlite3.Connection] = None
+        self._reader: Optional[sqlite3.Connection] = None
+
+    async def load(self) -> None:
+        """
+        Открывает базу данных и создает схему.
+        Должна вызываться один раз при старте приложения.
+        """
+        directory = os.path.dirname(self.filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        await self._run_write(self._open_writer_sync)
+        self._reader = sqlite3.connect(self.filename, isolation_level=None)
+        logger.info(f"✅ База SQLite открыта: {self.filename}, пользователей: {self.get_users_count()}.")
+
+    def _open_writer_sync(self) -> None:
+        """Открывает соединение писателя в потоке executor'а."""
+        self._writer = sqlite3.connect(self.filename, check_same_thread=False)
+        self._writer.execute("PRAGMA journal_mode=WAL")
+        self._writer.execute("PRAGMA synchronous=NORMAL")
+        self._writer.executescript(SCHEMA)
+        self._writer.commit()
+
+    async def _run_write(self, func, *args):
+        """Выполняет функцию в потоке писателя."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _execute_sync(self, statements: List[Tuple[str, tuple]]) -> None:
+        """Выполняет набор запросов одной транзакцией."""
+        with self._writer:
+            for sql, params in statements:
+                self._writer.execute(sql, params)
+
+    async def flush(self) -> None:
+        """Дожидается завершения всех поставленных в очередь записей."""
+        if self._writer is not None:
+            await self._run_write(self._writer.commit)
+
+    async def close(self) -> None:
+        """Закрывает соединения и останавливает поток писателя."""
+        await self.flush()
+        if self._writer is not None:
+            await self._run_write(self._writer.close)
+        if self._reader is not None:
+            self._reader.close()
+        self._executor.shutdown(wait=True)
+
+    # --- Методы работы с пользователями (только читающие) ---
+
+    def user_exists(self, user_id: int) -> bool:
+        """Проверяет наличие пользователя в базе."""
+        row = self._reader.execute("SELECT 1 FROM users WHERE user_id = ?", (int(user_id),)).fetchone()
+        return row is not None
+
+    def get_user(self, user_id: int) -> Optional[dict]:
+        """Возвращает данные пользователя."""
+        row = self._reader.execute("SELECT name FROM users WHERE user_id = ?", (int(user_id),)).fetchone()
+        if row is None:
+            return None
+        return {"name": row[0], "points": self.get_user_bookings(user_id)}
+
+    def get_users_count(self) -> int:
+        """Возвращает количество пользователей."""
+        return self._reader.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def is_name_taken(self, name: str) -> bool:
+        """Проверяет, занято ли имя кем-то из пользователей."""
+        row = self._reader.execute("SELECT 1 FROM users WHERE name_key = ? LIMIT 1", (_name_key(name),)).fetchone()
+        return row is not None
+
+    # --- Методы работы с пользователями (читающие и пишущие) ---
+
+    async def add_user(self, user_id: int) -> None:
+        await self._run_write(self._execute_sync, [
+            ("INSERT OR IGNORE INTO users (user_id) VALUES (?)", (int(user_id),)),
+        ])
+
+    async def set_user_name(self, user_id: int, name: str) -> None:
+        """Устанавливает имя пользователю."""
+        await self._run_write(self._execute_sync, [
+            ("UPDATE users SET name = ?, name_key = ? WHERE user_id = ?", (name, _name_key(name), int(user_id))),
+        ])
+
+    # --- Методы работы с записями (Bookings) (только читающие) ---
+
+    def get_owner_by_cell(self, cell_address: str) -> Optional[str]:
+        """Возвращает user_id владельца записи в ячейке."""
+        row = self._reader.execute("SELECT user_id FROM bookings WHERE cell = ?", (cell_address,)).fetchone()
+        return str(row[0]) if row else None
+
+    def get_user_bookings(self, user_id: int) -> Dict[str, str]:
+        """Возвращает словарь {ячейка: дата} для пользователя."""
+        rows = self._reader.execute("SELECT cell, date FROM bookings WHERE user_id = ?", (int(user_id),))
+        return dict(rows.fetchall())
+
+    # --- Методы работы с записями (Bookings) (читающие и пишущие) ---
+
+    async def add_booking(self, user_id: int, cell_address: str, date: str) -> None:
+        """Добавляет запись пользователю (пользователь создается автоматически)."""
+        await self._run_write(self._execute_sync, [
+            ("INSERT OR IGNORE INTO users (user_id) VALUES (?)", (int(user_id),)),
+            ("INSERT OR REPLACE INTO bookings (cell, user_id, date) VALUES (?, ?, ?)", (cell_address, int(user_id), date)),
+        ])
+        logger.info(f"Запись добавлена: User {user_id}, Cell {cell_address}, Date {date}")
+
+    async def remove_booking(self, cell_address: str) -> None:
+        """Удаляет запись по адресу ячейки."""
+        await self._run_write(self._execute_sync, [
+            ("DELETE FROM bookings WHERE cell = ?", (cell_address,)),
+        ])
+        logger.info(f"Запись удалена: Cell {cell_address}")
+
+    async def sync_user_bookings(self, user_id: int, table_data: List[List[str]]) -> Dict[str, str]:
+        """
+        Синхронизирует локальные данные пользователя с состоянием Google Таблицы.
+        Удаляет просроченные записи или те, что были изменены в таблице вручную.
+        """
+        user = self.get_user(user_id)
+        if user is None:
+            return {}
+
+        expired_cells = self._collect_expired()
+        active_points = {cell: d for cell, d in user["points"].items() if cell not in expired_cells}
+        ghost_cells = find_ghost_cells(user["name"], active_points, table_data)
+        if ghost_cells:
+            logger.info(f"Для пользователя {user_id} будут удалены призрачные записи: {ghost_cells}")
+
+        cells_to_remove = expired_cells + ghost_cells
+        if cells_to_remove:
+            await self._delete_cells(cells_to_remove)
+
+        return self.get_user_bookings(user_id)
+
+    async def apply_sheet_changes(self, changes: Dict[str, str]) -> int:
+        """Применяет изменившиеся ячейки таблицы к записям владельцев одной транзакцией."""
+        statements = []
+        for cell, value in changes.items():
+            row = self._reader.execute(
+                "SELECT b.date, u.name FROM bookings b LEFT JOIN users u ON u.user_id = b.user_id WHERE b.cell = ?",
+                (cell,),
+            ).fetchone()
+            if row is None:
+                continue
+
+            booked_date, owner_name = row
+            new_date = resolve_sheet_change(owner_name, booked_date, value)
+            if new_date is None:
+                continue
+
+            if new_date:
+                statements.append(("UPDATE bookings SET date = ? WHERE cell = ?", (new_date, cell)))
+            else:
+                statements.append(("DELETE FROM bookings WHERE cell = ?", (cell,)))
+
+        if statements:
+            logger.info(f"Сверка с таблицей: обновлено записей {len(statements)}")
+            await self._run_write(self._execute_sync, statements)
+        return len(statements)
+
+    def _collect_expired(self) -> List[str]:
+        """
+        Возвращает ячейки с записями на прошедшие даты.
+        Таблица записей ограничена размером сетки, поэтому достаточно полного прохода.
+        """
+        rows = self._reader.execute("SELECT cell, date FROM bookings").fetchall()
+        return [cell for cell, date in rows if is_date_expired(date)]
+
+    async def _delete_cells(self, cells: List[str]) -> None:
+        """Удаляет записи по списку ячеек одной транзакцией."""
+        await self._run_write(self._execute_sync, [
+            ("DELETE FROM bookings WHERE cell = ?", (cell,)) for cell in cells
+        ])
+
+    async def purge_expired(self) -> int:
+        """Удаляет все записи на прошедшие даты одной транзакцией."""
+        expired_cells = self._collect_expired()
+        if expired_cells:
+            await self._delete_cells(expired_cells)
+        return len(expired_cells)
+
+
+def migrate_json_to_sqlite(json_path: str, db_path: str, batch_size: int = 1000) -> Tuple[int, int]:
+    """
+    Переносит данные из JSON-хранилища (включая старый формат) в базу SQLite.
+
+    JSON читается целиком (стандартный модуль json не умеет потоковый разбор),
+    а строки генерируются лениво и вставляются пачками по batch_size,
+    каждая пачка фиксируется отдельной транзакцией.
+
+    Args:
+        json_path: Путь к исходному JSON-файлу.
+        db_path: Путь к целевой базе SQLite (схема создается при необходимости).
+        batch_size: Количество строк в одной транзакции.
+
+    Returns:
+        Tuple[int, int]: (Количество пользователей, Количество записей).
+    """
+    with open(json_path, 'r', encoding='utf-8') as f:
+        data = normalize_storage_data(json.load(f))
+
+    def iter_users() -> Iterator[tuple]:
+        for str_id, user_data in data["users"].items():
+            name = user_data.get("name")
+            yield int(str_id), name, _name_key(name)
+
+    def iter_bookings() -> Iterator[tuple]:
+        # Глобальная карта — источник истины о владельце ячейки
+        for cell, booking in data["global_map"].items():
+            yield cell, int(booking["user_id"]), booking["date"]
+        # Записи из points без глобальной карты (старый формат)
+        for str_id, user_data in data["users"].items():
+            for cell, date in user_data.get("points", {}).items():
+                if cell not in data["global_map"]:
+                    yield cell, int(str_id), date
+
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        users_count = _insert_in_batches(
+            conn, "INSERT OR REPLACE INTO users (user_id, name, name_key) VALUES (?, ?, ?)", iter_users(), batch_size
+        )
+        bookings_count = _insert_in_batches(
+            conn, "INSERT OR IGNORE INTO bookings (cell, user_id, date) VALUES (?, ?, ?)", iter_bookings(), batch_size
+        )
+    finally:
+        conn.close()
+
+    return users_count, bookings_count
+
+
+def _insert_in_batches(conn: sqlite3.Connection, sql: str, rows: Iterator[tuple], batch_size: int) -> int:
+    """Вставляет строки из итератора пачками, фиксируя каждую пачку."""
+    total = 0
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            with conn:
+                conn.executemany(sql, batch)
+            total += len(batch)
+            batch.clear()
+    if batch:
+        with conn:
+            conn.executemany(sql, batch)
+        total += len(batch)
+    return total
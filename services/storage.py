@@ -1,178 +1,517 @@
 import asyncio
+import heapq
 import json
 import logging
 import os
-from typing import Dict, Optional, List
-
-from utils.date_helpers import is_date_expired, parse_cell_content
-from utils.helpers import cell_to_indices
+from datetime import date
+from typing import Dict, Optional, List, Set
+
+from services.storage_base import (
+    BaseUserStorage,
+    find_ghost_cells,
+    name_key,
+    normalize_storage_data,
+    resolve_sheet_change,
+)
+from services.storage_records import BookingRecord, UserRecord
+from services.snapshot import SnapshotError, decode_snapshot, encode_snapshot, write_atomic
+
+from utils.date_helpers import date_str_to_ordinal, ordinal_to_date_str
+from utils.helpers import cell_to_slot_id, slot_id_to_cell
 
 logger = logging.getLogger(__name__)
 
-class UserStorage:
+class UserStorage(BaseUserStorage):
     """
     Асинхронное файловое хранилище для данных пользователей и бронирований.
     
     Использует JSON для персистентности и asyncio.Lock для потокобезопасности.
+    В памяти данные хранятся компактными записями с __slots__ (целые id пользователей,
+    id слотов и порядковые номера дат); JSON-формат на диске не изменился.
+
+    В режиме журнала (journal=True) каждая мутация дописывает одну компактную
+    запись в файл `<filename>.journal` вместо полной перезаписи JSON.
+    При загрузке снапшот дополняется журналом, а фоновый компактор сворачивает
+    журнал в новый снапшот, когда тот превышает порог размера.
+
+    Снапшот может храниться в бинарном формате (snapshot_format="binary",
+    файл `<filename без расширения>.bin`, см. services.snapshot). JSON-файл
+    при этом остается резервным источником: он читается, если бинарного снапшота
+    нет или он поврежден, после чего данные сразу сохраняются в бинарном виде.
     """
 
-    def __init__(self, filename: str = "users_data.json"):
+    def __init__(
+        self,
+        filename: str = "users_data.json",
+        journal: bool = False,
+        compact_threshold: int = 256 * 1024,
+        flush_interval: float = 0.0,
+        snapshot_format: str = "json",
+    ):
         """
         Args:
             filename: Путь к JSON-файлу хранилища.
+            journal: Включает append-only журнал мутаций.
+            compact_threshold: Размер журнала в байтах, после которого запускается компактизация.
+            flush_interval: Окно (в секундах), в течение которого мутации копятся для одной записи на диск.
+            snapshot_format: Формат снапшота: "json" или "binary".
         """
+        if snapshot_format not in ("json", "binary"):
+            raise ValueError(f"Неизвестный формат снапшота: {snapshot_format}")
+
         self.filename = filename
+        self.journal_filename = f"{filename}.journal"
+        self.binary_filename = f"{os.path.splitext(filename)[0]}.bin"
+        self._snapshot_format = snapshot_format
         self._lock = asyncio.Lock()
-        self._data = {
-            "users": {},      # { "user_id": { "name": str, "points": { "cell": "date" } } }
-            "global_map": {}  # { "cell_address": { "user_id": str, "date": str } }
-        }
+        self._users: Dict[int, UserRecord] = {}        # { user_id: UserRecord }
+        self._bookings: Dict[int, BookingRecord] = {}  # { slot_id: BookingRecord }
+
+        # Вторичные индексы (не сохраняются, перестраиваются при загрузке)
+        self._name_index: Dict[str, int] = {}          # { casefold(name): user_id }
+        self._user_slots: Dict[int, Set[int]] = {}     # { user_id: {slot_id} }, только пользователи с записями
+        self._date_slots: Dict[int, Set[int]] = {}     # { date_ordinal: {slot_id} }
+        self._expiry_heap: List[int] = []              # min-heap дат из _date_slots (с ленивым удалением)
+
+        self._journal_enabled = journal
+        self._compact_threshold = compact_threshold
+        self._journal_size = 0
+        self._compaction_task: Optional[asyncio.Task] = None
+
+        self._flush_interval = flush_interval
+        self._pending_records: List[dict] = []
+        self._flush_future: Optional[asyncio.Future] = None
+        self._flush_task: Optional[asyncio.Task] = None
 
     async def load(self) -> None:
         """
         Асинхронно загружает данные из файла.
         Должна вызываться один раз при старте приложения.
+
+        Поврежденный бинарный снапшот переименовывается в *.corrupt для ручного
+        восстановления; данные читаются из резервного JSON, но автоматический
+        перевод в бинарный формат при этом не выполняется.
         """
+        upgrade_to_binary = False
+        binary_corrupted = False
+
         async with self._lock:
-            if not os.path.exists(self.filename):
+            loop = asyncio.get_running_loop()
+            loaded = False
+
+            if self._snapshot_format == "binary" and os.path.exists(self.binary_filename):
+                try:
+                    await loop.run_in_executor(None, self._load_binary_sync)
+                    loaded = True
+                    logger.info(f"✅ Данные пользователей успешно загружены из {self.binary_filename}.")
+                except (SnapshotError, IOError) as e:
+                    binary_corrupted = True
+                    corrupt_filename = self.binary_filename + ".corrupt"
+                    try:
+                        os.replace(self.binary_filename, corrupt_filename)
+                    except OSError as move_error:
+                        logger.error(f"❌ Не удалось переместить {self.binary_filename}: {move_error}")
+                    logger.critical(
+                        f"🚨 Снапшот {self.binary_filename} поврежден ({e}) и сохранен как {corrupt_filename}. "
+                        f"Используется резервный {self.filename}, он может быть устаревшим: "
+                        f"проверьте данные и восстановите записи вручную."
+                    )
+
+            if not loaded and not os.path.exists(self.filename):
                 logger.warning(f"Файл {self.filename} не найден. Будет создан новый.")
-                return
+            elif not loaded:
+                try:
+                    await loop.run_in_executor(None, self._load_sync)
+                    upgrade_to_binary = self._snapshot_format == "binary" and not binary_corrupted
+                    logger.info(f"✅ Данные пользователей успешно загружены из {self.filename}.")
+                except (json.JSONDecodeError, IOError) as e:
+                    logger.error(f"❌ Ошибка загрузки данных из {self.filename}: {e}")
+
+            if self._journal_enabled and os.path.exists(self.journal_filename):
+                try:
+                    replayed = await loop.run_in_executor(None, self._replay_journal_sync)
+                    logger.info(f"✅ Из журнала {self.journal_filename} применено записей: {replayed}.")
+                except IOError as e:
+                    logger.error(f"❌ Ошибка чтения журнала {self.journal_filename}: {e}")
+
+        if upgrade_to_binary:
+            logger.info(f"Перевод хранилища в бинарный формат: {self.binary_filename}")
+            await self._save()
 
-            try:
-                loop = asyncio.get_running_loop()
-                await loop.run_in_executor(None, self._load_sync)
-                logger.info(f"✅ Данные пользователей успешно загружены из {self.filename}.")
-            except (json.JSONDecodeError, IOError) as e:
-                logger.error(f"❌ Ошибка загрузки данных из {self.filename}: {e}")
+    def _load_binary_sync(self) -> None:
+        """Синхронная загрузка бинарного снапшота."""
+        with open(self.binary_filename, 'rb') as f:
+            users, bookings = decode_snapshot(f.read())
+
+        self._reset()
+        # Декодированные записи используются напрямую, без повторного создания объектов
+        self._users = {user.user_id: user for user in users}
+        self._name_index = {name_key(user.name): user.user_id for user in users if user.name}
+        for booking in bookings:
+            self._link_booking(booking.slot_id, booking.user_id, booking.date_ordinal)
 
     def _load_sync(self) -> None:
         """Синхронная часть загрузки данных."""
         with open(self.filename, 'r', encoding='utf-8') as f:
-            raw_data = json.load(f)
             # Простая миграция со старого формата
-            if "users" in raw_data and "global_map" in raw_data:
-                self._data = raw_data
-            else:
-                logger.info("Обнаружен старый формат базы. Проводится миграция...")
-                self._data["users"] = raw_data
-                self._data["global_map"] = {}
-                for u_id in self._data["users"]:
-                    if "points" not in self._data["users"][u_id]:
-                        self._data["users"][u_id]["points"] = {}
+            self._import_json_data(normalize_storage_data(json.load(f)))
+
+    def _reset(self) -> None:
+        """Очищает данные в памяти вместе с индексами."""
+        self._users = {}
+        self._bookings = {}
+        self._name_index = {}
+        self._user_slots = {}
+        self._date_slots = {}
+        self._expiry_heap = []
+
+    def _import_json_data(self, data: dict) -> None:
+        """Заменяет данные в памяти содержимым JSON-снапшота и перестраивает индексы."""
+        self._reset()
+
+        for str_id, user_data in data["users"].items():
+            self._put_user(int(str_id), user_data.get("name"))
+
+        # Глобальная карта — источник истины о владельце ячейки,
+        # points без глобальной карты встречаются только в старом формате
+        bookings = [(cell, b["user_id"], b["date"]) for cell, b in data["global_map"].items()]
+        for str_id, user_data in data["users"].items():
+            bookings.extend(
+                (cell, str_id, booked_date) for cell, booked_date in user_data.get("points", {}).items()
+                if cell not in data["global_map"]
+            )
+
+        for cell, str_id, booked_date in bookings:
+            try:
+                user_id = int(str_id)
+                self._link_booking(cell_to_slot_id(cell), user_id, date_str_to_ordinal(booked_date))
+            except ValueError as e:
+                logger.warning(f"Пропущена некорректная запись {cell} ({booked_date}): {e}")
+                continue
+            # Владелец из глобальной карты мог отсутствовать в users (как и при add_booking)
+            if user_id not in self._users:
+                self._put_user(user_id, None)
+
+    def _export_json_data(self) -> dict:
+        """Собирает данные в формате JSON-снапшота."""
+        users = {
+            str(user_id): {"name": record.name, "points": {}}
+            for user_id, record in self._users.items()
+        }
+        global_map = {}
+        for slot_id, booking in self._bookings.items():
+            cell = slot_id_to_cell(slot_id)
+            booked_date = ordinal_to_date_str(booking.date_ordinal)
+            users[str(booking.user_id)]["points"][cell] = booked_date
+            global_map[cell] = {"user_id": str(booking.user_id), "date": booked_date}
+        return {"users": users, "global_map": global_map}
+
+    def _replay_journal_sync(self) -> int:
+        """
+        Синхронно применяет записи журнала поверх загруженного снапшота.
+
+        Все операции журнала идемпотентны, поэтому повторное применение записей,
+        уже попавших в снапшот (сбой между записью снапшота и обрезкой журнала), безопасно.
+        Оборванная последняя строка (сбой посреди дозаписи) пропускается.
+        """
+        replayed = 0
+        with open(self.journal_filename, 'r', encoding='utf-8') as f:
+            for line_no, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    self._apply(json.loads(line))
+                    replayed += 1
+                except (json.JSONDecodeError, KeyError, ValueError) as e:
+                    logger.warning(f"Пропущена поврежденная запись журнала (строка {line_no}): {e}")
+        self._journal_size = os.path.getsize(self.journal_filename)
+        return replayed
+
+    @property
+    def snapshot_filename(self) -> str:
+        """Путь к файлу снапшота в текущем формате."""
+        return self.binary_filename if self._snapshot_format == "binary" else self.filename
+
+    def _serialize_snapshot(self) -> bytes:
+        """
+        Сериализует данные в снапшот текущего формата.
+        Вызывается в потоке цикла событий, чтобы не читать данные параллельно с мутациями.
+        """
+        if self._snapshot_format == "binary":
+            return encode_snapshot(self._users.values(), self._bookings.values())
+        return json.dumps(self._export_json_data(), ensure_ascii=False, indent=4).encode('utf-8')
 
     async def _save(self) -> None:
         """Асинхронно и безопасно сохраняет данные в файл."""
         async with self._lock:
+            payload = self._serialize_snapshot()
             loop = asyncio.get_running_loop()
-            await loop.run_in_executor(None, self._save_sync)
+            await loop.run_in_executor(None, self._save_sync, payload)
+
+    def _save_sync(self, payload: bytes) -> None:
+        """Синхронная часть сохранения данных (атомарная замена файла)."""
+        write_atomic(self.snapshot_filename, payload)
+
+    # --- Групповая фиксация изменений (group commit) ---
+
+    async def _commit(self, *records: dict) -> None:
+        """
+        Применяет мутации к данным в памяти и дожидается их сохранения.
+
+        Все мутации, пришедшие в течение окна flush_interval, ждут один общий
+        future и сохраняются одной записью на диск. Возврат из метода гарантирует,
+        что изменения уже на диске.
+
+        Raises:
+            ValueError: Если хотя бы одна запись некорректна; в этом случае
+                не применяется ни одна.
+        """
+        for record in records:
+            self._validate(record)
+        for record in records:
+            self._apply(record)
+        if self._journal_enabled:
+            self._pending_records.extend(records)
+
+        if self._flush_future is None:
+            self._flush_future = asyncio.get_running_loop().create_future()
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+        # shield: отмена одного ожидающего хендлера не должна отменять общий flush
+        await asyncio.shield(self._flush_future)
+
+    async def _delayed_flush(self) -> None:
+        """Ждет окно накопления и сбрасывает изменения."""
+        await asyncio.sleep(self._flush_interval)
+        await self._flush()
+
+    async def _flush(self) -> None:
+        """Сбрасывает на диск все накопленные мутации и будит ожидающих."""
+        future = self._flush_future
+        if future is None:
+            return
+
+        self._flush_future = None
+        records, self._pending_records = self._pending_records, []
 
-    def _save_sync(self) -> None:
-        """Синхронная часть сохранения данных."""
         try:
-            with open(self.filename, 'w', encoding='utf-8') as f:
-                json.dump(self._data, f, ensure_ascii=False, indent=4)
-        except IOError as e:
-            logger.error(f"❌ Ошибка сохранения данных в {self.filename}: {e}")
+            if self._journal_enabled:
+                await self._append_journal(records)
+            else:
+                await self._save()
+        except Exception as e:
+            # Любая ошибка (не только ввода-вывода) должна разбудить ожидающих _commit
+            logger.error(f"❌ Ошибка сохранения данных в {self.snapshot_filename}: {e}")
+            # Незаписанные записи вернутся в следующий flush
+            self._pending_records[:0] = records
+            future.set_exception(e)
+        else:
+            future.set_result(None)
+
+    async def flush(self) -> None:
+        """
+        Немедленно сбрасывает накопленные изменения на диск, не дожидаясь окна.
+        Вызывается при завершении работы бота.
+        """
+        await self._flush()
+        if self._compaction_running():
+            await self._compaction_task
+
+    # --- Журнал мутаций ---
+
+    @staticmethod
+    def _validate(record: dict) -> None:
+        """Проверяет, что запись журнала применима (ValueError — нет), не меняя данных."""
+        op = record["op"]
+        if op == "add_booking":
+            int(record["user_id"])
+            cell_to_slot_id(record["cell"])
+            date_str_to_ordinal(record["date"])
+        elif op == "remove_booking":
+            cell_to_slot_id(record["cell"])
+
+    def _apply(self, record: dict) -> None:
+        """Применяет одну запись журнала к данным в памяти."""
+        op = record["op"]
+
+        if op == "add_user":
+            user_id = int(record["user_id"])
+            if user_id not in self._users:
+                self._put_user(user_id, None)
+
+        elif op == "set_name":
+            user_id = int(record["user_id"])
+            if user_id in self._users:
+                self._put_user(user_id, record["name"])
+
+        elif op == "add_booking":
+            user_id = int(record["user_id"])
+            slot_id = cell_to_slot_id(record["cell"])
+            date_ordinal = date_str_to_ordinal(record["date"])
+            if user_id not in self._users:
+                self._put_user(user_id, None)
+            self._link_booking(slot_id, user_id, date_ordinal)
+
+        elif op == "remove_booking":
+            self._unlink_booking(cell_to_slot_id(record["cell"]))
+
+        else:
+            raise KeyError(f"Неизвестная операция журнала: {op}")
+
+    def _put_user(self, user_id: int, name: Optional[str]) -> None:
+        """Создает пользователя или меняет его имя, поддерживая индекс имен."""
+        record = self._users.get(user_id)
+        if record is None:
+            record = self._users[user_id] = UserRecord(user_id)
+        elif record.name and self._name_index.get(name_key(record.name)) == user_id:
+            del self._name_index[name_key(record.name)]
+
+        record.name = name
+        if name:
+            self._name_index[name_key(name)] = user_id
+
+    def _link_booking(self, slot_id: int, user_id: int, date_ordinal: int) -> None:
+        """Записывает слот за пользователем, поддерживая индексы пользователей и дат."""
+        # Слот мог принадлежать другому пользователю или другой дате
+        self._unlink_booking(slot_id)
+        self._bookings[slot_id] = BookingRecord(slot_id, user_id, date_ordinal)
+        self._user_slots.setdefault(user_id, set()).add(slot_id)
+        if date_ordinal not in self._date_slots:
+            self._date_slots[date_ordinal] = set()
+            heapq.heappush(self._expiry_heap, date_ordinal)
+        self._date_slots[date_ordinal].add(slot_id)
+
+    def _unlink_booking(self, slot_id: int) -> None:
+        """Удаляет запись слота вместе с ее следами в индексах."""
+        booking = self._bookings.pop(slot_id, None)
+        if booking is None:
+            return
+
+        for index, key in ((self._user_slots, booking.user_id), (self._date_slots, booking.date_ordinal)):
+            bucket = index.get(key)
+            if bucket is not None:
+                bucket.discard(slot_id)
+                if not bucket:
+                    del index[key]
+
+    async def _append_journal(self, records: List[dict]) -> None:
+        """Дописывает пачку записей в журнал и при необходимости запускает компактизацию."""
+        payload = "".join(
+            json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n"
+            for record in records
+        )
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            written = await loop.run_in_executor(None, self._append_journal_sync, payload)
+            self._journal_size += written
+
+        if self._journal_size >= self._compact_threshold and not self._compaction_running():
+            self._compaction_task = asyncio.create_task(self._compact())
+
+    def _append_journal_sync(self, payload: str) -> int:
+        """Синхронная дозапись в журнал с fsync."""
+        data = payload.encode('utf-8')
+        with open(self.journal_filename, 'ab') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        return len(data)
+
+    def _compaction_running(self) -> bool:
+        return self._compaction_task is not None and not self._compaction_task.done()
+
+    async def _compact(self) -> None:
+        """Сворачивает журнал в новый снапшот и обрезает журнал."""
+        async with self._lock:
+            payload = self._serialize_snapshot()
+            loop = asyncio.get_running_loop()
+            try:
+                await loop.run_in_executor(None, self._compact_sync, payload)
+                logger.info(f"🗜️ Журнал ({self._journal_size} байт) свернут в снапшот {self.snapshot_filename}.")
+                self._journal_size = 0
+            except IOError as e:
+                logger.error(f"❌ Ошибка компактизации журнала {self.journal_filename}: {e}")
+
+    def _compact_sync(self, payload: bytes) -> None:
+        """Синхронная часть компактизации: атомарно пишет снапшот, затем обрезает журнал."""
+        write_atomic(self.snapshot_filename, payload)
+        # Журнал обрезается только после того, как снапшот гарантированно на диске
+        with open(self.journal_filename, 'wb') as f:
+            os.fsync(f.fileno())
 
 
     # --- Методы работы с пользователями (только читающие) ---
 
     def user_exists(self, user_id: int) -> bool:
         """Проверяет наличие пользователя в базе."""
-        return str(user_id) in self._data["users"]
+        return int(user_id) in self._users
     
     def get_user(self, user_id: int) -> Optional[dict]:
         """Возвращает данные пользователя."""
-        return self._data["users"].get(str(user_id))
+        record = self._users.get(int(user_id))
+        if record is None:
+            return None
+        return {"name": record.name, "points": self.get_user_bookings(user_id)}
     
     def get_users_count(self) -> int:
         """Возвращает количество пользователей."""
-        return len(self._data["users"])
+        return len(self._users)
     
     def is_name_taken(self, name: str) -> bool:
         """Проверяет, занято ли имя кем-то из пользователей."""
-        target_name = name.lower()
-        for user_data in self._data["users"].values():
-            existing_name = user_data.get("name")
-            if existing_name and existing_name.lower() == target_name:
-                return True
-        return False
+        return name_key(name) in self._name_index
 
     # --- Методы работы с пользователями (читающие и пишущие) ---
 
     async def add_user(self, user_id: int) -> None:
-        str_id = str(user_id)
-        if str_id not in self._data["users"]:
-            self._data["users"][str_id] = {
-                "name": None,
-                "points": {}
-            }
-            await self._save()
+        if int(user_id) not in self._users:
+            await self._commit({"op": "add_user", "user_id": str(user_id)})
 
     async def set_user_name(self, user_id: int, name: str) -> None:
         """Устанавливает имя пользователю."""
-        str_id = str(user_id)
-        if str_id in self._data["users"]:
-            self._data["users"][str_id]["name"] = name
-            await self._save()
+        if int(user_id) in self._users:
+            await self._commit({"op": "set_name", "user_id": str(user_id), "name": name})
 
     # --- Методы работы с записями (Bookings) (только читающие) ---
 
     def get_owner_by_cell(self, cell_address: str) -> Optional[str]:
         """Возвращает user_id владельца записи в ячейке."""
-        booking = self._data["global_map"].get(cell_address)
+        try:
+            booking = self._bookings.get(cell_to_slot_id(cell_address))
+        except ValueError:
+            return None
         if booking:
-            return booking["user_id"]
+            return str(booking.user_id)
         return None
     
     def get_user_bookings(self, user_id: int) -> Dict[str, str]:
         """Возвращает словарь {ячейка: дата} для пользователя."""
-        str_id = str(user_id)
-        if str_id in self._data["users"]:
-            return self._data["users"][str_id].get("points", {})
-        return {}
+        return {
+            slot_id_to_cell(slot_id): ordinal_to_date_str(self._bookings[slot_id].date_ordinal)
+            for slot_id in self._user_slots.get(int(user_id), ())
+        }
 
     # --- Методы работы с записями (Bookings) (читающие и пишущие) ---
 
     async def add_booking(self, user_id: int, cell_address: str, date: str) -> None:
         """
         Добавляет запись:
-        1. В global_map (чтобы знать, чья ячейка)
-        2. В points пользователя (чтобы он видел свои записи)
+        1. В глобальную карту слотов (чтобы знать, чья ячейка)
+        2. В индекс записей пользователя (чтобы он видел свои записи)
         """
-        str_id = str(user_id)
-        if str_id not in self._data["users"]:
-            await self.add_user(user_id)
-
-        # Добавляем в глобальную карту
-        self._data["global_map"][cell_address] = {
-            "user_id": str_id,
-            "date": date
-        }
-
-        # Добавляем пользователю
-        self._data["users"][str_id]["points"][cell_address] = date
-        
-        await self._save()
+        # Пользователь создается автоматически, если его еще нет
+        await self._commit({"op": "add_booking", "user_id": str(user_id), "cell": cell_address, "date": date})
         logger.info(f"Запись добавлена: User {user_id}, Cell {cell_address}, Date {date}")
 
     async def remove_booking(self, cell_address: str) -> None:
         """Удаляет запись по адресу ячейки у владельца и из карты."""
-        if cell_address not in self._data["global_map"]:
+        user_id = self.get_owner_by_cell(cell_address)
+        if user_id is None:
             return
 
-        booking_info = self._data["global_map"][cell_address]
-        user_id = booking_info["user_id"]
-
-        # Удаляем из глобальной карты
-        del self._data["global_map"][cell_address]
-
-        # Удаляем у пользователя
-        if user_id in self._data["users"]:
-            if cell_address in self._data["users"][user_id]["points"]:
-                del self._data["users"][user_id]["points"][cell_address]
-
-        await self._save()
+        # Удаляем из глобальной карты и у пользователя
+        await self._commit({"op": "remove_booking", "cell": cell_address})
         logger.info(f"Запись удалена: Cell {cell_address}, User {user_id}")
 
     async def sync_user_bookings(self, user_id: int, table_data: List[List[str]]) -> Dict[str, str]:
@@ -180,56 +519,65 @@ class UserStorage:
         Синхронизирует локальные данные пользователя с состоянием Google Таблицы.
         Удаляет просроченные записи или те, что были изменены в таблице вручную.
         """
-        str_id = str(user_id)
-        if str_id not in self._data["users"]:
+        user = self.get_user(user_id)
+        if user is None:
             return {}
 
-        user_points = self._data["users"][str_id].get("points", {}).copy() # Копия для итерации
-        user_name = self._data["users"][str_id].get("name")
-        
-        cells_to_remove = []
+        # Просроченные записи снимаются по индексу дат (обычно пусто и O(1)),
+        # по таблице проверяются только оставшиеся записи пользователя
+        expired_cells = self._collect_expired()
+        active_points = {cell: d for cell, d in user["points"].items() if cell not in expired_cells}
+        ghost_cells = find_ghost_cells(user["name"], active_points, table_data)
 
-        for cell_address, date_str in user_points.items():
-            # 1. Проверка даты (Expired)
-            if is_date_expired(date_str):
-                cells_to_remove.append(cell_address)
-                continue
+        # Удаление накопленного одной фиксацией
+        if ghost_cells:
+            logger.info(f"Для пользователя {user_id} будут удалены призрачные записи: {ghost_cells}")
+        cells_to_remove = list(expired_cells) + ghost_cells
+        if cells_to_remove:
+            await self._commit(*({"op": "remove_booking", "cell": cell} for cell in cells_to_remove))
+            
+        # Актуальное состояние
+        return self.get_user_bookings(user_id)
 
-            # 2. Проверка соответствия таблице (Ghost Booking)
+    async def apply_sheet_changes(self, changes: Dict[str, str]) -> int:
+        """Применяет изменившиеся ячейки таблицы к записям владельцев одной фиксацией."""
+        records = []
+        for cell, value in changes.items():
             try:
-                row_idx, col_idx = cell_to_indices(cell_address)
-                
-                # Проверка выхода за границы
-                if row_idx >= len(table_data) or col_idx >= len(table_data[row_idx]):
-                    cells_to_remove.append(cell_address)
-                    continue
+                booking = self._bookings.get(cell_to_slot_id(cell))
+            except ValueError:
+                continue
+            if booking is None:
+                continue
 
-                cell_value = table_data[row_idx][col_idx]
-                
-                # Если ячейка пуста в таблице -> Ghost
-                if not cell_value or not cell_value.strip():
-                    cells_to_remove.append(cell_address)
-                    continue
-                
-                # Если в ячейке другое имя -> Ghost
-                parsed = parse_cell_content(cell_value)
-                if parsed and parsed.get("name"):
-                    if user_name and parsed["name"].lower() != user_name.lower():
-                        cells_to_remove.append(cell_address)
-                        continue
-                else:
-                    # Если мусор, который нельзя распарсить -> удаляем из брони пользователя
-                    cells_to_remove.append(cell_address)
-
-            except Exception as e:
-                logger.warning(f"Ошибка при синхронизации ячейки {cell_address}: {e}")
+            owner = self._users[booking.user_id]
+            new_date = resolve_sheet_change(owner.name, ordinal_to_date_str(booking.date_ordinal), value)
+            if new_date is None:
                 continue
 
-        # Удаление накопленного
-        if cells_to_remove:
-            logger.info(f"Для пользователя {user_id} будут удалены призрачные записи: {cells_to_remove}")
-            for cell in cells_to_remove:
-                await self.remove_booking(cell)
-            
-        # Актуальное состояние
-        return self._data["users"][str_id].get("points", {})
+            if new_date:
+                record = {"op": "add_booking", "user_id": str(booking.user_id), "cell": cell, "date": new_date}
+            else:
+                record = {"op": "remove_booking", "cell": cell}
+            records.append(record)
+
+        if records:
+            logger.info(f"Сверка с таблицей: обновлено записей {len(records)}")
+            await self._commit(*records)
+        return len(records)
+
+    def _collect_expired(self) -> Set[str]:
+        """Снимает с вершины кучи все прошедшие даты и возвращает их ячейки."""
+        today_ordinal = date.today().toordinal()
+        expired_cells = set()
+        while self._expiry_heap and self._expiry_heap[0] < today_ordinal:
+            date_ordinal = heapq.heappop(self._expiry_heap)
+            expired_cells.update(slot_id_to_cell(slot_id) for slot_id in self._date_slots.get(date_ordinal, ()))
+        return expired_cells
+
+    async def purge_expired(self) -> int:
+        """Удаляет все записи на прошедшие даты одной фиксацией."""
+        expired_cells = self._collect_expired()
+        if expired_cells:
+            await self._commit(*({"op": "remove_booking", "cell": cell} for cell in expired_cells))
+        return len(expired_cells)
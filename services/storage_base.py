@@ -0,0 +1,240 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from utils.date_helpers import parse_cell_content, resolve_booking_date
+from utils.helpers import cell_to_indices
+
+logger = logging.getLogger(__name__)
+
+
+class BaseUserStorage(ABC):
+    """
+    Интерфейс хранилища пользователей и бронирований.
+
+    Читающие методы синхронные (используются в фильтрах и хендлерах без await),
+    пишущие — асинхронные и возвращают управление только после сохранения данных.
+    """
+
+    @abstractmethod
+    async def load(self) -> None:
+        """Загружает данные. Должна вызываться один раз при старте приложения."""
+
+    @abstractmethod
+    async def flush(self) -> None:
+        """Сбрасывает все накопленные изменения в постоянное хранилище."""
+
+    async def close(self) -> None:
+        """Освобождает ресурсы хранилища при завершении работы."""
+        await self.flush()
+
+    # --- Методы работы с пользователями (только читающие) ---
+
+    @abstractmethod
+    def user_exists(self, user_id: int) -> bool:
+        """Проверяет наличие пользователя в базе."""
+
+    @abstractmethod
+    def get_user(self, user_id: int) -> Optional[dict]:
+        """Возвращает данные пользователя в виде {"name": ..., "points": {...}}."""
+
+    @abstractmethod
+    def get_users_count(self) -> int:
+        """Возвращает количество пользователей."""
+
+    @abstractmethod
+    def is_name_taken(self, name: str) -> bool:
+        """Проверяет, занято ли имя кем-то из пользователей."""
+
+    # --- Методы работы с пользователями (читающие и пишущие) ---
+
+    @abstractmethod
+    async def add_user(self, user_id: int) -> None:
+        """Добавляет пользователя без имени, если его еще нет."""
+
+    @abstractmethod
+    async def set_user_name(self, user_id: int, name: str) -> None:
+        """Устанавливает имя пользователю."""
+
+    # --- Методы работы с записями (Bookings) (только читающие) ---
+
+    @abstractmethod
+    def get_owner_by_cell(self, cell_address: str) -> Optional[str]:
+        """Возвращает user_id владельца записи в ячейке."""
+
+    @abstractmethod
+    def get_user_bookings(self, user_id: int) -> Dict[str, str]:
+        """Возвращает словарь {ячейка: дата} для пользователя."""
+
+    # --- Методы работы с записями (Bookings) (читающие и пишущие) ---
+
+    @abstractmethod
+    async def add_booking(self, user_id: int, cell_address: str, date: str) -> None:
+        """Добавляет запись пользователю и в глобальную карту ячеек."""
+
+    @abstractmethod
+    async def remove_booking(self, cell_address: str) -> None:
+        """Удаляет запись по адресу ячейки у владельца и из карты."""
+
+    @abstractmethod
+    async def sync_user_bookings(self, user_id: int, table_data: List[List[str]]) -> Dict[str, str]:
+        """
+        Синхронизирует локальные данные пользователя с состоянием Google Таблицы.
+        Возвращает актуальный словарь {ячейка: дата} пользователя.
+        """
+
+    @abstractmethod
+    async def apply_sheet_changes(self, changes: Dict[str, str]) -> int:
+        """
+        Применяет изменившиеся ячейки таблицы к записям всех пользователей одной фиксацией.
+
+        Запись владельца удаляется, если ячейка стала пустой, нечитаемой или занята
+        другим именем; если имя совпадает, а дата в ячейке другая — дата обновляется.
+
+        Args:
+            changes: Словарь {ячейка: новое содержимое} только по изменившимся ячейкам.
+
+        Returns:
+            int: Количество затронутых записей.
+        """
+
+    @abstractmethod
+    async def purge_expired(self) -> int:
+        """
+        Удаляет все записи на прошедшие даты одной фиксацией.
+        Возвращает количество удаленных записей.
+        """
+
+    async def run_expiry_purger(self, interval: float) -> None:
+        """
+        Фоновая задача: периодически удаляет просроченные записи.
+
+        Args:
+            interval: Пауза между проходами в секундах.
+        """
+        while True:
+            try:
+                removed = await self.purge_expired()
+                if removed:
+                    logger.info(f"🧹 Удалено просроченных записей: {removed}")
+            except Exception as e:
+                logger.error(f"❌ Ошибка фоновой очистки просроченных записей: {e}")
+            await asyncio.sleep(interval)
+
+
+def name_key(name: str) -> str:
+    """Ключ имени для регистронезависимого сравнения и индексов."""
+    return name.casefold()
+
+
+def normalize_storage_data(raw_data: dict) -> dict:
+    """
+    Приводит сырые данные JSON-файла к текущему формату {"users": ..., "global_map": ...}.
+
+    Старый формат хранил только словарь пользователей без глобальной карты ячеек.
+
+    Args:
+        raw_data: Содержимое JSON-файла хранилища.
+
+    Returns:
+        dict: Данные в текущем формате.
+    """
+    if "users" in raw_data and "global_map" in raw_data:
+        return raw_data
+
+    logger.info("Обнаружен старый формат базы. Проводится миграция...")
+    for user_data in raw_data.values():
+        user_data.setdefault("points", {})
+    return {"users": raw_data, "global_map": {}}
+
+
+def is_ghost_value(user_key: Optional[str], cell_value: Optional[str]) -> bool:
+    """
+    Проверяет, что содержимое ячейки больше не подтверждает запись пользователя.
+
+    Args:
+        user_key: name_key имени владельца записи (None, если имя не задано).
+        cell_value: Текущее содержимое ячейки в таблице.
+
+    Returns:
+        bool: True, если ячейка пуста, не распознается (в том числе из-за
+        несуществующей даты) или содержит другое имя.
+    """
+    # Если ячейка пуста в таблице -> Ghost
+    if not cell_value or not cell_value.strip():
+        return True
+
+    # Если мусор, который нельзя распарсить -> удаляем из брони пользователя
+    parsed = parse_cell_content(cell_value)
+    if not parsed or not parsed.get("name"):
+        return True
+
+    # Дата, набранная вручную, может не существовать (например, "45.13")
+    try:
+        resolve_booking_date(parsed["date"])
+    except ValueError:
+        return True
+
+    # Если в ячейке другое имя -> Ghost
+    return bool(user_key) and name_key(parsed["name"]) != user_key
+
+
+def resolve_sheet_change(owner_name: Optional[str], booked_date: str, cell_value: str) -> Optional[str]:
+    """
+    Определяет, что сделать с записью владельца после изменения ячейки.
+
+    Args:
+        owner_name: Имя владельца записи.
+        booked_date: Дата записи в хранилище.
+        cell_value: Новое содержимое ячейки.
+
+    Returns:
+        Optional[str]: None — запись актуальна; "" — запись нужно удалить;
+        иначе — новая дата записи.
+    """
+    if is_ghost_value(name_key(owner_name) if owner_name else None, cell_value):
+        return ""
+
+    day, month = map(int, parse_cell_content(cell_value)["date"].split('.'))
+    new_date = f"{day:02d}.{month:02d}"
+    return new_date if new_date != booked_date else None
+
+
+def find_ghost_cells(user_name: Optional[str], points: Dict[str, str], table_data: List[List[str]]) -> List[str]:
+    """
+    Находит записи пользователя, которые больше не соответствуют таблице.
+
+    Запись считается призрачной, если ячейка пуста, в ней записано другое имя
+    или содержимое не удается распознать. Просроченные записи здесь не проверяются:
+    их удаляет purge_expired хранилища.
+
+    Args:
+        user_name: Текущее имя пользователя.
+        points: Словарь {ячейка: дата} пользователя.
+        table_data: Двумерный массив строк из таблицы.
+
+    Returns:
+        List[str]: Адреса ячеек, которые нужно удалить у пользователя.
+    """
+    cells_to_remove = []
+    user_key = name_key(user_name) if user_name else None
+
+    for cell_address in points:
+        # Проверка соответствия таблице (Ghost Booking)
+        try:
+            row_idx, col_idx = cell_to_indices(cell_address)
+
+            # Проверка выхода за границы
+            if row_idx >= len(table_data) or col_idx >= len(table_data[row_idx]):
+                cells_to_remove.append(cell_address)
+                continue
+
+            if is_ghost_value(user_key, table_data[row_idx][col_idx]):
+                cells_to_remove.append(cell_address)
+
+        except Exception as e:
+            logger.warning(f"Ошибка при синхронизации ячейки {cell_address}: {e}")
+            continue
+
+    return cells_to_remove
@@ -0,0 +1,24 @@
+class UserRecord:
+    """Пользователь в памяти хранилища."""
+
+    __slots__ = ("user_id", "name")
+
+    def __init__(self, user_id: int, name: str | None = None):
+        self.user_id = user_id
+        self.name = name
+
+
+class BookingRecord:
+    """
+    Запись на слот в памяти хранилища.
+
+    slot_id — закодированный адрес ячейки (utils.helpers.cell_to_slot_id),
+    date_ordinal — порядковый номер дня (date.toordinal).
+    """
+
+    __slots__ = ("slot_id", "user_id", "date_ordinal")
+
+    def __init__(self, slot_id: int, user_id: int, date_ordinal: int):
+        self.slot_id = slot_id
+        self.user_id = user_id
+        self.date_ordinal = date_ordinal
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+from typing import Callable, List, Optional, Set, Tuple
+
+from services.circuit_breaker import CircuitOpenError
+from services.deadlines import SheetsTimeoutError, run_with_deadline, sheets_deadline, with_sheets_deadline
+from services.google_sheets import GoogleSheetsService
+
+logger = logging.getLogger(__name__)
+
+
+class SheetWriteCoalescer:
+    """
+    Объединяет одиночные записи в ячейки в один запрос batchUpdate.
+
+    Записи, поступившие в течение короткого окна, отправляются одним вызовом
+    GoogleSheetsService.batch_update_values. Каждый вызывающий получает свой
+    результат: если пакетный запрос не прошел, операции повторяются по одной,
+    чтобы ошибка одной ячейки не отменяла остальные.
+
+    Блокировки ячеек остаются на стороне вызывающего: запись держит лок ячейки,
+    пока ждет результата, поэтому двойное бронирование по-прежнему исключено.
+    Пакет отправляется вне дедлайна отдельного вызывающего (его ограничивает
+    таймаут записи клиента), а каждый вызывающий ждет результат не дольше своего дедлайна.
+    Запись, вызывающий которой не дождался дедлайна, в таблицу уже не отправляется:
+    он отпустил лок ячейки и сообщил пользователю об ошибке.
+    """
+
+    def __init__(
+        self,
+        gs_service: GoogleSheetsService,
+        sheet_name: str,
+        window: float = 0.05,
+        max_batch: int = 50,
+        version_stamp: Optional[Callable[[], Optional[Tuple[str, str]]]] = None,
+    ):
+        """
+        Args:
+            gs_service: Инстанс сервиса Google Sheets.
+            sheet_name: Имя листа в таблице.
+            window: Окно накопления записей в секундах; 0 — запись сразу, без пакетов.
+            max_batch: Максимальное количество операций в одном пакете.
+            version_stamp: Функция, возвращающая (ячейка, значение) счетчика версии
+                таблицы, который записывается в каждом пакете, или None.
+        """
+        self.gs = gs_service
+        self.sheet_name = sheet_name
+        self._window = window
+        self._max_batch = max_batch
+        self._version_stamp = version_stamp
+
+        self._pending: List[Tuple[str, str, asyncio.Future]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._send_tasks: Set[asyncio.Task] = set()
+
+    async def write(self, cell_address: str, value: str) -> bool:
+        """
+        Записывает значение в ячейку в составе ближайшего пакета.
+
+        Returns:
+            bool: True, если запись этой ячейки прошла успешно.
+
+        Raises:
+            SheetsTimeoutError: Если запись не подтвердилась до дедлайна.
+            CircuitOpenError: Если API недоступен (выключатель разомкнут).
+        """
+        if self._window <= 0 and self._version_stamp is None:
+            return await self.gs.write_value(self.sheet_name, cell_address, value)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((cell_address, value, future))
+
+        if self._window <= 0:
+            # Без окна, но со счетчиком версии: пакет из одной записи и счетчика
+            await self._send(self._take_batch())
+        elif len(self._pending) >= self._max_batch:
+            self._send_now()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._flush_after_window())
+
+        # По дедлайну future отменяется: еще не отправленная запись выпадает из пакета,
+        # а итог уже отправленной неизвестен (ее подтвердит или отменит проверка после записи)
+        return await run_with_deadline(future)
+
+    async def clear(self, cell_address: str) -> bool:
+        """Очищает ячейку (запись пустой строки) в составе ближайшего пакета."""
+        return await self.write(cell_address, "")
+
+    async def flush(self) -> None:
+        """Немедленно отправляет накопленные записи и дожидается результата."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self._send(self._take_batch())
+        if self._send_tasks:
+            await asyncio.gather(*self._send_tasks, return_exceptions=True)
+
+    @with_sheets_deadline(None, detach=True)
+    async def _flush_after_window(self) -> None:
+        """Отправляет пакет по истечении окна накопления."""
+        await asyncio.sleep(self._window)
+        self._flush_task = None
+        await self._send(self._take_batch())
+
+    def _send_now(self) -> None:
+        """Отправляет заполненный пакет, не дожидаясь окна."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        with sheets_deadline(None, detach=True):
+            task = asyncio.create_task(self._send(self._take_batch()))
+        self._send_tasks.add(task)
+        task.add_done_callback(self._send_tasks.discard)
+
+    def _take_batch(self) -> List[Tuple[str, str, asyncio.Future]]:
+        batch, self._pending = self._pending, []
+        return batch
+
+    async def _send(self, batch: List[Tuple[str, str, asyncio.Future]]) -> None:
+        """Отправляет пакет одним запросом, при неудаче — по одной операции."""
+        # Вызывающие, отменившие ожидание по дедлайну, уже отпустили лок ячейки
+        batch = [entry for entry in batch if not entry[2].cancelled()]
+        if not batch:
+            return
+
+        updates = [{'range': cell, 'values': [[value]]} for cell, value, _ in batch]
+        stamp = self._version_stamp() if self._version_stamp else None
+        if stamp:
+            updates.append({'range': stamp[0], 'values': [[stamp[1]]]})
+        try:
+            success = await self.gs.batch_update_values(self.sheet_name, updates)
+        except (SheetsTimeoutError, CircuitOpenError) as e:
+            # API не отвечает: повтор по одной ячейке только продлил бы ожидание
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except Exception as e:
+            logger.error(f"❌ Ошибка пакетной записи ({len(batch)} ячеек): {e}")
+            success = False
+
+        if success:
+            logger.info(f"📦 Пакетная запись: {len(batch)} ячеек одним запросом")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_result(True)
+            return
+
+        # Пакет отклонен целиком: повторяем операции по одной
+        logger.warning(f"⚠️ Пакетная запись не удалась, повтор по одной ячейке ({len(batch)})")
+        for cell, value, future in batch:
+            if future.cancelled():
+                continue
+            try:
+                result = await self.gs.write_value(self.sheet_name, cell, value)
+            except (SheetsTimeoutError, CircuitOpenError) as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            except Exception as e:
+                logger.error(f"❌ Ошибка записи ячейки {cell}: {e}")
+                result = False
+            if not future.done():
+                future.set_result(result)
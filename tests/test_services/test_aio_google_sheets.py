@@ -0,0 +1,144 @@
+import json
+
+import pytest
+import rsa
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from services.aio_google_sheets import AioGoogleSheetsService, SheetsApiError
+
+
+@pytest.fixture
+async def sheets_api():
+    """Локальный сервер, имитирующий эндпоинты токенов и Sheets v4."""
+    state = {"cells": {"Sheet1!B2": "Иван 20.05"}, "token_requests": 0, "expire_next": False, "bad_gateway": 0}
+
+    async def token(request):
+        form = await request.post()
+        assert form["grant_type"] == "urn:ietf:params:oauth:grant-type:jwt-bearer"
+        state["token_requests"] += 1
+        return web.json_response({"access_token": f"token-{state['token_requests']}", "expires_in": 3600})
+
+    def authorized(request):
+        expected = f"Bearer token-{state['token_requests']}"
+        if state["expire_next"]:
+            state["expire_next"] = False
+            return False
+        return request.headers.get("Authorization") == expected
+
+    async def get_values(request):
+        if not authorized(request):
+            return web.json_response({"error": {"message": "unauthorized"}}, status=401)
+        if state["bad_gateway"]:
+            # Балансировщик отвечает HTML-страницей, а не JSON
+            state["bad_gateway"] -= 1
+            return web.Response(text="<html><body>502 Bad Gateway</body></html>", status=502, content_type="text/html")
+        range_name = request.match_info["range"]
+        if range_name not in state["cells"]:
+            return web.json_response({"error": {"message": "bad range"}}, status=400)
+        return web.json_response({"values": [[state["cells"][range_name]]]})
+
+    async def put_values(request):
+        body = await request.json()
+        assert request.query["valueInputOption"] == "RAW"
+        state["cells"][request.match_info["range"]] = body["values"][0][0]
+        return web.json_response({})
+
+    async def batch_update(request):
+        body = await request.json()
+        for item in body["data"]:
+            state["cells"][item["range"]] = item["values"][0][0]
+        return web.json_response({})
+
+    async def batch_get(request):
+        value_ranges = [
+            {"range": name, "values": [[state["cells"][name]]]} if name in state["cells"] else {"range": name}
+            for name in request.query.getall("ranges")
+        ]
+        return web.json_response({"valueRanges": value_ranges})
+
+    app = web.Application()
+    app.router.add_post("/token", token)
+    app.router.add_get("/sheets/sheet-id/values:batchGet", batch_get)
+    app.router.add_get("/sheets/sheet-id/values/{range}", get_values)
+    app.router.add_put("/sheets/sheet-id/values/{range}", put_values)
+    app.router.add_post("/sheets/sheet-id/values:batchUpdate", batch_update)
+
+    server = TestServer(app)
+    await server.start_server()
+    yield server, state
+    await server.close()
+
+
+@pytest.fixture
+def credentials_file(tmp_path, sheets_api):
+    server, _ = sheets_api
+    _, private_key = rsa.newkeys(512)
+    path = tmp_path / "service_account.json"
+    path.write_text(json.dumps({
+        "client_email": "bot@example.iam.gserviceaccount.com",
+        "private_key": private_key.save_pkcs1().decode(),
+        "token_uri": str(server.make_url("/token")),
+    }))
+    return str(path)
+
+
+@pytest.fixture
+async def gs(sheets_api, credentials_file):
+    server, _ = sheets_api
+    service = AioGoogleSheetsService("sheet-id", credentials_file, base_url=str(server.make_url("/sheets")))
+    yield service
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_read_and_write_reuse_token(gs, sheets_api):
+    _, state = sheets_api
+
+    assert await gs.get_data("Sheet1", "B2") == [["Иван 20.05"]]
+    assert await gs.write_value("Sheet1", "D3", "Анна 21.05") is True
+    assert await gs.batch_update_values("Sheet1", [{'range': "F4", 'values': [["Ира 22.05"]]}]) is True
+
+    assert state["cells"]["Sheet1!D3"] == "Анна 21.05"
+    assert state["cells"]["Sheet1!F4"] == "Ира 22.05"
+    assert state["token_requests"] == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_token_is_refreshed_once(gs, sheets_api):
+    _, state = sheets_api
+    await gs.get_data("Sheet1", "B2")
+
+    state["expire_next"] = True
+    assert await gs.get_data("Sheet1", "B2") == [["Иван 20.05"]]
+    assert state["token_requests"] == 2
+
+
+@pytest.mark.asyncio
+async def test_api_error_raises_on_read(gs):
+    with pytest.raises(SheetsApiError) as exc_info:
+        await gs.get_data("Sheet1", "Z99")
+    assert exc_info.value.status == 400
+
+
+@pytest.mark.asyncio
+async def test_batch_get_reads_ranges_in_one_call(gs):
+    assert await gs.batch_get("Sheet1", ["B2", "D3"]) == {"B2": [["Иван 20.05"]], "D3": []}
+    assert gs.get_stats()["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_html_error_page_is_retried(sheets_api, credentials_file):
+    server, state = sheets_api
+    gs = AioGoogleSheetsService("sheet-id", credentials_file, base_url=str(server.make_url("/sheets")), backoff_base=0)
+    state["bad_gateway"] = 1
+    try:
+        assert await gs.get_data("Sheet1", "B2") == [["Иван 20.05"]]
+
+        state["bad_gateway"] = 10
+        with pytest.raises(SheetsApiError) as exc_info:
+            await gs.get_data("Sheet1", "B2")
+        assert exc_info.value.status == 502
+        assert "Bad Gateway" in exc_info.value.message
+    finally:
+        await gs.close()
@@ -1,6 +1,12 @@
+import asyncio
 import pytest
 from unittest.mock import AsyncMock, MagicMock
-from services.booking_service import BookingService
+from services.booking_service import (
+    OUTBOX_QUEUED_MESSAGE, SHEETS_TIMEOUT_MESSAGE, SHEETS_UNAVAILABLE_MESSAGE, BookingService, Freshness
+)
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError
+from services.deadlines import SheetsTimeoutError
+from services.outbox import OutboxOperation, WriteOutbox
 # from datetime import datetime
 
 @pytest.fixture
@@ -39,7 +45,7 @@ async def test_get_table_data_uses_cache(booking_service, mock_gs):
 @pytest.mark.asyncio
 async def test_book_slot_occupied_error(booking_service, mock_gs):
     # Имитируем, что ячейка уже занята кем-то другим на ту же дату
-    mock_gs.get_data.return_value = [["Иван 20.05"]]
+    mock_gs.get_data.return_value = [["", ""], ["", "Иван 20.05"]]
     
     success, message = await booking_service.book_slot(
         user_id=123, day="Пн", time_slot="8:00-9:00", target_date="20.05"
@@ -62,3 +68,344 @@ async def test_book_slot_success(booking_service, mock_gs, mock_storage):
     
     assert success is True
     mock_storage.add_booking.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_get_table_data_serves_stale_and_revalidates(booking_service, mock_gs):
+    mock_gs.get_data.return_value = [["old"]]
+    await booking_service.get_table_data()
+
+    # Кэш старше TTL, но моложе max_staleness
+    booking_service._cache_timestamp -= 120
+    mock_gs.get_data.return_value = [["new"]]
+
+    assert await booking_service.get_table_data() == [["old"]]
+    assert await booking_service.get_table_data() == [["old"]]
+
+    # Фоновое обновление запускается один раз
+    await booking_service._revalidate_task
+    assert mock_gs.get_data.call_count == 2
+    assert await booking_service.get_table_data() == [["new"]]
+    assert booking_service.cache_age < 60
+
+@pytest.mark.asyncio
+async def test_get_table_data_blocks_beyond_max_staleness(booking_service, mock_gs):
+    mock_gs.get_data.return_value = [["old"]]
+    await booking_service.get_table_data()
+
+    booking_service._cache_timestamp -= 1000
+    mock_gs.get_data.return_value = [["new"]]
+
+    assert await booking_service.get_table_data() == [["new"]]
+
+@pytest.mark.asyncio
+async def test_get_table_data_fresh_bypasses_cache(booking_service, mock_gs):
+    mock_gs.get_data.return_value = [["data"]]
+    await booking_service.get_table_data()
+    await booking_service.get_table_data(Freshness.FRESH)
+
+    assert mock_gs.get_data.call_count == 2
+
+@pytest.mark.asyncio
+async def test_book_slot_patches_cache_instead_of_refetch(booking_service, mock_gs):
+    mock_gs.get_data.return_value = [["", ""], ["", ""]]
+    mock_gs.write_value.return_value = True
+    await booking_service.get_table_data()
+    version = booking_service.cache_version
+
+    success, _ = await booking_service.book_slot(
+        user_id=123, day="Пн", time_slot="8:00-9:00", target_date="20.05"
+    )
+    table_data = await booking_service.get_table_data()
+
+    assert success is True
+    # Проверка ячейки перед записью использует свежий кэш, повторной загрузки нет
+    assert mock_gs.get_data.call_count == 1
+    assert table_data[1][1] == "Алексей 20.05"
+    assert booking_service.cache_version == version + 1
+    assert booking_service.written_since("B2", 0)
+
+@pytest.mark.asyncio
+async def test_book_slot_precheck_shares_one_snapshot(booking_service, mock_gs):
+    mock_gs.get_data.return_value = [["", "", "", ""], ["", "", "", ""]]
+    mock_gs.write_value.return_value = True
+
+    results = await asyncio.gather(
+        booking_service.book_slot(user_id=1, day="Пн", time_slot="8:00-9:00", target_date="20.05"),
+        booking_service.book_slot(user_id=2, day="Вт", time_slot="8:00-9:00", target_date="21.05"),
+    )
+
+    assert all(success for success, _ in results)
+    mock_gs.get_data.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_book_slot_rereads_cell_when_snapshot_is_old(mock_gs, mock_storage):
+    service = BookingService(
+        gs_service=mock_gs, user_storage=mock_storage, sheet_name="Sheet1", precheck_cell_age=0
+    )
+    # По снимку ячейка свободна, но после него ее заняли вручную
+    mock_gs.get_data.side_effect = [[["", ""], ["", ""]], [["Иван 20.05"]]]
+
+    success, message = await service.book_slot(
+        user_id=123, day="Пн", time_slot="8:00-9:00", target_date="20.05"
+    )
+
+    assert success is False
+    assert "Занято" in message
+    assert mock_gs.get_data.call_args.args == ("Sheet1", "B2")
+    mock_gs.write_value.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_book_slot_verification_drops_overwritten_booking(mock_gs, mock_storage):
+    service = BookingService(
+        gs_service=mock_gs, user_storage=mock_storage, sheet_name="Sheet1", verify_delay=0
+    )
+    mock_gs.get_data.return_value = [["", ""], ["", ""]]
+    mock_gs.write_value.return_value = True
+
+    success, _ = await service.book_slot(user_id=123, day="Пн", time_slot="8:00-9:00", target_date="20.05")
+    # Ячейку перезаписали вручную сразу после бронирования
+    mock_gs.get_data.return_value = [["", ""], ["", "Иван 20.05"]]
+    await service._verify_task
+
+    assert success is True
+    mock_storage.apply_sheet_changes.assert_called_once_with({"B2": "Иван 20.05"})
+
+@pytest.mark.asyncio
+async def test_cells_written_during_verification_are_verified(mock_gs, mock_storage):
+    service = BookingService(
+        gs_service=mock_gs, user_storage=mock_storage, sheet_name="Sheet1", verify_delay=0
+    )
+    grid = [["", "", "", ""], ["", "Алексей 20.05", "", ""]]
+
+    async def read_during_write(sheet_name, range_a1):
+        if mock_gs.get_data.call_count == 1:
+            # Пока идет первый проход, бот записывает D2, которую затем перезаписывают вручную
+            service._schedule_verification("D2", "Ира 21.05")
+            return [list(row) for row in grid]
+        return [["", "", "", ""], ["", "Алексей 20.05", "", "Иван 21.05"]]
+
+    mock_gs.get_data.side_effect = read_during_write
+    service._schedule_verification("B2", "Алексей 20.05")
+    await service._verify_task
+
+    assert mock_gs.get_data.call_count == 2
+    mock_storage.apply_sheet_changes.assert_called_once_with({"D2": "Иван 21.05"})
+
+@pytest.mark.asyncio
+async def test_rename_bookings_rewrites_cells_and_name(booking_service, mock_gs, mock_storage):
+    mock_gs.get_data.return_value = [["", ""], ["", "Алексей 20.05"]]
+    mock_gs.batch_update_values.return_value = True
+    mock_storage.sync_user_bookings.return_value = {"B2": "20.05"}
+    mock_storage.get_user_bookings = MagicMock(return_value={"B2": "20.05"})
+
+    success, updated, _ = await booking_service.rename_bookings(123, "Лёша")
+
+    assert success is True
+    assert updated == 1
+    mock_gs.batch_update_values.assert_called_once_with("Sheet1", [{'range': "B2", 'values': [["Лёша 20.05"]]}])
+    mock_storage.set_user_name.assert_called_once_with(123, "Лёша")
+    assert (await booking_service.get_table_data())[1][1] == "Лёша 20.05"
+    assert booking_service.get_lock_stats()["B2"]["acquisitions"] == 1
+
+@pytest.fixture
+def versioned_service(mock_gs, mock_storage):
+    sheet = {"P1": [["5"]], "A1:N9": [["", ""], ["", ""]]}
+    mock_gs.get_data.side_effect = lambda sheet_name, range_a1: sheet[range_a1]
+    mock_gs.batch_get.side_effect = lambda sheet_name, ranges: {r: sheet[r] for r in ranges}
+    mock_gs.batch_update_values.return_value = True
+    service = BookingService(
+        gs_service=mock_gs, user_storage=mock_storage, sheet_name="Sheet1", version_cell="P1"
+    )
+    return service, sheet
+
+def _grid_reads(mock_gs) -> int:
+    # Сетка и счетчик читаются одним batchGet; get_data — только опрос счетчика
+    assert all(call.args[1] == "P1" for call in mock_gs.get_data.call_args_list)
+    return mock_gs.batch_get.call_count
+
+@pytest.mark.asyncio
+async def test_version_poll_skips_full_read_when_unchanged(versioned_service, mock_gs):
+    service, sheet = versioned_service
+    await service.get_table_data()
+    assert _grid_reads(mock_gs) == 1
+
+    # TTL истек, счетчик не менялся: читается только P1
+    service._cache_timestamp -= 120
+    await service.get_table_data()
+    await service._revalidate_task
+    assert _grid_reads(mock_gs) == 1
+    assert service.cache_age < 60
+
+    # Счетчик сдвинулся: сетка загружается целиком
+    sheet["P1"] = [["6"]]
+    sheet["A1:N9"] = [["", ""], ["", "Иван 20.05"]]
+    service._cache_timestamp -= 120
+    await service.get_table_data()
+    await service._revalidate_task
+    assert _grid_reads(mock_gs) == 2
+    assert (await service.get_table_data())[1][1] == "Иван 20.05"
+
+@pytest.mark.asyncio
+async def test_bot_write_bumps_version_cell(versioned_service, mock_gs):
+    service, _ = versioned_service
+
+    success, _ = await service.book_slot(user_id=123, day="Пн", time_slot="8:00-9:00", target_date="20.05")
+
+    assert success is True
+    mock_gs.batch_update_values.assert_called_once_with("Sheet1", [
+        {'range': "B2", 'values': [["Алексей 20.05"]]},
+        {'range': "P1", 'values': [["6"]]},
+    ])
+    mock_gs.write_value.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_free_slots_reads_only_day_column(booking_service, mock_gs):
+    mock_gs.get_data.return_value = [["Иван 20.05"], [""]]
+
+    free_slots = await booking_service.get_free_slots_for_day("Пн", "20.05")
+
+    mock_gs.get_data.assert_called_once_with("Sheet1", "B2:B9")
+    assert "8:00-9:00" not in free_slots
+    assert "10:00-11:00" in free_slots
+
+
+@pytest.mark.asyncio
+async def test_free_slots_refreshes_only_stale_column(booking_service, mock_gs):
+    mock_gs.get_data.return_value = [[""] * 14 for _ in range(9)]
+    await booking_service.get_table_data()
+
+    # Вся сетка свежая: колонки берутся из кэша
+    await booking_service.get_free_slots_for_day("Пн", "20.05")
+    assert mock_gs.get_data.call_count == 1
+
+    # Сетка устарела: загружается только колонка выбранного дня, и только один раз
+    booking_service._cache_timestamp -= 120
+    mock_gs.get_data.return_value = [["Анна 20.05"]]
+    assert "8:00-9:00" not in await booking_service.get_free_slots_for_day("Ср", "20.05")
+    await booking_service.get_free_slots_for_day("Ср", "20.05")
+
+    assert mock_gs.get_data.call_count == 2
+    mock_gs.get_data.assert_called_with("Sheet1", "F2:F9")
+    assert booking_service._cache_data[1][5] == "Анна 20.05"
+
+
+@pytest.mark.asyncio
+async def test_book_slot_reports_sheets_timeout(booking_service, mock_gs, mock_storage):
+    mock_gs.get_data.return_value = [[""]]
+    mock_gs.write_value.side_effect = SheetsTimeoutError("timeout")
+
+    success, message = await booking_service.book_slot(
+        user_id=123, day="Пн", time_slot="8:00-9:00", target_date="20.05"
+    )
+
+    assert success is False
+    assert message == SHEETS_TIMEOUT_MESSAGE
+    mock_storage.add_booking.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_serves_snapshot_with_timestamp(mock_gs, mock_storage):
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    service = BookingService(mock_gs, mock_storage, "Sheet1", cache_ttl=60, circuit_breaker=breaker)
+    mock_gs.get_data.return_value = [["data"]]
+    await service.get_table_data()
+    assert service.data_as_of is None
+
+    breaker.record_failure()
+    mock_gs.get_data.side_effect = CircuitOpenError("open")
+    mock_gs.write_value.side_effect = CircuitOpenError("open")
+
+    assert await service.get_table_data() == [["data"]]
+    assert mock_gs.get_data.call_count == 1
+    # Требование свежих данных не подменяется снимком
+    with pytest.raises(CircuitOpenError):
+        await service.get_table_data(Freshness.FRESH)
+    assert service.data_as_of == service._cache_timestamp
+
+    success, message = await service.book_slot(
+        user_id=123, day="Пн", time_slot="8:00-9:00", target_date="20.05"
+    )
+    assert success is False
+    assert message == SHEETS_UNAVAILABLE_MESSAGE
+
+
+@pytest.mark.asyncio
+async def test_booking_is_queued_while_sheets_unavailable(mock_gs, mock_storage, tmp_path):
+    outbox = WriteOutbox(str(tmp_path / "outbox.jsonl"))
+    service = BookingService(mock_gs, mock_storage, "Sheet1", cache_ttl=60, outbox=outbox)
+    mock_gs.get_data.return_value = [["", ""], ["", ""]]
+    await service.get_table_data()
+    mock_gs.write_value.side_effect = CircuitOpenError("open")
+
+    success, message = await service.book_slot(
+        user_id=123, day="Пн", time_slot="8:00-9:00", target_date="20.05"
+    )
+
+    assert success is True
+    assert message == OUTBOX_QUEUED_MESSAGE
+    assert [operation.cell for operation in outbox.pending()] == ["B2"]
+    assert service._cache_data[1][1] == "Алексей 20.05"
+    mock_storage.add_booking.assert_called_once_with(123, "B2", "20.05")
+
+    # Зарезервированная ячейка занята и для следующих записей, и после обновления кэша
+    await service.get_table_data(Freshness.FRESH)
+    success, _ = await service.book_slot(
+        user_id=456, day="Пн", time_slot="8:00-9:00", target_date="20.05"
+    )
+    assert success is False
+    assert len(outbox) == 1
+
+
+@pytest.mark.asyncio
+async def test_drain_outbox_rolls_back_conflicting_booking(mock_gs, mock_storage, tmp_path):
+    outbox = WriteOutbox(str(tmp_path / "outbox.jsonl"))
+    await outbox.add(OutboxOperation("book", 123, "B2", "Алексей 20.05", date="20.05"))
+    await outbox.add(OutboxOperation("book", 123, "D2", "Алексей 21.05", date="21.05"))
+    service = BookingService(mock_gs, mock_storage, "Sheet1", cache_ttl=60, outbox=outbox)
+    mock_storage.get_owner_by_cell = MagicMock(return_value="123")
+    mock_gs.get_data.return_value = [["", "", "", ""], ["", "", "", ""]]
+    await service.get_table_data()
+    # Пока таблица была недоступна, слот B2 заняли вручную
+    mock_gs.get_data.return_value = [["", "", "", ""], ["", "Иван 20.05", "", ""]]
+    mock_gs.batch_update_values.return_value = True
+
+    outcomes = await service.drain_outbox()
+
+    assert [(operation.cell, error is None) for operation, error in outcomes] == [("B2", False), ("D2", True)]
+    mock_gs.batch_update_values.assert_called_once_with(
+        "Sheet1", [{'range': "D2", 'values': [["Алексей 21.05"]]}]
+    )
+    mock_storage.remove_booking.assert_called_once_with("B2")
+    assert len(outbox) == 0
+    assert service._cache_data[1][1] == "Иван 20.05"
+
+
+@pytest.mark.asyncio
+async def test_rejected_outbox_operation_is_dead_lettered(mock_gs, mock_storage, tmp_path):
+    filename = str(tmp_path / "outbox.jsonl")
+    outbox = WriteOutbox(filename)
+    await outbox.add(OutboxOperation("book", 123, "B2", "Алексей 20.05", date="20.05"))
+    await outbox.add(OutboxOperation("book", 456, "D2", "Ира 21.05", date="21.05"))
+    service = BookingService(mock_gs, mock_storage, "Sheet1", cache_ttl=60, outbox=outbox)
+    mock_storage.get_owner_by_cell = MagicMock(return_value="123")
+    mock_gs.get_data.return_value = [["", "", "", ""], ["", "", "", ""]]
+    # Таблица отклоняет любой пакет с ячейкой B2
+    mock_gs.batch_update_values.side_effect = lambda sheet, batch: all(item['range'] != "B2" for item in batch)
+
+    with pytest.raises(RuntimeError):
+        await service.drain_outbox(max_attempts=2)
+    restored = WriteOutbox(filename)
+    await restored.load()
+    assert [operation.attempts for operation in restored.pending()] == [1, 1]
+
+    # Операция с отказом отправляется отдельно и после второго отказа уходит в dead letter
+    outcomes = await service.drain_outbox(max_attempts=2)
+    assert [(operation.cell, error is not None) for operation, error in outcomes] == [("B2", True)]
+    mock_storage.remove_booking.assert_called_once_with("B2")
+    assert "Алексей 20.05" in (tmp_path / "outbox.jsonl.dead").read_text(encoding="utf-8")
+
+    # Следующая операция больше не заблокирована
+    outcomes = await service.drain_outbox(max_attempts=2)
+    assert [(operation.cell, error) for operation, error in outcomes] == [("D2", None)]
+    assert len(outbox) == 0
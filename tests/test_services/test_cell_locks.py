@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from services.cell_locks import CellLockManager, CellLockTimeout
+
+
+@pytest.mark.asyncio
+async def test_idle_locks_are_dropped():
+    manager = CellLockManager(timeout=1)
+
+    async with manager.hold(["B2", "D3"]):
+        assert len(manager) == 2
+
+    assert len(manager) == 0
+    assert manager.get_stats()["B2"]["acquisitions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_contention_and_timeout_are_recorded():
+    manager = CellLockManager(timeout=1)
+
+    async with manager.hold(["B2"]):
+        with pytest.raises(CellLockTimeout):
+            async with manager.hold(["B2"], timeout=0.02):
+                pass
+
+        async def wait_for_cell():
+            async with manager.hold(["B2"]):
+                pass
+
+        waiter = asyncio.create_task(wait_for_cell())
+        await asyncio.sleep(0.01)
+
+    await waiter
+    stats = manager.get_stats()["B2"]
+    assert stats["timeouts"] == 1
+    assert stats["contended"] == 1
+    assert stats["max_wait"] > 0
+
+
+@pytest.mark.asyncio
+async def test_overlapping_multi_cell_holds_do_not_deadlock():
+    manager = CellLockManager(timeout=1)
+    order = []
+
+    async def worker(name, cells):
+        async with manager.hold(cells) as held:
+            order.append((name, held))
+            await asyncio.sleep(0.01)
+
+    # Ячейки перечислены в разном порядке: без сортировки возможна взаимная блокировка
+    await asyncio.wait_for(asyncio.gather(
+        worker("a", ["B2", "D3"]),
+        worker("b", ["D3", "B2"]),
+    ), timeout=1)
+
+    assert [held for _, held in order] == [["B2", "D3"], ["B2", "D3"]]
+    assert len(manager) == 0
@@ -0,0 +1,49 @@
+import time
+
+from services.circuit_breaker import CircuitBreaker, CircuitState
+
+
+def test_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+
+    breaker.record_failure()
+    breaker.record_failure()
+    breaker.record_success(0.1)  # Успех сбрасывает серию
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state is CircuitState.CLOSED
+
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+    assert breaker.allow_request() is False
+    assert breaker.get_stats()["rejected"] == 1
+
+
+def test_slow_calls_count_as_failures():
+    breaker = CircuitBreaker(failure_threshold=2, slow_call_threshold=1.0)
+
+    breaker.record_success(2.5)
+    breaker.record_success(3.0)
+
+    assert breaker.state is CircuitState.OPEN
+
+
+def test_half_open_allows_single_probe():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record_failure()
+
+    # Время размыкания в прошлом: пора пробовать
+    breaker._opened_at = time.monotonic() - 61
+    assert breaker.allow_request() is True
+    assert breaker.state is CircuitState.HALF_OPEN
+    assert breaker.allow_request() is False
+
+    # Неудачная проба снова размыкает выключатель
+    breaker.record_failure()
+    assert breaker.state is CircuitState.OPEN
+
+    breaker._opened_at = time.monotonic() - 61
+    assert breaker.allow_request() is True
+    breaker.record_success(0.1)
+    assert breaker.state is CircuitState.CLOSED
+    assert breaker.get_stats()["times_opened"] == 2
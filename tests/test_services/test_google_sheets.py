@@ -0,0 +1,388 @@
+import asyncio
+import json
+import threading
+import time
+from unittest.mock import MagicMock
+
+import httplib2
+import pytest
+import rsa
+from googleapiclient.errors import HttpError
+
+import services.google_sheets as google_sheets
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError, CircuitState
+from services.deadlines import SheetsTimeoutError, sheets_deadline
+from services.google_sheets import GoogleSheetsService
+from services.rate_limiter import Priority, TokenBucket, sheets_priority
+
+
+@pytest.fixture
+def credentials_file(tmp_path):
+    _, private_key = rsa.newkeys(512)
+    path = tmp_path / "service_account.json"
+    path.write_text(json.dumps({
+        "type": "service_account",
+        "client_email": "bot@example.iam.gserviceaccount.com",
+        "private_key": private_key.save_pkcs1().decode(),
+        "token_uri": "https://oauth2.example.com/token",
+    }))
+    return str(path)
+
+
+@pytest.fixture
+def built_services(monkeypatch):
+    """Подменяет build_sheets_service: каждый созданный сервис запоминает поток, в котором создан."""
+    services = []
+
+    def fake_build(*args, **kwargs):
+        owner = threading.get_ident()
+        service = MagicMock()
+
+        def execute():
+            # Объект сервиса используется только в создавшем его потоке
+            assert threading.get_ident() == owner
+            time.sleep(0.01)
+            return {"values": [["Иван 20.05"]]}
+
+        service.spreadsheets.return_value.values.return_value.get.return_value.execute.side_effect = execute
+        services.append(service)
+        return service
+
+    monkeypatch.setattr(google_sheets, "build_sheets_service", fake_build)
+    return services
+
+
+@pytest.mark.asyncio
+async def test_each_worker_thread_builds_own_service(credentials_file, built_services):
+    gs = GoogleSheetsService("sheet-id", credentials_file, max_workers=2)
+
+    results = await asyncio.gather(*(gs.get_data("Sheet1", f"B{row}") for row in range(2, 8)))
+
+    assert all(result == [["Иван 20.05"]] for result in results)
+    assert 1 <= len(built_services) <= 2
+
+    stats = gs.get_stats()
+    assert stats["calls"] == 6
+    assert stats["queue_depth"] == 0
+    assert stats["in_flight"] == 0
+    assert stats["max_latency"] >= 0.01
+    await gs.close()
+
+
+@pytest.mark.asyncio
+async def test_stats_logger_reports_periodically(credentials_file, built_services, caplog):
+    gs = GoogleSheetsService("sheet-id", credentials_file)
+    await gs.get_data("Sheet1", "B2")
+
+    caplog.set_level("INFO", logger="services.google_sheets")
+    task = asyncio.create_task(gs.run_stats_logger(0.01))
+    await asyncio.sleep(0.05)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    reports = [r.getMessage() for r in caplog.records if "📊" in r.getMessage()]
+    assert len(reports) >= 2
+    assert "запросов 1" in reports[-1]
+    await gs.close()
+
+
+@pytest.mark.asyncio
+async def test_quota_error_is_retried_after_retry_after(credentials_file, monkeypatch):
+    responses = [
+        HttpError(httplib2.Response({"status": 429, "retry-after": "0"}), b"quota"),
+        {"values": [["Иван 20.05"]]},
+    ]
+
+    def execute():
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    service = MagicMock()
+    service.spreadsheets.return_value.values.return_value.get.return_value.execute.side_effect = execute
+    monkeypatch.setattr(google_sheets, "build_sheets_service", lambda *args, **kwargs: service)
+
+    gs = GoogleSheetsService("sheet-id", credentials_file, max_retries=2)
+
+    assert await gs.get_data("Sheet1", "B2") == [["Иван 20.05"]]
+    assert gs.get_stats()["calls"] == 2
+    await gs.close()
+
+
+@pytest.mark.asyncio
+async def test_client_error_is_not_retried(credentials_file, monkeypatch):
+    service = MagicMock()
+    service.spreadsheets.return_value.values.return_value.update.return_value.execute.side_effect = HttpError(
+        httplib2.Response({"status": 400}), b"bad range"
+    )
+    monkeypatch.setattr(google_sheets, "build_sheets_service", lambda *args, **kwargs: service)
+
+    gs = GoogleSheetsService("sheet-id", credentials_file, max_retries=2)
+
+    assert await gs.write_value("Sheet1", "B2", "Иван 20.05") is False
+    assert gs.get_stats()["calls"] == 1
+    await gs.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reads_of_same_range_share_one_call(credentials_file, built_services):
+    gs = GoogleSheetsService("sheet-id", credentials_file, max_workers=2)
+
+    results = await asyncio.gather(*(gs.get_data("Sheet1", "A1:N9") for _ in range(5)))
+
+    assert all(result == [["Иван 20.05"]] for result in results)
+    # Каждый вызывающий получает свою копию
+    results[0][0][0] = "изменено"
+    assert results[1][0][0] == "Иван 20.05"
+
+    stats = gs.get_stats()
+    assert stats["calls"] == 1
+    assert stats["coalesced_reads"] == 4
+
+    # Без окна повторного использования следующее чтение идет в API
+    await gs.get_data("Sheet1", "A1:N9")
+    assert gs.get_stats()["calls"] == 2
+    await gs.close()
+
+
+@pytest.mark.asyncio
+async def test_reuse_window_serves_recent_result(credentials_file, built_services):
+    gs = GoogleSheetsService("sheet-id", credentials_file, reuse_window=60)
+
+    await gs.get_data("Sheet1", "A1:N9")
+    await gs.get_data("Sheet1", "A1:N9")
+
+    assert gs.get_stats()["calls"] == 1
+    await gs.close()
+
+
+@pytest.mark.asyncio
+async def test_shared_read_propagates_exception(credentials_file, monkeypatch):
+    service = MagicMock()
+    service.spreadsheets.return_value.values.return_value.get.return_value.execute.side_effect = HttpError(
+        httplib2.Response({"status": 400}), b"bad range"
+    )
+    monkeypatch.setattr(google_sheets, "build_sheets_service", lambda *args, **kwargs: service)
+    gs = GoogleSheetsService("sheet-id", credentials_file)
+
+    results = await asyncio.gather(
+        gs.get_data("Sheet1", "Z99"), gs.get_data("Sheet1", "Z99"), return_exceptions=True
+    )
+
+    assert all(isinstance(result, HttpError) for result in results)
+    assert gs.get_stats()["calls"] == 1
+    await gs.close()
+
+
+@pytest.mark.asyncio
+async def test_batch_get_returns_values_by_range(credentials_file, monkeypatch):
+    service = MagicMock()
+    batch_get = service.spreadsheets.return_value.values.return_value.batchGet
+    batch_get.return_value.execute.return_value = {"valueRanges": [
+        {"range": "Sheet1!P1", "values": [["7"]]},
+        {"range": "Sheet1!A1:N9"},
+    ]}
+    monkeypatch.setattr(google_sheets, "build_sheets_service", lambda *args, **kwargs: service)
+    gs = GoogleSheetsService("sheet-id", credentials_file)
+
+    result = await gs.batch_get("Sheet1", ["P1", "A1:N9"])
+
+    assert result == {"P1": [["7"]], "A1:N9": []}
+    batch_get.assert_called_once_with(spreadsheetId="sheet-id", ranges=["Sheet1!P1", "Sheet1!A1:N9"])
+    await gs.close()
+
+
+@pytest.mark.asyncio
+async def test_hung_request_times_out_and_frees_queue(credentials_file, monkeypatch):
+    release = threading.Event()
+    service = MagicMock()
+    service.spreadsheets.return_value.values.return_value.get.return_value.execute.side_effect = (
+        lambda: release.wait(1) and {"values": []}
+    )
+    monkeypatch.setattr(google_sheets, "build_sheets_service", lambda *args, **kwargs: service)
+    gs = GoogleSheetsService("sheet-id", credentials_file, max_workers=1, read_timeout=0.05)
+
+    # Второе чтение ждет единственный поток и снимается с очереди по таймауту
+    results = await asyncio.gather(
+        gs.get_data("Sheet1", "B2"), gs.get_data("Sheet1", "B3"), return_exceptions=True
+    )
+
+    assert all(isinstance(result, SheetsTimeoutError) for result in results)
+    assert gs.get_stats()["queue_depth"] == 0
+    release.set()
+    await gs.close()
+
+
+@pytest.mark.asyncio
+async def test_context_deadline_bounds_request(credentials_file, monkeypatch):
+    service = MagicMock()
+    service.spreadsheets.return_value.values.return_value.update.return_value.execute.side_effect = (
+        lambda: time.sleep(0.2)
+    )
+    monkeypatch.setattr(google_sheets, "build_sheets_service", lambda *args, **kwargs: service)
+    gs = GoogleSheetsService("sheet-id", credentials_file, write_timeout=10)
+
+    started = time.monotonic()
+    with sheets_deadline(0.05):
+        with pytest.raises(SheetsTimeoutError):
+            await gs.write_value("Sheet1", "B2", "Иван 20.05")
+
+    assert time.monotonic() - started < 0.15
+    await gs.close()
+
+
+@pytest.mark.asyncio
+async def test_shared_read_is_not_bound_by_first_caller_deadline(credentials_file, monkeypatch):
+    service = MagicMock()
+    execute = service.spreadsheets.return_value.values.return_value.get.return_value.execute
+    execute.side_effect = lambda: time.sleep(0.2) or {"values": [["Иван 20.05"]]}
+    monkeypatch.setattr(google_sheets, "build_sheets_service", lambda *args, **kwargs: service)
+    gs = GoogleSheetsService("sheet-id", credentials_file, read_timeout=10)
+
+    async def read_with_deadline(timeout):
+        with sheets_deadline(timeout):
+            return await gs.get_data("Sheet1", "B2")
+
+    # Первый вызывающий запускает общий запрос с коротким дедлайном, второй к нему присоединяется
+    results = await asyncio.gather(read_with_deadline(0.05), read_with_deadline(5), return_exceptions=True)
+
+    assert isinstance(results[0], SheetsTimeoutError)
+    assert results[1] == [["Иван 20.05"]]
+    assert execute.call_count == 1
+    await gs.close()
+
+
+@pytest.mark.asyncio
+async def test_shared_read_is_promoted_to_joiner_priority(credentials_file, monkeypatch):
+    order = []
+    service = MagicMock()
+
+    def get(spreadsheetId, range):
+        order.append(range)
+        request = MagicMock()
+        request.execute.return_value = {"values": [[range]]}
+        return request
+
+    service.spreadsheets.return_value.values.return_value.get.side_effect = get
+    monkeypatch.setattr(google_sheets, "build_sheets_service", lambda *args, **kwargs: service)
+    limiter = TokenBucket(rate=20, capacity=1)
+    gs = GoogleSheetsService("sheet-id", credentials_file, read_limiter=limiter)
+    await limiter.acquire()
+
+    async def read(range_a1, priority):
+        with sheets_priority(priority):
+            return await gs.get_data("Sheet1", range_a1)
+
+    table_view = asyncio.create_task(read("C3", Priority.NORMAL))
+    await asyncio.sleep(0)
+    # Фоновое чтение B2 с низким приоритетом, к которому присоединяется предпроверка бронирования
+    background = asyncio.create_task(read("B2", Priority.LOW))
+    await asyncio.sleep(0)
+    precheck = asyncio.create_task(read("B2", Priority.HIGH))
+
+    await asyncio.gather(table_view, background, precheck)
+
+    assert order == ["Sheet1!B2", "Sheet1!C3"]
+    assert precheck.result() == [["Sheet1!B2"]]
+    await gs.close()
+
+
+@pytest.mark.asyncio
+async def test_slow_read_is_hedged_within_budget(credentials_file, monkeypatch):
+    calls = []
+
+    def execute():
+        calls.append(threading.get_ident())
+        # Двадцать первый запрос «зависает», все остальные отвечают сразу
+        time.sleep(0.3 if len(calls) == 21 else 0.001)
+        return {"values": [[str(len(calls))]]}
+
+    service = MagicMock()
+    service.spreadsheets.return_value.values.return_value.get.return_value.execute.side_effect = execute
+    monkeypatch.setattr(google_sheets, "build_sheets_service", lambda *args, **kwargs: service)
+    gs = GoogleSheetsService("sheet-id", credentials_file, max_workers=2, hedge_percentile=95, hedge_budget=0.05)
+
+    for _ in range(20):
+        await gs.get_data("Sheet1", "B2")
+    assert gs.get_stats()["hedge_threshold"] > 0
+
+    started = time.monotonic()
+    assert await gs.get_data("Sheet1", "B2") == [["22"]]
+    assert time.monotonic() - started < 0.2
+
+    # Бюджет исчерпан: следующий медленный запрос не дублируется
+    assert not gs._can_hedge()
+
+    await asyncio.sleep(0.3)
+    stats = gs.get_stats()
+    assert stats["hedge_wins"] == 1
+    assert stats["hedge_rate"] == pytest.approx(1 / 21)
+    assert stats["avg_hedge_saving"] > 0.1
+    await gs.close()
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_rejects_without_calling_api(credentials_file, monkeypatch):
+    service = MagicMock()
+    service.spreadsheets.return_value.values.return_value.get.return_value.execute.side_effect = HttpError(
+        httplib2.Response({"status": 503}), b"unavailable"
+    )
+    monkeypatch.setattr(google_sheets, "build_sheets_service", lambda *args, **kwargs: service)
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    gs = GoogleSheetsService("sheet-id", credentials_file, max_retries=0, circuit_breaker=breaker)
+
+    for row in (2, 3):
+        with pytest.raises(HttpError):
+            await gs.get_data("Sheet1", f"B{row}")
+    assert breaker.state is CircuitState.OPEN
+
+    with pytest.raises(CircuitOpenError):
+        await gs.get_data("Sheet1", "B4")
+    assert gs.get_stats()["calls"] == 2
+    await gs.close()
+
+
+def test_client_is_built_lazily_from_bundled_discovery(credentials_file, tmp_path):
+    with pytest.raises(FileNotFoundError):
+        GoogleSheetsService("sheet-id", str(tmp_path / "missing.json"))
+
+    gs = GoogleSheetsService("sheet-id", credentials_file)
+    assert gs._credentials is None
+
+    # Встроенный discovery-документ: без обращения к сети
+    service = google_sheets.build_sheets_service(httplib2.Http())
+    assert hasattr(service.spreadsheets().values(), "batchGet")
+
+
+@pytest.mark.asyncio
+async def test_prewarm_builds_service_and_fetches_token(credentials_file, built_services, monkeypatch):
+    refreshed = []
+
+    def fake_refresh(credentials, request):
+        refreshed.append(request)
+        credentials.token = "token"
+        credentials.expiry = None
+
+    monkeypatch.setattr("google.oauth2.service_account.Credentials.refresh", fake_refresh)
+    gs = GoogleSheetsService("sheet-id", credentials_file, max_workers=1)
+    assert built_services == []
+
+    assert await gs.prewarm() is True
+    assert len(built_services) == 1
+    assert len(refreshed) == 1
+
+    # Первый запрос использует подготовленный сервис потока
+    assert await gs.get_data("Sheet1", "B2") == [["Иван 20.05"]]
+    assert len(built_services) == 1
+
+
+@pytest.mark.asyncio
+async def test_prewarm_fails_on_malformed_credentials(tmp_path, built_services):
+    path = tmp_path / "service_account.json"
+    path.write_text(json.dumps({"type": "service_account", "client_email": "bot@example.com"}))
+    gs = GoogleSheetsService("sheet-id", str(path))
+
+    with pytest.raises(ValueError):
+        await gs.prewarm()
+    assert built_services == []
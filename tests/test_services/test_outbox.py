@@ -0,0 +1,56 @@
+import pytest
+from unittest.mock import AsyncMock
+
+from services.outbox import OutboxOperation, WriteOutbox
+from services.outbox_drainer import OutboxDrainer
+
+
+@pytest.mark.asyncio
+async def test_pending_operations_survive_restart(tmp_path):
+    filename = str(tmp_path / "outbox.jsonl")
+    outbox = WriteOutbox(filename)
+    first = OutboxOperation("book", 123, "B2", "Алексей 20.05", date="20.05")
+    second = OutboxOperation("delete", 456, "D3", "", expected="Иван 21.05")
+    third = OutboxOperation("book", 789, "F4", "Ира 22.05", date="22.05")
+    for operation in (first, second, third):
+        await outbox.add(operation)
+    await outbox.complete([second.op_id])
+
+    # Оборванная при падении последняя строка пропускается
+    with open(filename, "a", encoding="utf-8") as f:
+        f.write('{"op":"add","op_id":')
+
+    restored = WriteOutbox(filename)
+    await restored.load()
+    assert [operation.op_id for operation in restored.pending()] == [first.op_id, third.op_id]
+    assert restored.pending()[0].value == "Алексей 20.05"
+
+
+@pytest.mark.asyncio
+async def test_completed_outbox_is_compacted(tmp_path):
+    filename = tmp_path / "outbox.jsonl"
+    outbox = WriteOutbox(str(filename))
+    operation = OutboxOperation("book", 123, "B2", "Алексей 20.05", date="20.05")
+    await outbox.add(operation)
+
+    await outbox.complete([operation.op_id])
+
+    assert len(outbox) == 0
+    assert filename.read_text(encoding="utf-8") == ""
+
+
+@pytest.mark.asyncio
+async def test_drainer_notifies_residents_about_outcome():
+    booked = OutboxOperation("book", 123, "B2", "Алексей 20.05", date="20.05")
+    rejected = OutboxOperation("book", 456, "N9", "Ира 26.05", date="26.05")
+    booking_service = AsyncMock()
+    booking_service.drain_outbox.return_value = [(booked, None), (rejected, "слот уже занят: Иван 26.05")]
+    notify = AsyncMock(side_effect=[None, RuntimeError("blocked")])
+
+    drainer = OutboxDrainer(booking_service, WriteOutbox("unused.jsonl"), notify, batch_size=10)
+
+    assert await drainer.drain_once() == 2
+    booking_service.drain_outbox.assert_called_once_with(10, 5)
+    assert notify.call_args_list[0].args == (123, "✅ Запись на <b>Пн 8:00-9:00</b> сохранена в таблице.")
+    assert notify.call_args_list[1].args[0] == 456
+    assert "Вс 22:00-23:00" in notify.call_args_list[1].args[1]
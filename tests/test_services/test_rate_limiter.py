@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+import pytest
+
+from services.rate_limiter import Priority, TokenBucket, backoff_delay, current_priority, sheets_priority
+
+
+@pytest.mark.asyncio
+async def test_bucket_allows_burst_then_limits_rate():
+    bucket = TokenBucket(rate=50, capacity=2)
+
+    started = time.monotonic()
+    for _ in range(4):
+        await bucket.acquire()
+    elapsed = time.monotonic() - started
+
+    # Два токена из запаса, еще два — по 20 мс на пополнение
+    assert 0.03 <= elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_waiters_served_by_priority():
+    bucket = TokenBucket(rate=100, capacity=1)
+    await bucket.acquire()
+    order = []
+
+    async def request(name, priority):
+        await bucket.acquire(priority)
+        order.append(name)
+
+    tasks = [
+        asyncio.create_task(request("view", Priority.LOW)),
+        asyncio.create_task(request("table", Priority.NORMAL)),
+        asyncio.create_task(request("booking", Priority.HIGH)),
+    ]
+    await asyncio.sleep(0)
+    assert bucket.queue_depth == 3
+    await asyncio.gather(*tasks)
+
+    assert order == ["booking", "table", "view"]
+
+
+def test_backoff_honours_retry_after_and_cap():
+    assert backoff_delay(0, base=0.5, cap=30, retry_after=7) == 7
+    assert backoff_delay(0, base=0.5, cap=30, retry_after=120) == 30
+    assert all(0 <= backoff_delay(10, base=0.5, cap=4) <= 4 for _ in range(20))
+
+
+def test_priority_context():
+    assert current_priority() is Priority.NORMAL
+    with sheets_priority(Priority.HIGH):
+        assert current_priority() is Priority.HIGH
+    assert current_priority() is Priority.NORMAL
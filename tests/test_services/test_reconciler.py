@@ -0,0 +1,125 @@
+import time
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+
+import pytest
+
+from services.reconciler import SheetReconciler
+from services.storage import UserStorage
+from utils.helpers import cell_to_indices
+
+
+def _future_date(days: int = 3) -> str:
+    return (date.today() + timedelta(days=days)).strftime("%d.%m")
+
+
+def _grid(**cells) -> list:
+    """Пустая сетка A1:N9 с заданными ячейками (например, B2="Иван 20.05")."""
+    grid = [[""] * 14 for _ in range(9)]
+    for cell, value in cells.items():
+        row_idx, col_idx = cell_to_indices(cell)
+        grid[row_idx][col_idx] = value
+    return grid
+
+
+@pytest.fixture
+async def storage(tmp_path):
+    storage_obj = UserStorage(filename=str(tmp_path / "users.json"))
+    await storage_obj.load()
+    return storage_obj
+
+
+@pytest.fixture
+def booking_service():
+    service = MagicMock()
+    service.written_since = MagicMock(return_value=False)
+    return service
+
+
+@pytest.mark.asyncio
+async def test_reconcile_updates_all_users(storage, booking_service):
+    target = _future_date()
+    other = _future_date(4)
+    for user_id, name in ((1, "Анна"), (2, "Борис")):
+        await storage.add_user(user_id)
+        await storage.set_user_name(user_id, name)
+    await storage.add_booking(1, "B2", target)
+    await storage.add_booking(2, "D3", target)
+
+    reconciler = SheetReconciler(booking_service, storage)
+    booking_service.add_snapshot_listener.assert_called_once_with(reconciler.on_snapshot)
+
+    # Первый снимок подтверждает обе записи
+    await reconciler.reconcile(_grid(B2=f"Анна {target}", D3=f"Борис {target}"), time.time())
+    assert storage.get_user_bookings(1) == {"B2": target}
+    assert storage.get_user_bookings(2) == {"D3": target}
+
+    # Ячейку Анны очистили вручную, Борису перенесли дату
+    changed = await reconciler.reconcile(_grid(D3=f"Борис {other}"), time.time())
+
+    assert changed == 2
+    assert storage.get_user_bookings(1) == {}
+    assert storage.get_owner_by_cell("B2") is None
+    assert storage.get_user_bookings(2) == {"D3": other}
+
+
+@pytest.mark.asyncio
+async def test_reconcile_diffs_only_changed_cells(storage, booking_service):
+    reconciler = SheetReconciler(booking_service, storage)
+
+    first = reconciler.diff(_grid(B2="Анна 20.05"))
+    assert len(first) == 9 * 14
+
+    reconciler._previous = _grid(B2="Анна 20.05")
+    assert reconciler.diff(_grid(B2="Анна 20.05", F4="Ира 21.05")) == {"F4": "Ира 21.05"}
+
+
+@pytest.mark.asyncio
+async def test_reconcile_skips_cells_written_after_snapshot(storage, booking_service):
+    target = _future_date()
+    await storage.add_user(1)
+    await storage.set_user_name(1, "Анна")
+    await storage.add_booking(1, "B2", target)
+
+    # Снимок начали загружать до того, как бот записал B2
+    booking_service.written_since = MagicMock(side_effect=lambda cell, ts: cell == "B2")
+    reconciler = SheetReconciler(booking_service, storage)
+
+    await reconciler.reconcile(_grid(), time.time())
+
+    assert storage.get_user_bookings(1) == {"B2": target}
+
+
+@pytest.mark.asyncio
+async def test_invalid_hand_typed_date_is_treated_as_ghost(storage, booking_service):
+    target = _future_date()
+    await storage.add_user(1)
+    await storage.set_user_name(1, "Анна")
+    await storage.add_booking(1, "B2", target)
+    await storage.add_booking(1, "D3", target)
+    reconciler = SheetReconciler(booking_service, storage)
+
+    # Несуществующая дата в B2 не должна прерывать сверку D3
+    changed = await reconciler.reconcile(_grid(B2="Анна 45.13", D3=f"Анна {_future_date(4)}"), time.time())
+
+    assert changed == 2
+    assert storage.get_user_bookings(1) == {"D3": _future_date(4)}
+
+
+@pytest.mark.asyncio
+async def test_failed_reconcile_is_retried_with_next_snapshot(storage, booking_service, monkeypatch):
+    target = _future_date()
+    await storage.add_user(1)
+    await storage.set_user_name(1, "Анна")
+    await storage.add_booking(1, "B2", target)
+    reconciler = SheetReconciler(booking_service, storage)
+    await reconciler.reconcile(_grid(B2=f"Анна {target}"), time.time())
+
+    original = storage.apply_sheet_changes
+    monkeypatch.setattr(storage, "apply_sheet_changes", MagicMock(side_effect=IOError("disk")))
+    with pytest.raises(IOError):
+        await reconciler.reconcile(_grid(), time.time())
+
+    monkeypatch.setattr(storage, "apply_sheet_changes", original)
+    assert await reconciler.reconcile(_grid(), time.time()) == 1
+    assert storage.get_user_bookings(1) == {}
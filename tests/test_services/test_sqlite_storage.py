@@ -0,0 +1,55 @@
+import json
+import pytest
+from services.sqlite_storage import SQLiteUserStorage, migrate_json_to_sqlite
+
+@pytest.fixture
+async def storage(tmp_path):
+    """Фикстура для создания временной базы SQLite"""
+    storage_obj = SQLiteUserStorage(filename=str(tmp_path / "test_users.sqlite3"))
+    await storage_obj.load()
+    yield storage_obj
+    await storage_obj.close()
+
+@pytest.mark.asyncio
+async def test_add_and_get_user(storage):
+    await storage.add_user(123)
+    await storage.set_user_name(123, "Алексей")
+
+    user = storage.get_user(123)
+    assert user["name"] == "Алексей"
+    assert storage.user_exists(123) is True
+    assert storage.is_name_taken("алексей") is True
+
+@pytest.mark.asyncio
+async def test_bookings_and_sync(storage):
+    await storage.add_user(1)
+    await storage.set_user_name(1, "Тест")
+    await storage.add_booking(1, "B2", "20.05")
+
+    assert storage.get_owner_by_cell("B2") == "1"
+
+    table_data = [
+        ["Время", "Пн"],
+        ["8:00-9:00", "Мария 20.05"]
+    ]
+    assert await storage.sync_user_bookings(1, table_data) == {}
+    assert storage.get_owner_by_cell("B2") is None
+
+@pytest.mark.asyncio
+async def test_migrate_legacy_json(tmp_path):
+    json_path = tmp_path / "legacy.json"
+    db_path = tmp_path / "migrated.sqlite3"
+    # Старый формат: словарь пользователей без global_map
+    json_path.write_text(json.dumps({
+        "1": {"name": "Иван", "points": {"B2": "20.05"}},
+        "2": {"name": None},
+    }), encoding="utf-8")
+
+    users_count, bookings_count = migrate_json_to_sqlite(str(json_path), str(db_path), batch_size=1)
+    assert (users_count, bookings_count) == (2, 1)
+
+    storage = SQLiteUserStorage(filename=str(db_path))
+    await storage.load()
+    assert storage.get_user(1) == {"name": "Иван", "points": {"B2": "20.05"}}
+    assert storage.get_owner_by_cell("B2") == "1"
+    await storage.close()
@@ -1,3 +1,6 @@
+import asyncio
+import json
+from datetime import date, timedelta
 import pytest
 from services.storage import UserStorage
 
@@ -60,4 +63,174 @@ async def test_sync_removes_mismatched_name(storage): # Теперь имя фи
     ]
     
     await storage.sync_user_bookings(user_id, table_data)
-    assert storage.get_user_bookings(user_id) == {}
\ No newline at end of file
+    assert storage.get_user_bookings(user_id) == {}
+@pytest.mark.asyncio
+async def test_journal_replay(tmp_path):
+    test_file = tmp_path / "journal.json"
+
+    storage1 = UserStorage(filename=str(test_file), journal=True)
+    await storage1.add_user(1)
+    await storage1.set_user_name(1, "Иван")
+    await storage1.add_booking(1, "B2", "20.05")
+    await storage1.add_booking(1, "D3", "21.05")
+    await storage1.remove_booking("B2")
+
+    # Снапшот не создавался, все изменения только в журнале
+    assert not test_file.exists()
+
+    storage2 = UserStorage(filename=str(test_file), journal=True)
+    await storage2.load()
+
+    assert storage2.get_user(1)["name"] == "Иван"
+    assert storage2.get_user_bookings(1) == {"D3": "21.05"}
+    assert storage2.get_owner_by_cell("B2") is None
+
+@pytest.mark.asyncio
+async def test_journal_compaction(tmp_path):
+    test_file = tmp_path / "compact.json"
+
+    storage1 = UserStorage(filename=str(test_file), journal=True, compact_threshold=1)
+    await storage1.add_user(1)
+    await storage1._compaction_task
+    await storage1.set_user_name(1, "Иван")
+    await storage1._compaction_task
+
+    # Журнал свернут в снапшот и обрезан
+    assert test_file.exists()
+    assert (tmp_path / "compact.json.journal").stat().st_size == 0
+
+    storage2 = UserStorage(filename=str(test_file), journal=True)
+    await storage2.load()
+    assert storage2.get_user(1)["name"] == "Иван"
+
+@pytest.mark.asyncio
+async def test_group_commit_single_write(tmp_path, monkeypatch):
+    test_file = tmp_path / "group.json"
+    storage = UserStorage(filename=str(test_file), flush_interval=0.01)
+
+    writes = []
+    original_save_sync = storage._save_sync
+    monkeypatch.setattr(storage, "_save_sync", lambda payload: (writes.append(payload), original_save_sync(payload)))
+
+    # Параллельные мутации в пределах окна сохраняются одной записью
+    await asyncio.gather(*(storage.add_booking(uid, f"B{uid}", "20.05") for uid in range(2, 10)))
+    assert len(writes) == 1
+
+    storage2 = UserStorage(filename=str(test_file))
+    await storage2.load()
+    assert storage2.get_owner_by_cell("B9") == "9"
+
+@pytest.mark.asyncio
+async def test_name_index_follows_renames(tmp_path):
+    test_file = tmp_path / "index.json"
+
+    storage1 = UserStorage(filename=str(test_file))
+    await storage1.add_user(1)
+    await storage1.set_user_name(1, "Иван")
+    await storage1.set_user_name(1, "Пётр")
+
+    assert storage1.is_name_taken("ПЁТР") is True
+    assert storage1.is_name_taken("иван") is False
+
+    # Индекс перестраивается при загрузке
+    storage2 = UserStorage(filename=str(test_file))
+    await storage2.load()
+    assert storage2.is_name_taken("пётр") is True
+
+@pytest.mark.asyncio
+async def test_binary_snapshot_upgrade_and_fallback(tmp_path):
+    json_file = tmp_path / "users.json"
+
+    storage1 = UserStorage(filename=str(json_file))
+    await storage1.add_booking(1, "B2", "20.05")
+    await storage1.set_user_name(1, "Иван")
+
+    # Загрузка из JSON сразу сохраняет бинарный снапшот
+    storage2 = UserStorage(filename=str(json_file), snapshot_format="binary")
+    await storage2.load()
+    binary_file = tmp_path / "users.bin"
+    assert binary_file.exists()
+
+    storage3 = UserStorage(filename=str(json_file), snapshot_format="binary")
+    await storage3.load()
+    assert storage3.get_user(1) == {"name": "Иван", "points": {"B2": "20.05"}}
+
+    # Поврежденный снапшот -> откат на JSON
+    data = bytearray(binary_file.read_bytes())
+    data[-1] ^= 0xFF
+    binary_file.write_bytes(bytes(data))
+
+    storage4 = UserStorage(filename=str(json_file), snapshot_format="binary")
+    await storage4.load()
+    assert storage4.get_owner_by_cell("B2") == "1"
+    # Поврежденный файл сохранен для ручного восстановления и не перезаписан устаревшими данными
+    assert (tmp_path / "users.bin.corrupt").read_bytes() == bytes(data)
+    assert not binary_file.exists()
+
+@pytest.mark.asyncio
+async def test_purge_expired(storage):
+    past = (date.today() - timedelta(days=3)).strftime("%d.%m")
+    future = (date.today() + timedelta(days=3)).strftime("%d.%m")
+
+    await storage.add_booking(1, "B2", past)
+    await storage.add_booking(2, "D2", past)
+    await storage.add_booking(1, "F2", future)
+
+    assert await storage.purge_expired() == 2
+    assert storage.get_user_bookings(1) == {"F2": future}
+    assert storage.get_owner_by_cell("D2") is None
+    # Повторный проход ничего не находит
+    assert await storage.purge_expired() == 0
+
+
+@pytest.mark.asyncio
+async def test_commit_rejects_batch_with_invalid_record(storage):
+    future = (date.today() + timedelta(days=3)).strftime("%d.%m")
+    await storage.add_booking(1, "B2", future)
+
+    with pytest.raises(ValueError):
+        await storage._commit(
+            {"op": "remove_booking", "cell": "B2"},
+            {"op": "add_booking", "user_id": "1", "cell": "D2", "date": "45.13"},
+        )
+
+    # Ни одна запись пачки не применена
+    assert storage.get_user_bookings(1) == {"B2": future}
+
+
+@pytest.mark.asyncio
+async def test_non_io_save_error_does_not_hang_commit(tmp_path, monkeypatch):
+    storage = UserStorage(filename=str(tmp_path / "users.json"), flush_interval=0.01)
+
+    def broken_serialize():
+        raise TypeError("not serializable")
+
+    monkeypatch.setattr(storage, "_serialize_snapshot", broken_serialize)
+    with pytest.raises(TypeError):
+        await asyncio.wait_for(storage.add_user(1), timeout=1)
+
+    # Незаписанная мутация сохраняется следующим flush
+    monkeypatch.undo()
+    await asyncio.wait_for(storage.add_user(2), timeout=1)
+    storage2 = UserStorage(filename=str(tmp_path / "users.json"))
+    await storage2.load()
+    assert storage2.get_users_count() == 2
+
+
+@pytest.mark.asyncio
+async def test_booking_owner_missing_from_users_survives_save(tmp_path):
+    future = (date.today() + timedelta(days=3)).strftime("%d.%m")
+    test_file = tmp_path / "users.json"
+    test_file.write_text(json.dumps({
+        "users": {"1": {"name": "Иван", "points": {}}},
+        "global_map": {"B2": {"user_id": "2", "date": future}},
+    }), encoding="utf-8")
+
+    storage = UserStorage(filename=str(test_file))
+    await storage.load()
+    await asyncio.wait_for(storage.add_user(3), timeout=1)
+
+    storage2 = UserStorage(filename=str(test_file))
+    await storage2.load()
+    assert storage2.get_owner_by_cell("B2") == "2"
+    assert storage2.get_user_bookings(2) == {"B2": future}
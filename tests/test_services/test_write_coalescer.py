@@ -0,0 +1,91 @@
+import asyncio
+from unittest.mock import AsyncMock
+
+import pytest
+
+from services.deadlines import SheetsTimeoutError, sheets_deadline
+from services.write_coalescer import SheetWriteCoalescer
+
+
+@pytest.fixture
+def mock_gs():
+    gs = AsyncMock()
+    gs.batch_update_values.return_value = True
+    gs.write_value.return_value = True
+    return gs
+
+
+@pytest.mark.asyncio
+async def test_writes_within_window_sent_as_one_batch(mock_gs):
+    coalescer = SheetWriteCoalescer(mock_gs, "Sheet1", window=0.01)
+
+    results = await asyncio.gather(
+        coalescer.write("B2", "Анна 20.05"),
+        coalescer.write("D3", "Борис 21.05"),
+        coalescer.clear("F4"),
+    )
+
+    assert results == [True, True, True]
+    mock_gs.batch_update_values.assert_called_once_with("Sheet1", [
+        {'range': "B2", 'values': [["Анна 20.05"]]},
+        {'range': "D3", 'values': [["Борис 21.05"]]},
+        {'range': "F4", 'values': [[""]]},
+    ])
+    mock_gs.write_value.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_falls_back_to_single_writes(mock_gs):
+    mock_gs.batch_update_values.return_value = False
+    mock_gs.write_value.side_effect = lambda sheet, cell, value: cell != "D3"
+    coalescer = SheetWriteCoalescer(mock_gs, "Sheet1", window=0.01)
+
+    results = await asyncio.gather(
+        coalescer.write("B2", "Анна 20.05"),
+        coalescer.write("D3", "Борис 21.05"),
+    )
+
+    # Каждый вызывающий получает свой результат
+    assert results == [True, False]
+    assert mock_gs.write_value.call_count == 2
+
+
+@pytest.mark.asyncio
+async def test_full_batch_sent_without_waiting_window(mock_gs):
+    coalescer = SheetWriteCoalescer(mock_gs, "Sheet1", window=10, max_batch=2)
+
+    results = await asyncio.wait_for(asyncio.gather(
+        coalescer.write("B2", "Анна 20.05"),
+        coalescer.write("D3", "Борис 21.05"),
+    ), timeout=1)
+
+    assert results == [True, True]
+    mock_gs.batch_update_values.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_zero_window_writes_directly(mock_gs):
+    coalescer = SheetWriteCoalescer(mock_gs, "Sheet1", window=0)
+
+    assert await coalescer.write("B2", "Анна 20.05") is True
+    mock_gs.write_value.assert_called_once_with("Sheet1", "B2", "Анна 20.05")
+    mock_gs.batch_update_values.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_write_abandoned_by_deadline_is_not_sent(mock_gs):
+    coalescer = SheetWriteCoalescer(mock_gs, "Sheet1", window=0.2)
+
+    async def abandoned_write():
+        with sheets_deadline(0.05):
+            return await coalescer.write("B2", "Анна 20.05")
+
+    results = await asyncio.gather(
+        abandoned_write(), coalescer.write("D3", "Борис 21.05"), return_exceptions=True
+    )
+
+    assert isinstance(results[0], SheetsTimeoutError)
+    assert results[1] is True
+    mock_gs.batch_update_values.assert_called_once_with("Sheet1", [
+        {'range': "D3", 'values': [["Борис 21.05"]]},
+    ])
@@ -1,11 +1,14 @@
 import pytest
-from datetime import datetime
+from datetime import date, datetime
 from unittest.mock import patch
 from utils.date_helpers import (
     get_date_for_weekday, 
     parse_cell_content, 
     is_date_expired,
-    is_cell_available_for_date
+    is_cell_available_for_date,
+    resolve_booking_date,
+    date_str_to_ordinal,
+    ordinal_to_date_str,
 )
 
 # Фиксируем дату как Понедельник 20 мая 2024 года
@@ -57,4 +60,14 @@ def test_is_cell_available_for_date():
     # Занято, если дата та же
     available, error = is_cell_available_for_date("Иван 20.05", "20.05")
     assert available is False
-    assert "Занято" in error
\ No newline at end of file
+    assert "Занято" in error
+
+def test_resolve_booking_date_year_rollover():
+    # В декабре январские даты относятся к следующему году, и наоборот
+    assert resolve_booking_date("02.01", today=date(2024, 12, 30)) == date(2025, 1, 2)
+    assert resolve_booking_date("30.12", today=date(2025, 1, 2)) == date(2024, 12, 30)
+
+def test_date_ordinal_roundtrip():
+    ordinal = date_str_to_ordinal("20.05", today=date(2024, 5, 1))
+    assert ordinal == date(2024, 5, 20).toordinal()
+    assert ordinal_to_date_str(ordinal) == "20.05"
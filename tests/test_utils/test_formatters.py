@@ -1,6 +1,7 @@
 import pytest
+from datetime import datetime
 from unittest.mock import patch
-from utils.formatters import split_message, format_washing_schedule_simple
+from utils.formatters import split_message, format_washing_schedule_simple, format_data_as_of
 
 def test_split_message():
     text = "Line1\nLine2\nLine3"
@@ -24,4 +25,8 @@ def test_format_washing_schedule_simple(mock_get_date):
     
     assert "Иван 20.05" in result # Актуальная запись
     assert "Петр 19.05" not in result # Старая запись должна скрыться
-    assert "🟢 <b>8:00-9:00</b>: свободно" in result # Вместо Петра должно быть свободно
\ No newline at end of file
+    assert "🟢 <b>8:00-9:00</b>: свободно" in result # Вместо Петра должно быть свободно
+
+def test_format_data_as_of():
+    timestamp = datetime(2025, 5, 20, 14, 5).timestamp()
+    assert "20.05 14:05" in format_data_as_of(timestamp)
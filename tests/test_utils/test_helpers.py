@@ -1,5 +1,5 @@
 import pytest
-from utils.helpers import get_cell_address, cell_to_indices, get_human_readable_slot
+from utils.helpers import get_cell_address, cell_to_indices, get_human_readable_slot, cell_to_slot_id, slot_id_to_cell
 
 def test_get_cell_address_valid():
     # Пн -> B, 8:00-9:00 -> 2. Итог: B2, 2
@@ -21,4 +21,8 @@ def test_cell_to_indices():
 def test_get_human_readable_slot():
     assert get_human_readable_slot("B2") == "Пн 8:00-9:00"
     assert get_human_readable_slot("N9") == "Вс 22:00-23:00"
-    assert get_human_readable_slot("Z100") == "??? ??:??" # Неизвестные координаты
\ No newline at end of file
+    assert get_human_readable_slot("Z100") == "??? ??:??" # Неизвестные координаты
+
+def test_slot_id_roundtrip():
+    assert cell_to_slot_id("B2") == 27
+    assert slot_id_to_cell(cell_to_slot_id("N9")) == "N9"
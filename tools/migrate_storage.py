@@ -0,0 +1,27 @@
+"""
+Перенос данных пользователей из JSON-хранилища в базу SQLite.
+
+Использование:
+    python -m tools.migrate_storage data/users_data.json data/users_data.sqlite3
+"""
+import argparse
+import logging
+
+from services.sqlite_storage import migrate_json_to_sqlite
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Миграция users_data.json в SQLite")
+    parser.add_argument("json_path", help="Путь к исходному JSON-файлу")
+    parser.add_argument("db_path", help="Путь к целевой базе SQLite")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Строк в одной транзакции")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s - %(message)s")
+
+    users_count, bookings_count = migrate_json_to_sqlite(args.json_path, args.db_path, args.batch_size)
+    logging.info(f"✅ Перенесено пользователей: {users_count}, записей: {bookings_count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Optional, Tuple
 import re
 
@@ -165,3 +165,39 @@ def is_date_expired(date_str: str) -> bool:
         return booking_date < now
     except ValueError:
         return True # Если дата кривая, считаем "протухшей"
+
+
+def resolve_booking_date(date_str: str, today: Optional[date] = None) -> date:
+    """
+    Восстанавливает полную дату записи 'дд.мм' с учетом смены года
+    (по тем же правилам, что и is_date_expired).
+
+    Args:
+        date_str: Дата в формате 'дд.мм'.
+        today: Точка отсчета (по умолчанию сегодня).
+
+    Returns:
+        date: Полная дата записи.
+
+    Raises:
+        ValueError: Если строка не является корректной датой.
+    """
+    if today is None:
+        today = date.today()
+
+    day, month = map(int, date_str.split('.'))
+    year = today.year
+    if today.month == 1 and month == 12:
+        year -= 1
+    elif today.month == 12 and month == 1:
+        year += 1
+
+    return date(year, month, day)
+
+def date_str_to_ordinal(date_str: str, today: Optional[date] = None) -> int:
+    """Преобразует дату 'дд.мм' в порядковый номер дня (date.toordinal)."""
+    return resolve_booking_date(date_str, today).toordinal()
+
+def ordinal_to_date_str(ordinal: int) -> str:
+    """Преобразует порядковый номер дня обратно в строку 'дд.мм'."""
+    return date.fromordinal(ordinal).strftime("%d.%m")
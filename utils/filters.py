@@ -1,12 +1,12 @@
 from aiogram.filters import BaseFilter
 from aiogram.types import Message
-from services.storage import UserStorage
+from services.storage_base import BaseUserStorage
 
 class IsNamedUser(BaseFilter):
     """
     Фильтр проверяет, записано ли имя у пользователя в базе данных.
     """
-    def __init__(self, storage: UserStorage):
+    def __init__(self, storage: BaseUserStorage):
         self.storage = storage
 
     async def __call__(self, message: Message) -> bool:
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import List
 from config.constants import DAYS_OF_WEEK
 from utils.date_helpers import parse_cell_content, get_date_for_day
@@ -78,4 +79,9 @@ def format_washing_schedule_simple(data: List[List[str]], table_link: str) -> st
     
     lines.append("\n📆 <i>Актуально на текущую неделю</i>")
     
-    return "\n".join(lines)
\ No newline at end of file
+    return "\n".join(lines)
+
+def format_data_as_of(timestamp: float) -> str:
+    """Пометка для данных из последнего снимка, пока Google таблица недоступна."""
+    as_of = datetime.fromtimestamp(timestamp).strftime("%d.%m %H:%M")
+    return f"⚠️ <i>Google таблица временно недоступна, данные на {as_of}</i>"
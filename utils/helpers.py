@@ -1,4 +1,4 @@
-from typing import Optional, Tuple
+from typing import List, Optional, Tuple
 import re
 
 from config.constants import DAY_TO_COLUMN, TIME_TO_ROW
@@ -49,6 +49,39 @@ def cell_to_indices(cell_address: str) -> Tuple[int, int]:
     
     return row_idx, col_idx
 
+# Количество колонок в кодировке идентификатора слота (однобуквенные колонки A-Z)
+SLOT_ID_COLUMNS = 26
+
+def cell_to_slot_id(cell_address: str) -> int:
+    """
+    Кодирует адрес ячейки в целочисленный идентификатор слота.
+    Пример: 'B2' -> 1 * 26 + 1 = 27.
+
+    Args:
+        cell_address: Адрес ячейки с однобуквенной колонкой.
+
+    Returns:
+        int: Идентификатор слота.
+    """
+    row_idx, col_idx = cell_to_indices(cell_address)
+    if col_idx >= SLOT_ID_COLUMNS:
+        raise ValueError(f"Unsupported cell address: {cell_address}")
+    return row_idx * SLOT_ID_COLUMNS + col_idx
+
+def indices_to_cell(row_idx: int, col_idx: int) -> str:
+    """Обратное к cell_to_indices для однобуквенных колонок: (1, 1) -> 'B2'."""
+    return f"{chr(ord('A') + col_idx)}{row_idx + 1}"
+
+def slot_id_to_cell(slot_id: int) -> str:
+    """Декодирует идентификатор слота обратно в адрес ячейки ('B2')."""
+    return indices_to_cell(*divmod(slot_id, SLOT_ID_COLUMNS))
+
+def get_grid_value(table_data: List[List[str]], row_idx: int, col_idx: int) -> str:
+    """Возвращает значение ячейки сетки или "", если ячейка за пределами данных."""
+    if row_idx < len(table_data) and col_idx < len(table_data[row_idx]):
+        return table_data[row_idx][col_idx] or ""
+    return ""
+
 def get_human_readable_slot(cell_address: str) -> str:
     """
     Преобразует технический адрес ячейки в понятный пользователю формат.